@@ -32,21 +32,29 @@ async def get_users(
     search: Optional[str] = Query(None),
     role: Optional[UserRole] = Query(None),
     is_active: Optional[bool] = Query(None),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get all users with filters"""
     skip = (page - 1) * limit
-    users, total = AdminUserService.get_users(db, skip, limit, search, role, is_active)
+    try:
+        users, total, next_cursor = AdminUserService.get_users(
+            db, skip, limit, search, role, is_active, cursor, include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return AdminPaginatedResponse(
         items=[AdminUserResponse.from_orm(user) for user in users],
         total=total,
         page=page,
         limit=limit,
-        pages=(total + limit - 1) // limit,
-        has_next=page * limit < total,
-        has_prev=page > 1
+        pages=(total + limit - 1) // limit if total is not None else None,
+        has_next=next_cursor is not None,
+        has_prev=page > 1 or cursor is not None,
+        next_cursor=next_cursor
     )
 
 @router.get("/users/{user_id}", response_model=AdminUserResponse)
@@ -188,21 +196,29 @@ async def get_orders(
     search: Optional[str] = Query(None),
     status: Optional[OrderStatus] = Query(None),
     payment_status: Optional[PaymentStatus] = Query(None),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get all orders with filters"""
     skip = (page - 1) * limit
-    orders, total = AdminOrderService.get_orders(db, skip, limit, search, status, payment_status)
+    try:
+        orders, total, next_cursor = AdminOrderService.get_orders(
+            db, skip, limit, search, status, payment_status, cursor, include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return AdminPaginatedResponse(
         items=[AdminOrderResponse.model_validate(order) for order in orders],
         total=total,
         page=page,
         limit=limit,
-        pages=(total + limit - 1) // limit,
-        has_next=page * limit < total,
-        has_prev=page > 1
+        pages=(total + limit - 1) // limit if total is not None else None,
+        has_next=next_cursor is not None,
+        has_prev=page > 1 or cursor is not None,
+        next_cursor=next_cursor
     )
 
 @router.get("/orders/{order_id}", response_model=AdminOrderResponse)
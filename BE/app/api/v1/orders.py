@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.db.database import get_db
 from app.models.models import User
 from app.schemas.schemas import OrderCreate, OrderResponse
@@ -23,14 +24,31 @@ async def create_order(
 
 @router.get("", response_model=list[OrderResponse])
 async def get_user_orders(
+    response: Response,
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get user's orders"""
+    """Get user's orders
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one
+    (page is then ignored). X-Total-Count is an approximate total, set unless
+    include_total is false.
+    """
     skip = (page - 1) * limit
-    orders, total = OrderService.get_user_orders(db, current_user.id, skip, limit)
+    try:
+        orders, total, next_cursor = OrderService.get_user_orders(
+            db, current_user.id, skip, limit, cursor, include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
     return orders
 
 @router.get("/{order_id}", response_model=OrderResponse)
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.db.database import get_db
 from app.schemas.schemas import ProductResponse
 from app.services.services import ProductService
@@ -8,14 +9,30 @@ router = APIRouter(prefix="/products", tags=["Products"])
 
 @router.get("", response_model=list[ProductResponse])
 async def get_products(
+    response: Response,
     page: int = 1,
     limit: int = 20,
     search: str = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
-    """Get products with pagination and search"""
+    """Get products with pagination and search
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one
+    (page is then ignored). Searches are ranked by relevance and paged with
+    `page` only; a cursor together with `search` is rejected. X-Total-Count is
+    an approximate total, set unless include_total is false.
+    """
     skip = (page - 1) * limit
-    products, total = ProductService.get_products(db, skip, limit, search)
+    try:
+        products, total, next_cursor = ProductService.get_products(db, skip, limit, search, cursor, include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
     return products
 
 @router.get("/{product_id}", response_model=ProductResponse)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.db.database import get_db
 from app.models.models import User
 from app.schemas.schemas import ReviewCreate, ReviewResponse
@@ -23,16 +24,28 @@ async def get_product_reviews(
     product_id: int,
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
-    """Get reviews for a product"""
+    """Get reviews for a product
+    
+    Pass next_cursor as `cursor` to fetch the next page (page is then ignored).
+    total is approximate (cached briefly) and null when include_total is false.
+    """
     skip = (page - 1) * limit
-    reviews, total = ReviewService.get_product_reviews(db, product_id, skip, limit)
+    try:
+        reviews, total, next_cursor = ReviewService.get_product_reviews(
+            db, product_id, skip, limit, cursor, include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "reviews": reviews,
         "total": total,
         "page": page,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor
     }
 
 @router.get("/my-reviews")
@@ -55,6 +55,13 @@ class Settings(BaseSettings):
     # Cache
     cache_ttl: int = 3600  # 1 hour
 
+    # Listing totals are cached this long (seconds) per filter combination, in each worker process
+    # (not shared, not invalidated on writes, so workers may disagree within the window); 0 counts every request
+    listing_count_cache_seconds: int = 60
+
+    # Product search via MATCH ... AGAINST (needs the FULLTEXT indexes from create_tables.py)
+    product_search_fulltext: bool = True
+
     # Payment - MoMo Configuration
     momo_partner_code: str = "MOMOBKUN20180529"  # Default test credentials
     momo_access_key: str = "klm05TvNBzhg7h7j"
@@ -161,9 +161,10 @@ class AdminPaginationParams(BaseModel):
 
 class AdminPaginatedResponse(BaseModel):
     items: List[Union[AdminUserResponse, AdminProductResponse, AdminOrderResponse, dict]]
-    total: int
+    total: Optional[int] = None
     page: int
     limit: int
-    pages: int
+    pages: Optional[int] = None
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None  # keyset listings only
@@ -1,15 +1,20 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
 from sqlalchemy import func, desc, asc, and_
 from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 from app.models.models import User, Product, Order, OrderItem, Review, UserRole, OrderStatus, PaymentStatus
 from app.schemas.admin_schemas import AdminUserUpdate, AdminProductCreate, AdminProductUpdate, AdminOrderUpdate
+from app.utils.pagination import approximate_count, fetch_page
 
 class AdminUserService:
     @staticmethod
     def get_users(db: Session, skip: int = 0, limit: int = 20, search: Optional[str] = None, 
-                  role: Optional[UserRole] = None, is_active: Optional[bool] = None):
-        """Get all users with filters"""
+                  role: Optional[UserRole] = None, is_active: Optional[bool] = None,
+                  cursor: Optional[str] = None, include_total: bool = True):
+        """Get all users with filters, newest first
+        
+        Returns (users, total, next_cursor); total is None unless include_total.
+        """
         query = db.query(User)
         
         if search:
@@ -25,8 +30,8 @@ class AdminUserService:
         if is_active is not None:
             query = query.filter(User.is_active == is_active)
         
-        total = query.count()
-        users = query.order_by(desc(User.created_at)).offset(skip).limit(limit).all()
+        total = approximate_count(query) if include_total else None
+        users, next_cursor = fetch_page(query, User.created_at, User.id, limit=limit, skip=skip, cursor=cursor)
         
         # Add user statistics
         for user in users:
@@ -41,7 +46,7 @@ class AdminUserService:
             ).scalar() or 0
             user.total_spent = float(total_spent)
         
-        return users, total
+        return users, total, next_cursor
     
     @staticmethod
     def get_user(db: Session, user_id: int):
@@ -169,8 +174,12 @@ class AdminOrderService:
     def get_orders(db: Session, skip: int = 0, limit: int = 20,
                 search: Optional[str] = None,
                 status: Optional[OrderStatus] = None,
-                payment_status: Optional[PaymentStatus] = None):
-
+                payment_status: Optional[PaymentStatus] = None,
+                cursor: Optional[str] = None, include_total: bool = True):
+        """Get all orders with filters, newest first
+        
+        Returns (orders, total, next_cursor); total is None unless include_total.
+        """
         query = db.query(Order).join(User)
 
         if search:
@@ -186,28 +195,25 @@ class AdminOrderService:
         if payment_status:
             query = query.filter(Order.payment_status == payment_status)
 
-        total = query.count()
+        total = approximate_count(query) if include_total else None
 
-        orders = (
-            query
-            .order_by(desc(Order.created_at))
-            .offset(skip)
-            .limit(limit)
-            .all()
+        # username/user_email come from the joined user, items from one selectin query
+        orders, next_cursor = fetch_page(
+            query.options(contains_eager(Order.user), selectinload(Order.order_items).joinedload(OrderItem.product)),
+            Order.created_at, Order.id, limit=limit, skip=skip, cursor=cursor
         )
 
-        return orders, total
+        return orders, total, next_cursor
 
     
     @staticmethod
     def get_order(db: Session, order_id: int):
         """Get single order by ID"""
-        order = db.query(Order).filter(Order.id == order_id).first()
-        if order:
-            order.items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            order.username = order.user.username
-            order.user_email = order.user.email
-        return order
+        # items/username/user_email are properties over these relationships
+        return db.query(Order).options(
+            joinedload(Order.user),
+            selectinload(Order.order_items).joinedload(OrderItem.product)
+        ).filter(Order.id == order_id).first()
     
     @staticmethod
     def update_order(db: Session, order_id: int, order_update: AdminOrderUpdate):
@@ -1,38 +1,83 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import func, desc
+from sqlalchemy.dialects.mysql import match
 from typing import List, Optional
+from app.core.config import settings
+from app.utils.pagination import approximate_count, fetch_page, newest_first
 from app.models.models import Product, User, Order, OrderItem, Review
 from app.schemas.schemas import ProductCreate, ProductUpdate, OrderCreate, ReviewCreate
 from datetime import datetime
+import re
 import uuid
 
+
+def _fulltext_phrase(search: str) -> str:
+    """Boolean-mode phrase for MATCH ... AGAINST, with the operator characters removed"""
+    cleaned = " ".join(re.sub(r'["()<>~*+\-@]', " ", search).split())
+    # Shorter than ngram_token_size (2) cannot match through the ngram parser
+    return f'"{cleaned}"' if len(cleaned) >= 2 else ""
+
+def _attach_ratings(db: Session, products: List[Product]) -> None:
+    """Set average_rating/review_count on products with one grouped query for the whole page"""
+    if not products:
+        return
+    # Restricted to the page's ids so idx_review_product_id bounds the scan
+    rows = db.query(
+        Review.product_id,
+        func.avg(Review.rating).label('avg_rating'),
+        func.count(Review.id).label('review_count')
+    ).filter(Review.product_id.in_([product.id for product in products])).group_by(Review.product_id).all()
+    ratings = {row.product_id: row for row in rows}
+    
+    for product in products:
+        rating_data = ratings.get(product.id)
+        product.average_rating = float(rating_data.avg_rating) if rating_data and rating_data.avg_rating else None
+        product.review_count = rating_data.review_count if rating_data else 0
+
+def _with_items():
+    """Loader option: an order's items in one extra query, each joined to its product"""
+    return selectinload(Order.order_items).joinedload(OrderItem.product)
+
+def _attach_product_names(orders: List[Order]) -> None:
+    """Set product_name on already-loaded order items"""
+    for order in orders:
+        for item in order.order_items:
+            item.product_name = item.product.product_name if item.product else "Unknown Product"
+
 class ProductService:
     @staticmethod
-    def get_products(db: Session, skip: int = 0, limit: int = 20, search: Optional[str] = None):
-        """Get products with pagination and search"""
+    def get_products(db: Session, skip: int = 0, limit: int = 20, search: Optional[str] = None,
+                     cursor: Optional[str] = None, include_total: bool = True):
+        """Get products with pagination and search
+        
+        Listings are newest first and support cursors. Searches are ordered by
+        relevance (FULLTEXT) and paged with skip only, so a search has a single
+        order however it is paged; a cursor with a search raises ValueError.
+        Returns (products, total, next_cursor); total is None unless include_total.
+        """
+        if search and cursor:
+            raise ValueError("Cursor pagination is not available for searches, use page")
         query = db.query(Product).filter(Product.is_active == True)
         
-        if search:
-            query = query.filter(
+        phrase = _fulltext_phrase(search) if search else ""
+        if phrase and settings.product_search_fulltext and db.get_bind().dialect.name == "mysql":
+            # Uses the ft_products_search index (create_tables.py), ranked by relevance
+            relevance = match(Product.product_name, Product.title, Product.description, against=phrase).in_boolean_mode()
+            query = query.filter(relevance).order_by(relevance.desc(), Product.id)
+        elif search:
+            query = newest_first(query.filter(
                 Product.product_name.contains(search) |
                 Product.title.contains(search) |
                 Product.description.contains(search)
-            )
-        
-        total = query.count()
-        products = query.offset(skip).limit(limit).all()
+            ), Product.created_at, Product.id)
         
-        # Add average rating and review count
-        for product in products:
-            rating_data = db.query(
-                func.avg(Review.rating).label('avg_rating'),
-                func.count(Review.id).label('review_count')
-            ).filter(Review.product_id == product.id).first()
-            
-            product.average_rating = float(rating_data.avg_rating) if rating_data.avg_rating else None
-            product.review_count = rating_data.review_count or 0
+        total = approximate_count(query) if include_total else None
+        products, next_cursor = fetch_page(
+            query, Product.created_at, Product.id, limit=limit, skip=skip, cursor=cursor, ordered=bool(search)
+        )
+        _attach_ratings(db, products)
         
-        return products, total
+        return products, total, next_cursor
     
     @staticmethod
     def get_product(db: Session, product_id: int):
@@ -40,14 +85,7 @@ class ProductService:
         product = db.query(Product).filter(Product.id == product_id, Product.is_active == True).first()
         
         if product:
-            # Add average rating and review count
-            rating_data = db.query(
-                func.avg(Review.rating).label('avg_rating'),
-                func.count(Review.id).label('review_count')
-            ).filter(Review.product_id == product.id).first()
-            
-            product.average_rating = float(rating_data.avg_rating) if rating_data.avg_rating else None
-            product.review_count = rating_data.review_count or 0
+            _attach_ratings(db, [product])
         
         return product
     
@@ -102,8 +140,12 @@ class OrderService:
         total_amount = 0
         order_items = []
         
+        # One query for every product in the order
+        product_ids = {item.product_id for item in order_data.items}
+        products = {p.id: p for p in db.query(Product).filter(Product.id.in_(product_ids)).all()}
+        
         for item in order_data.items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
+            product = products.get(item.product_id)
             if not product:
                 raise ValueError(f"Product with ID {item.product_id} not found")
             
@@ -136,8 +178,7 @@ class OrderService:
             notes=order_data.notes
         )
         db.add(db_order)
-        db.commit()
-        db.refresh(db_order)
+        db.flush()  # assigns db_order.id; order and items commit together
         
         # Create order items
         for item_data in order_items:
@@ -148,50 +189,38 @@ class OrderService:
             db.add(order_item)
             
             # Update stock
-            product = db.query(Product).filter(Product.id == item_data["product_id"]).first()
-            product.stock_quantity -= item_data["quantity"]
+            products[item_data["product_id"]].stock_quantity -= item_data["quantity"]
         
         db.commit()
-        db.refresh(db_order)
         
-        # Load order items with product info for response
-        # SQLAlchemy will auto-load via relationship
-        for item in db_order.order_items:
-            # Add product_name dynamically for response
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            item.product_name = product.product_name if product else "Unknown Product"
+        # Reload with items and products for the response
+        db_order = db.query(Order).options(_with_items()).filter(Order.id == db_order.id).one()
+        _attach_product_names([db_order])
         
         return db_order
     
     @staticmethod
-    def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 20):
-        """Get user's orders"""
-        query = db.query(Order).filter(Order.user_id == user_id)
-        total = query.count()
-        orders = query.order_by(desc(Order.created_at)).offset(skip).limit(limit).all()
+    def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 20,
+                        cursor: Optional[str] = None, include_total: bool = True):
+        """Get user's orders, newest first
         
-        # Load order items with product info for each order
-        for order in orders:
-            order.order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            # Add product_name for each item
-            for item in order.order_items:
-                product = db.query(Product).filter(Product.id == item.product_id).first()
-                item.product_name = product.product_name if product else "Unknown Product"
+        Returns (orders, total, next_cursor); total is None unless include_total.
+        """
+        query = db.query(Order).filter(Order.user_id == user_id)
+        total = approximate_count(query) if include_total else None
+        orders, next_cursor = fetch_page(
+            query.options(_with_items()), Order.created_at, Order.id, limit=limit, skip=skip, cursor=cursor
+        )
+        _attach_product_names(orders)
         
-        return orders, total
+        return orders, total, next_cursor
     
     @staticmethod
     def get_order(db: Session, order_id: int, user_id: int):
         """Get single order by ID"""
-        order = db.query(Order).filter(Order.id == order_id, Order.user_id == user_id).first()
+        order = db.query(Order).options(_with_items()).filter(Order.id == order_id, Order.user_id == user_id).first()
         if order:
-            order.order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            # Add product_name for each item
-            for item in order.order_items:
-                product = db.query(Product).filter(Product.id == item.product_id).first()
-                item.product_name = product.product_name if product else "Unknown Product"
+            _attach_product_names([order])
         return order
     
     @staticmethod
@@ -230,17 +259,21 @@ class ReviewService:
         return db_review
     
     @staticmethod
-    def get_product_reviews(db: Session, product_id: int, skip: int = 0, limit: int = 20):
-        """Get reviews for a product"""
+    def get_product_reviews(db: Session, product_id: int, skip: int = 0, limit: int = 20,
+                            cursor: Optional[str] = None, include_total: bool = True):
+        """Get reviews for a product, newest first
+        
+        Returns (reviews, total, next_cursor); total is None unless include_total.
+        """
         query = db.query(Review).filter(Review.product_id == product_id)
-        total = query.count()
-        reviews = query.order_by(desc(Review.created_at)).offset(skip).limit(limit).all()
+        total = approximate_count(query) if include_total else None
+        reviews, next_cursor = fetch_page(query, Review.created_at, Review.id, limit=limit, skip=skip, cursor=cursor)
         
         # Load user info for each review
         for review in reviews:
             review.user = db.query(User).filter(User.id == review.user_id).first()
         
-        return reviews, total
+        return reviews, total, next_cursor
     
     @staticmethod
     def get_user_reviews(db: Session, user_id: int, skip: int = 0, limit: int = 20):
@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) pagination on (created_at, id) and cached listing totals.
+
+Listings are ordered newest first. A cursor encodes the (created_at, id) of
+the last row of a page, so the next page is a range seek on the created_at
+index instead of an OFFSET that reads and discards every earlier row.
+"""
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, desc, or_
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for the row that ends a page"""
+    raw = json.dumps({"c": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor, raises ValueError for anything it did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["c"]), int(data["i"])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def newest_first(query: Query, created_col, id_col) -> Query:
+    """The listing order keyset pagination relies on; id breaks created_at ties"""
+    return query.order_by(desc(created_col), desc(id_col))
+
+
+def fetch_page(query: Query, created_col, id_col, *, limit: int, skip: int = 0,
+               cursor: Optional[str] = None, ordered: bool = False):
+    """
+    Fetch one page of a newest-first listing and the cursor of the next one.
+
+    With a cursor the page starts right after it and skip is ignored. One
+    extra row is read to know whether a next page exists; next_cursor is
+    None on the last page. Pass ordered=True when the query already carries
+    a different ORDER BY: the page is then returned as is, without a cursor.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < row_id)
+        ))
+        skip = 0
+    if not ordered:
+        query = newest_first(query, created_col, id_col)
+
+    rows = query.offset(skip).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and not ordered:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return items, next_cursor
+
+
+# Listing totals, cached per filter combination
+_count_cache = {}
+_count_lock = threading.Lock()
+_COUNT_CACHE_MAX = 1024
+
+
+def _count_key(query: Query) -> str:
+    compiled = query.statement.compile()
+    return f"{compiled}|{sorted((k, repr(v)) for k, v in compiled.params.items())}"
+
+
+def approximate_count(query: Query) -> int:
+    """
+    COUNT(*) of a listing query, served from memory for listing_count_cache_seconds.
+
+    The cache is local to each worker process and is not invalidated on
+    writes: a total may lag recent writes by up to the TTL, and two workers can
+    report different totals for the same listing within that window. Paging
+    itself never depends on it. A TTL of 0 counts on every call.
+    """
+    query = query.order_by(None)
+    ttl = settings.listing_count_cache_seconds
+    if ttl <= 0:
+        return query.count()
+
+    key = _count_key(query)
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    total = query.count()
+    with _count_lock:
+        if len(_count_cache) >= _COUNT_CACHE_MAX:
+            _count_cache.clear()
+        _count_cache[key] = (now + ttl, total)
+    return total
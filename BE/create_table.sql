@@ -25,7 +25,9 @@ CREATE TABLE IF NOT EXISTS products (
     stock_quantity INT DEFAULT 0,
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FULLTEXT INDEX ft_products_search (product_name, title, description) WITH PARSER ngram,
+    FULLTEXT INDEX ft_products_name (product_name) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Tạo bảng users
@@ -180,11 +182,13 @@ CREATE INDEX idx_current_price ON products(current_price);
 CREATE INDEX idx_discount_percent ON products(discount_percent);
 CREATE INDEX idx_created_at ON products(created_at);
 CREATE INDEX idx_is_active ON products(is_active);
+CREATE INDEX idx_product_active_created ON products(is_active, created_at, id);
 
 -- Users indexes
 CREATE INDEX idx_user_email ON users(email);
 CREATE INDEX idx_user_username ON users(username);
 CREATE INDEX idx_user_role ON users(role);
+CREATE INDEX idx_user_created_at ON users(created_at, id);
 
 -- Orders indexes
 CREATE INDEX idx_order_user_id ON orders(user_id);
@@ -192,6 +196,7 @@ CREATE INDEX idx_order_number ON orders(order_number);
 CREATE INDEX idx_order_status ON orders(status);
 CREATE INDEX idx_order_payment_status ON orders(payment_status);
 CREATE INDEX idx_order_created_at ON orders(created_at);
+CREATE INDEX idx_order_user_created ON orders(user_id, created_at, id);
 
 -- Order items indexes
 CREATE INDEX idx_order_item_order_id ON order_items(order_id);
@@ -202,6 +207,7 @@ CREATE INDEX idx_review_user_id ON reviews(user_id);
 CREATE INDEX idx_review_product_id ON reviews(product_id);
 CREATE INDEX idx_review_rating ON reviews(rating);
 CREATE INDEX idx_review_created_at ON reviews(created_at);
+CREATE INDEX idx_review_product_created ON reviews(product_id, created_at, id);
 
 -- Categories indexes
 CREATE INDEX idx_category_name ON categories(name);
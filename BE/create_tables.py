@@ -3,6 +3,8 @@ Database Migration Script
 Run this script to create/update all database tables including:
 - Payments table (new)
 - Orders table with customer contact fields (updated)
+- FULLTEXT (ngram) search indexes on products (new)
+- Composite (created_at, id) indexes for keyset pagination (new)
 """
 
 from sqlalchemy import text
@@ -74,6 +76,85 @@ def add_customer_fields_to_orders():
     finally:
         db.close()
 
+# FULLTEXT indexes (ngram parser: works for Vietnamese and matches inside words)
+# used by MATCH ... AGAINST in ProductService.get_products and the chatbot keyword search
+FULLTEXT_INDEXES = {
+    "ft_products_search": "product_name, title, description",
+    "ft_products_name": "product_name",
+}
+
+def add_fulltext_indexes_to_products():
+    """Add FULLTEXT (ngram) indexes to the products table if they don't exist"""
+    db = SessionLocal()
+    try:
+        print("\n📝 Checking products full-text indexes...")
+        
+        for index_name, columns in FULLTEXT_INDEXES.items():
+            result = db.execute(text("""
+                SELECT COUNT(*) 
+                FROM information_schema.STATISTICS 
+                WHERE TABLE_SCHEMA = DATABASE() 
+                AND TABLE_NAME = 'products' 
+                AND INDEX_NAME = :index_name
+            """), {"index_name": index_name})
+            
+            if result.scalar() > 0:
+                print(f"   ✅ {index_name} already exists")
+                continue
+            
+            print(f"   Adding {index_name} ({columns}), this rebuilds the table once...")
+            db.execute(text(f"""
+                ALTER TABLE products 
+                ADD FULLTEXT INDEX {index_name} ({columns}) WITH PARSER ngram
+            """))
+            db.commit()
+            print(f"   ✅ {index_name} added")
+            
+    except Exception as e:
+        db.rollback()
+        print(f"   ⚠️  Full-text index migration error: {e}")
+    finally:
+        db.close()
+
+# Composite indexes behind keyset pagination (app/utils/pagination.py):
+# each listing's filter column, then its (created_at, id) sort key
+KEYSET_INDEXES = {
+    "idx_product_active_created": ("products", "is_active, created_at, id"),
+    "idx_user_created_at": ("users", "created_at, id"),
+    "idx_order_user_created": ("orders", "user_id, created_at, id"),
+    "idx_review_product_created": ("reviews", "product_id, created_at, id"),
+}
+
+def add_keyset_pagination_indexes():
+    """Add the keyset pagination indexes if they don't exist"""
+    db = SessionLocal()
+    try:
+        print("\n📝 Checking keyset pagination indexes...")
+        
+        for index_name, (table_name, columns) in KEYSET_INDEXES.items():
+            result = db.execute(text("""
+                SELECT COUNT(*) 
+                FROM information_schema.STATISTICS 
+                WHERE TABLE_SCHEMA = DATABASE() 
+                AND TABLE_NAME = :table_name 
+                AND INDEX_NAME = :index_name
+            """), {"table_name": table_name, "index_name": index_name})
+            
+            if result.scalar() > 0:
+                print(f"   ✅ {index_name} already exists")
+                continue
+            
+            print(f"   Adding {index_name} on {table_name} ({columns})...")
+            db.execute(text(f"CREATE INDEX {index_name} ON {table_name} ({columns})"))
+            db.commit()
+            print(f"   ✅ {index_name} added")
+            
+    except Exception as e:
+        db.rollback()
+        print(f"   ⚠️  Keyset index migration error: {e}")
+    finally:
+        db.close()
+
 def create_all_tables():
     """Create all tables in the database"""
     print("\n🔨 Creating/updating all database tables...")
@@ -89,6 +170,12 @@ def create_all_tables():
         
         # Run migration for existing orders table
         add_customer_fields_to_orders()
+        
+        # Full-text search indexes on products
+        add_fulltext_indexes_to_products()
+        
+        # Keyset pagination indexes
+        add_keyset_pagination_indexes()
             
     except Exception as e:
         print(f"\n❌ Error creating tables: {e}")
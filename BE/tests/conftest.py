@@ -0,0 +1,10 @@
+import pytest
+
+from app.utils import pagination
+
+
+@pytest.fixture(autouse=True)
+def _clear_count_cache():
+    # Listing totals are cached per process; each test starts from its own database
+    pagination._count_cache.clear()
+    yield
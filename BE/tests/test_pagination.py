@@ -0,0 +1,65 @@
+"""Keyset pagination of product listings and its interaction with search."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import Base, Product
+from app.services.services import ProductService
+from app.utils.pagination import decode_cursor
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    start = datetime(2026, 1, 1)
+    # Three products per timestamp so the id tiebreak matters
+    session.add_all(
+        Product(
+            id=i, product_code=f"P{i:03d}", product_name=f"{'Sữa' if i % 2 else 'Bánh'} {i}",
+            current_price=10_000, created_at=start + timedelta(seconds=i // 3),
+        )
+        for i in range(1, 26)
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_cursor_walk_matches_offset_order(db):
+    expected = [p.id for p in ProductService.get_products(db, 0, 100, include_total=False)[0]]
+    seen, cursor = [], None
+    while True:
+        products, _, cursor = ProductService.get_products(db, 0, 7, cursor=cursor, include_total=False)
+        seen += [p.id for p in products]
+        if cursor is None:
+            break
+    assert seen == expected
+    assert len(set(seen)) == 25
+
+
+def test_offset_page_hands_over_to_cursor(db):
+    first, total, cursor = ProductService.get_products(db, 0, 10)
+    second, _, _ = ProductService.get_products(db, 0, 10, cursor=cursor, include_total=False)
+    by_offset, _, _ = ProductService.get_products(db, 10, 10, include_total=False)
+    assert total == 25
+    assert [p.id for p in second] == [p.id for p in by_offset]
+
+
+def test_search_is_page_based(db):
+    products, total, cursor = ProductService.get_products(db, 0, 5, search="Sữa")
+    assert cursor is None
+    assert total == 13 and all(p.product_name.startswith("Sữa") for p in products)
+    with pytest.raises(ValueError):
+        ProductService.get_products(db, 0, 5, search="Sữa", cursor="anything")
+
+
+def test_invalid_cursor(db):
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        ProductService.get_products(db, 0, 5, cursor="not-a-cursor")
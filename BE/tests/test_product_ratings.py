@@ -0,0 +1,70 @@
+"""Product listings load ratings in a constant number of queries, whatever the page size."""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.models import Base, Product, Review, User
+from app.services.services import ProductService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="a@example.com", username="a", hashed_password="x", full_name="A"))
+    session.add_all(
+        Product(id=i, product_code=f"P{i:03d}", product_name=f"Sản phẩm {i}", current_price=10_000)
+        for i in range(1, 41)
+    )
+    session.flush()
+    # Every third product reviewed, with ratings 1..5
+    session.add_all(
+        Review(user_id=1, product_id=i, rating=r)
+        for i in range(1, 41, 3)
+        for r in range(1, 6)
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _count_statements(session, fn):
+    statements = []
+    engine = session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, len(statements)
+
+
+@pytest.mark.parametrize("include_total", [True, False])
+def test_product_page_query_count_is_constant(db, include_total, monkeypatch):
+    # Count on every call so the total query is part of each page
+    monkeypatch.setattr(settings, "listing_count_cache_seconds", 0)
+    counts = {}
+    for limit in (1, 5, 20, 40):
+        db.expunge_all()
+        _, counts[limit] = _count_statements(
+            db, lambda: ProductService.get_products(db, 0, limit, include_total=include_total)
+        )
+    assert len(set(counts.values())) == 1, counts
+    assert counts[40] <= 3
+
+
+def test_product_page_ratings(db):
+    products, _, _ = ProductService.get_products(db, 0, 40, include_total=False)
+    by_id = {product.id: product for product in products}
+    assert by_id[1].average_rating == 3.0 and by_id[1].review_count == 5
+    assert by_id[2].average_rating is None and by_id[2].review_count == 0
+
+
+def test_single_product_query_count(db):
+    product, count = _count_statements(db, lambda: ProductService.get_product(db, 4))
+    assert count == 2
+    assert product.average_rating == 3.0 and product.review_count == 5
@@ -0,0 +1,115 @@
+"""
+Benchmark: latency of concurrent conversation-memory reads while the response
+cache is invalidated, comparing the old KEYS + DEL approach with the indexed,
+batched ZPOPMIN + UNLINK path used by ResponseCache.
+
+Needs a real Redis server (use a scratch instance, the benchmark FLUSHDBs it):
+    REDIS_URL=redis://localhost:6379/15 python benchmarks/bench_cache_invalidation.py [entries]
+
+Run from chatbot-kltn/. Defaults to 1,000,000 cached entries per scenario.
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+
+import redis
+
+sys.path.append(os.getcwd())
+
+from chatbot.redis_memory import RedisConversationMemory
+from chatbot.response_cache import ResponseCache
+from core.config import get_settings
+
+FILL_BATCH = 10_000
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _fill(client: redis.Redis, entries: int) -> None:
+    """Write entries with the same key layout and index bookkeeping as ResponseCache."""
+    expires_at = time.time() + 3600
+    for start in range(0, entries, FILL_BATCH):
+        pipe = client.pipeline(transaction=False)
+        index = {}
+        for i in range(start, min(entries, start + FILL_BATCH)):
+            context_type = "product" if i % 2 else "advice"
+            key = f"chatbot:cache:{context_type}:{i:016x}"
+            pipe.setex(key, 3600, "x" * 200)
+            index.setdefault(context_type, {})[key] = expires_at
+        for context_type, members in index.items():
+            pipe.zadd(f"chatbot:cacheidx:{context_type}", members)
+            pipe.sadd("chatbot:cacheidx:types", context_type)
+        pipe.execute()
+
+
+def _legacy_invalidate(client: redis.Redis) -> int:
+    keys = client.keys("chatbot:cache:*")
+    return client.delete(*keys) if keys else 0
+
+
+def _measure(client: redis.Redis, memory_key: str, invalidate) -> tuple[list[float], float, int]:
+    samples = []
+    stop = threading.Event()
+
+    def reader() -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.lrange(memory_key, 0, 9)
+            samples.append(time.perf_counter() - start)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    time.sleep(0.2)  # baseline samples before invalidation starts
+    start = time.perf_counter()
+    deleted = invalidate()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    return samples, elapsed, deleted
+
+
+def _report(name: str, samples: list[float], elapsed: float, deleted: int) -> None:
+    print(
+        f"{name:<18} deleted={deleted:>8} invalidation={elapsed:7.2f}s | memory reads n={len(samples):>6} "
+        f"p50={_percentile(samples, 0.50) * 1000:7.3f}ms "
+        f"p99={_percentile(samples, 0.99) * 1000:8.3f}ms "
+        f"max={max(samples) * 1000:8.1f}ms mean={statistics.mean(samples) * 1000:7.3f}ms"
+    )
+
+
+if __name__ == "__main__":
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    settings = get_settings()
+    if not settings.redis_url:
+        sys.exit("REDIS_URL is required")
+
+    client = redis.from_url(settings.redis_url, decode_responses=True)
+    memory = RedisConversationMemory(settings)
+    cache = ResponseCache(settings)
+
+    results = {}
+    for name, invalidate in (
+        ("KEYS + DEL", lambda: _legacy_invalidate(client)),
+        ("index + UNLINK", cache.invalidate_all),
+    ):
+        client.flushdb()
+        for turn in range(10):
+            memory.append("bench-session", "user", f"message {turn}")
+        print(f"Filling {entries} cache entries for '{name}'...")
+        _fill(client, entries)
+        sys.stdout, real_stdout = open(os.devnull, "w"), sys.stdout
+        try:
+            results[name] = _measure(client, memory._key("bench-session"), invalidate)
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+
+    client.flushdb()
+    print(f"Concurrent memory reads during invalidation of {entries} entries")
+    for name, (samples, elapsed, deleted) in results.items():
+        _report(name, samples, elapsed, deleted)
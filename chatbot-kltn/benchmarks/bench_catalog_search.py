@@ -0,0 +1,122 @@
+"""
+Benchmark: keyword search latency of the in-memory CatalogSearchIndex versus
+the SQL LIKE query it replaces, on a synthetic Vietnamese catalog. Also
+reports the full build time and the cost of an incremental re-index.
+
+The SQL side runs on a scratch SQLite file (set DATABASE_URL to anything, it
+is only needed to load the settings); a networked MySQL round trip would add
+to its numbers, never subtract.
+
+Usage (from chatbot-kltn/):
+    python benchmarks/bench_catalog_search.py [products] [queries]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from chatbot.catalog_search import CatalogSearchIndex
+from chatbot.tools import _keyword_results, _keyword_search_stmt
+from models.models import Base, Product
+
+WORDS = ["bắp mỹ", "cà chua", "cải thìa", "thịt heo", "cá hồi", "sữa tươi", "nước mắm", "dầu ăn", "mì gói",
+         "trứng gà", "bánh quy", "nước ngọt", "gạo thơm", "rau muống", "khoai tây", "hành tây", "tôm sú",
+         "đường cát", "muối hột", "cà phê", "trà xanh", "sữa chua", "nấm kim châm", "xúc xích", "chả giò"]
+BRANDS = ["Vinamilk", "TH", "Acecook", "Hảo Hảo", "Neptune", "Chinsu", "Meizan", "Ba Huân", "CP", "Vissan"]
+UNITS = ["500g", "1kg", "300g", "chai 1 lít", "hộp 180ml", "gói 75g", "thùng 30 gói", "vỉ 10 quả"]
+# Folded and misspelled forms the index should still match
+QUERIES = ["bap my", "ca chua", "thit heo", "sua tuoi", "nuoc mam", "banh quy", "gao thom", "ca phe",
+           "sữa chua", "khoai tay", "trung ga", "nam kim cham", "xuc xich", "cha gio", "tra xnah", "mi goi"]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _products(count: int, rng: random.Random) -> list[Product]:
+    now = datetime.utcnow()
+    return [
+        Product(
+            id=i + 1,
+            product_code=f"P{i:07d}",
+            product_name=f"{rng.choice(WORDS)} {rng.choice(BRANDS)} {rng.choice(UNITS)}",
+            current_price=rng.randint(5, 500) * 1000,
+            is_active=True,
+            created_at=now - timedelta(seconds=i),
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def _queries(count: int, rng: random.Random) -> list[tuple]:
+    budgets = [(None, None), (None, 50_000), (20_000, 100_000)]
+    return [([rng.choice(QUERIES)], *rng.choice(budgets)) for _ in range(count)]
+
+
+def _report(name: str, samples: list[float]) -> None:
+    print(
+        f"{name:<28} p50={_percentile(samples, 0.50) * 1000:8.3f}ms p99={_percentile(samples, 0.99) * 1000:8.3f}ms "
+        f"mean={statistics.mean(samples) * 1000:8.3f}ms"
+    )
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+
+    rng = random.Random(7)
+    products = _products(count, rng)
+    queries = _queries(query_count, rng)
+
+    sys.stdout, real_stdout = open(os.devnull, "w"), sys.stdout
+    try:
+        index = CatalogSearchIndex(lambda product: _keyword_results([product])[0])
+        start = time.perf_counter()
+        index.rebuild(products)
+        build_seconds = time.perf_counter() - start
+
+        changed = rng.sample(products, 100)
+        for product in changed:
+            product.product_name = f"{rng.choice(WORDS)} {rng.choice(BRANDS)} mới"
+        start = time.perf_counter()
+        index.apply(changed)
+        index.search(["bap my"])  # pays the deferred price-array rebuild
+        apply_seconds = time.perf_counter() - start
+
+        memory_samples = []
+        for keywords, low, high in queries:
+            start = time.perf_counter()
+            index.search(keywords, min_price=low, max_price=high)
+            memory_samples.append(time.perf_counter() - start)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'catalog.db')}")
+            Base.metadata.create_all(engine, tables=[Product.__table__])
+            Session = sessionmaker(bind=engine)
+            with Session() as db:
+                db.add_all(_products(count, random.Random(7)))
+                db.commit()
+                sql_samples = []
+                for keywords, low, high in queries[: max(50, query_count // 10)]:
+                    start = time.perf_counter()
+                    db.scalars(_keyword_search_stmt(keywords, low, high)).all()
+                    sql_samples.append(time.perf_counter() - start)
+            engine.dispose()
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{count} products, {query_count} keyword queries (1/3 unfiltered, 2/3 price-filtered)")
+    print(f"Full build: {build_seconds * 1000:.0f}ms, incremental re-index of 100 rows: {apply_seconds * 1000:.1f}ms")
+    _report("CatalogSearchIndex (memory)", memory_samples)
+    _report("SQL LIKE (SQLite, local)", sql_samples)
@@ -0,0 +1,78 @@
+"""
+Microbenchmark: per-message overhead of compiling the LangGraph pipeline on
+every request (old behaviour) versus reusing one compiled graph.
+
+Runs without Redis, Qdrant, MySQL or Gemini: the message resolves to the
+``profile`` intent without a user_id, so no tool touches the database and the
+measured time is pure graph overhead.
+
+Usage (from chatbot-kltn/):
+    python benchmarks/bench_graph_compile.py [iterations]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from chatbot.graph import build_graph
+from chatbot.memory import ConversationMemory
+
+
+def _state(i: int) -> dict:
+    return {"session_id": f"bench-{i}", "user_id": None, "message": "show my account information"}
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def bench_rebuild_per_message(iterations: int) -> list[float]:
+    memory = ConversationMemory()
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        graph = build_graph(memory, None)
+        graph.invoke(_state(i), config={"configurable": {"db": None}})
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_compiled_once(iterations: int) -> list[float]:
+    memory = ConversationMemory()
+    graph = build_graph(memory, None)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        graph.invoke(_state(i), config={"configurable": {"db": None}})
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _report(name: str, samples: list[float]) -> None:
+    print(
+        f"{name:<24} mean={statistics.mean(samples) * 1000:7.3f}ms "
+        f"p50={_percentile(samples, 0.50) * 1000:7.3f}ms "
+        f"p99={_percentile(samples, 0.99) * 1000:7.3f}ms"
+    )
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    # Silence the per-node print() logging so it does not dominate timings
+    sys.stdout, real_stdout = open(os.devnull, "w"), sys.stdout
+    try:
+        bench_compiled_once(20)  # warm-up
+        before = bench_rebuild_per_message(iterations)
+        after = bench_compiled_once(iterations)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"Graph overhead per message ({iterations} iterations)")
+    _report("build_graph per message", before)
+    _report("compiled once", after)
+    saved = statistics.mean(before) - statistics.mean(after)
+    print(f"Saved per message: {saved * 1000:.3f}ms ({statistics.mean(before) / statistics.mean(after):.1f}x)")
@@ -0,0 +1,148 @@
+"""
+Benchmark: Redis memory per 1,000 sessions and decode time per
+get_recent_messages call for each conversation-history codec
+(legacy JSON, msgpack, msgpack + zstd with a trained dictionary).
+
+Needs a real Redis server (use a scratch instance, the benchmark FLUSHDBs it):
+    REDIS_URL=redis://localhost:6379/15 python benchmarks/bench_history_codec.py [sessions] [--save-dict PATH]
+
+Run from chatbot-kltn/. Conversations are synthesised from the product catalog in
+../total_products_processed_all.json. --save-dict writes the trained dictionary,
+usable as HISTORY_ZSTD_DICT_PATH.
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from chatbot.message_codec import MessageCodec, MsgpackCodec, ZstdMsgpackCodec, train_zstd_dictionary
+from chatbot.redis_memory import RedisConversationMemory
+from core.config import get_settings
+
+TURNS_PER_SESSION = 10
+DECODE_CALLS = 2000
+
+USER_TEMPLATES = [
+    "Tôi muốn mua {name}",
+    "{name} giá bao nhiêu vậy?",
+    "Có {name} nào dưới {price} không?",
+    "Cho tôi xem {name} đang giảm giá",
+    "Gợi ý giúp tôi món ăn với {name}",
+]
+ASSISTANT_TEMPLATES = [
+    "Dạ, bên em có {name} giá {price_text}. Anh/chị có muốn thêm vào giỏ hàng không ạ?",
+    "Em tìm thấy {name} với giá {price_text}, sản phẩm đang được nhiều khách hàng lựa chọn.",
+    "{name} hiện có giá {price_text}. Ngoài ra anh/chị có thể tham khảo thêm các sản phẩm cùng loại.",
+]
+
+
+def _catalog() -> list[dict]:
+    path = os.path.join(os.getcwd(), "..", "total_products_processed_all.json")
+    try:
+        with open(path, encoding="utf-8") as catalog_file:
+            return json.load(catalog_file)
+    except OSError:
+        return [{"product_name": "Sữa tươi Vinamilk không đường 1L", "current_price": 32000,
+                 "current_price_text": "32.000đ/Hộp 1L"}]
+
+
+def _conversation(rng: random.Random, catalog: list[dict]) -> list[tuple[str, str]]:
+    turns = []
+    for _ in range(TURNS_PER_SESSION // 2):
+        product = rng.choice(catalog)
+        values = {
+            "name": product.get("product_name", ""),
+            "price": f"{int(product.get('current_price') or 0) // 1000 + 10}k",
+            "price_text": product.get("current_price_text") or "",
+        }
+        turns.append(("user", rng.choice(USER_TEMPLATES).format(**values)))
+        turns.append(("assistant", rng.choice(ASSISTANT_TEMPLATES).format(**values)))
+    return turns
+
+
+def _memory_usage(client, keys: list[bytes]) -> int | None:
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key)
+        return sum(pipe.execute())
+    except Exception:
+        return None  # MEMORY USAGE unsupported (e.g. fake servers)
+
+
+def bench_codec(memory: RedisConversationMemory, codec: MessageCodec, conversations: list) -> dict:
+    client = memory.redis_client
+    client.flushdb()
+    memory.codec = codec
+    for i, turns in enumerate(conversations):
+        pipe = client.pipeline(transaction=False)
+        memory._queue_push(pipe, f"bench-{i}", [codec.encode(role, content) for role, content in turns], None)
+        pipe.execute()
+
+    keys = [memory._key(f"bench-{i}") for i in range(len(conversations))]
+    raw = [client.lrange(key, 0, 4) for key in keys[:DECODE_CALLS]]
+    payload = sum(len(entry) for key in keys for entry in client.lrange(key, 0, -1))
+    samples = []
+    for entries in raw:
+        start = time.perf_counter()
+        decoded = memory._decode_all(entries)
+        samples.append(time.perf_counter() - start)
+        assert len(decoded) == len(entries), f"{codec.name} failed to decode its own entries"
+
+    per_1000 = 1000 / len(conversations)
+    usage = _memory_usage(client, keys)
+    return {
+        "payload_kb": payload * per_1000 / 1024,
+        "redis_kb": usage * per_1000 / 1024 if usage is not None else None,
+        "decode_us": statistics.mean(samples) * 1e6,
+        "decode_p99_us": sorted(samples)[int(len(samples) * 0.99)] * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    sessions = int(args[0]) if args else 5000
+    dict_path = sys.argv[sys.argv.index("--save-dict") + 1] if "--save-dict" in sys.argv else None
+
+    settings = get_settings()
+    if not settings.redis_url:
+        sys.exit("REDIS_URL is required")
+
+    rng = random.Random(42)
+    catalog = _catalog()
+    # Train on conversations disjoint from the measured ones
+    training = [turn for _ in range(2000) for turn in _conversation(rng, catalog)]
+    zstd_dict = train_zstd_dictionary(training)
+    if dict_path:
+        with open(dict_path, "wb") as dict_file:
+            dict_file.write(zstd_dict)
+        print(f"Saved {len(zstd_dict)} byte dictionary to {dict_path}")
+
+    conversations = [_conversation(rng, catalog) for _ in range(sessions)]
+    memory = RedisConversationMemory(settings)
+    codecs = {
+        "json (legacy)": MessageCodec(),
+        "msgpack": MsgpackCodec(),
+        "zstd (no dict)": ZstdMsgpackCodec(),
+        "zstd + dict": ZstdMsgpackCodec(zstd_dict),
+    }
+
+    sys.stdout, real_stdout = open(os.devnull, "w"), sys.stdout
+    try:
+        results = {name: bench_codec(memory, codec, conversations) for name, codec in codecs.items()}
+        memory.redis_client.flushdb()
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{sessions} sessions x {TURNS_PER_SESSION} messages; per 1,000 sessions / per get_recent_messages(limit=5)")
+    for name, result in results.items():
+        redis_kb = f"{result['redis_kb']:9.1f}KB" if result["redis_kb"] is not None else "      n/a"
+        print(
+            f"{name:<16} payload={result['payload_kb']:8.1f}KB redis={redis_kb} "
+            f"decode mean={result['decode_us']:6.1f}us p99={result['decode_p99_us']:6.1f}us"
+        )
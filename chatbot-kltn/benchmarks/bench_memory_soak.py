@@ -0,0 +1,56 @@
+"""
+Soak benchmark: resident memory of the per-worker ConversationMemory while
+millions of distinct sessions pass through it. With the session cap and LRU
+eviction RSS should level off once the cap is reached instead of growing
+with every new session.
+
+Usage (from chatbot-kltn/):
+    python benchmarks/bench_memory_soak.py [sessions] [max_sessions]
+"""
+import os
+import resource
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from chatbot.memory import ConversationMemory
+
+CHECKPOINTS = 10
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        # Peak RSS on platforms without /proc (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def soak(sessions: int, max_sessions: int) -> None:
+    memory = ConversationMemory(max_sessions=max_sessions)
+    step = max(1, sessions // CHECKPOINTS)
+    start = time.perf_counter()
+    print(f"{'sessions seen':>14} {'resident':>9} {'bytes':>12} {'evicted':>10} {'rss':>9}")
+    for i in range(sessions):
+        session_id = f"soak-{i}"
+        memory.append(session_id, "system", f"session initialized for user {i}")
+        memory.append(session_id, "user", "Tôi muốn mua sữa tươi không đường")
+        memory.append(session_id, "assistant", "Dạ, bên em có sữa tươi Vinamilk không đường 1L giá 32.000đ.")
+        if (i + 1) % step == 0:
+            stats = memory.get_stats()
+            print(
+                f"{i + 1:>14} {stats['sessions']:>9} {stats['bytes']:>12} "
+                f"{stats['evicted']:>10} {_rss_mb():>7.1f}MB"
+            )
+    elapsed = time.perf_counter() - start
+    print(f"{sessions * 3 / elapsed:,.0f} appends/s")
+
+
+if __name__ == "__main__":
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    max_sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    soak(sessions, max_sessions)
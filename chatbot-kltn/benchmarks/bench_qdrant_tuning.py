@@ -0,0 +1,149 @@
+"""
+Benchmark: recall@k versus latency across Qdrant collection tuning knobs
+(HNSW m / ef_construct, int8 scalar quantization) and search-time knobs
+(hnsw_ef, rescoring), on a synthetic catalog with price-filtered queries.
+
+Collections are built with embedded_data_to_vector.ensure_qdrant_collection,
+so payload indexes and quantization match production. Recall is measured
+against exact (numpy) top-k over the same vectors and filters.
+
+Needs a Qdrant server (QDRANT_URL, + QDRANT_API_KEY): qdrant-client's local
+mode always does a brute-force scan and ignores every knob measured here.
+The benchmark creates and drops scratch collections named bench_tuning_*.
+
+Usage (from chatbot-kltn/):
+    python benchmarks/bench_qdrant_tuning.py [rows] [queries] [dim]
+"""
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from embedded_data_to_vector import EmbedConfig, ensure_qdrant_collection
+
+LIMIT = 10
+# (m, ef_construct, quantization)
+BUILD_CONFIGS = [(16, 100, "none"), (16, 100, "int8"), (32, 200, "int8"), (8, 64, "int8")]
+SEARCH_EFS = [16, 32, 64, 128]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _wait_indexed(client, collection: str, timeout: float = 600.0) -> None:
+    from qdrant_client import models
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(collection).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"{collection} not indexed after {timeout}s")
+
+
+def _load(client, collection: str, vectors: np.ndarray, prices: np.ndarray, cfg: EmbedConfig) -> None:
+    from qdrant_client import models
+
+    ensure_qdrant_collection(client, collection, vectors.shape[1], "Cosine", cfg=cfg)
+    for start in range(0, len(vectors), 1000):
+        end = min(start + 1000, len(vectors))
+        client.upsert(
+            collection,
+            points=models.Batch(
+                ids=list(range(start, end)),
+                vectors=vectors[start:end].tolist(),
+                payloads=[{"current_price": float(p), "is_active": True} for p in prices[start:end]],
+            ),
+            wait=True,
+        )
+    _wait_indexed(client, collection)
+
+
+def _exact(vectors: np.ndarray, prices: np.ndarray, queries: list[tuple]) -> list[set[int]]:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    truth = []
+    for vector, lo, hi in queries:
+        scores = normalized @ (vector / np.linalg.norm(vector))
+        if lo is not None:
+            scores = np.where((prices >= lo) & (prices <= hi), scores, -np.inf)
+        truth.append(set(np.argsort(-scores)[:LIMIT].tolist()))
+    return truth
+
+
+def _run(client, collection: str, queries: list[tuple], truth: list[set[int]], params) -> tuple[list[float], float]:
+    from qdrant_client import models
+
+    samples, recalls = [], []
+    for (vector, lo, hi), expected in zip(queries, truth):
+        query_filter = None
+        if lo is not None:
+            query_filter = models.Filter(must=[models.FieldCondition(key="current_price", range=models.Range(gte=lo, lte=hi))])
+        start = time.perf_counter()
+        points = client.query_points(
+            collection, query=vector.tolist(), limit=LIMIT, query_filter=query_filter, search_params=params
+        ).points
+        samples.append(time.perf_counter() - start)
+        recalls.append(len({p.id for p in points} & expected) / LIMIT)
+    return samples, statistics.mean(recalls)
+
+
+if __name__ == "__main__":
+    from qdrant_client import QdrantClient, models
+
+    url = os.getenv("QDRANT_URL")
+    if not url:
+        print("QDRANT_URL is not set: local mode ignores HNSW and quantization settings, nothing to measure")
+        sys.exit(1)
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    dim = int(sys.argv[3]) if len(sys.argv) > 3 else 768
+
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+    prices = rng.integers(5, 500, rows) * 1000.0
+    # Half unfiltered, half a ~20% price window
+    queries = [
+        (rng.standard_normal(dim, dtype=np.float32), *((None, None) if i % 2 == 0 else (50_000.0, 150_000.0)))
+        for i in range(query_count)
+    ]
+    truth = _exact(vectors, prices, queries)
+    client = QdrantClient(url=url, api_key=os.getenv("QDRANT_API_KEY") or None)
+
+    results = []
+    for m, ef_construct, quantization in BUILD_CONFIGS:
+        collection = f"bench_tuning_m{m}_ef{ef_construct}_{quantization}"
+        cfg = EmbedConfig(json_path="", collection_name=collection, hnsw_m=m, hnsw_ef_construct=ef_construct, quantization=quantization)
+        sys.stdout, real_stdout = open(os.devnull, "w"), sys.stdout
+        try:
+            start = time.perf_counter()
+            _load(client, collection, vectors, prices, cfg)
+            build_seconds = time.perf_counter() - start
+            rescore_options = [True, False] if quantization == "int8" else [False]
+            for ef in SEARCH_EFS:
+                for rescore in rescore_options:
+                    params = models.SearchParams(
+                        hnsw_ef=ef, quantization=models.QuantizationSearchParams(rescore=rescore, oversampling=2.0)
+                    )
+                    _run(client, collection, queries[:20], truth[:20], params)  # warm-up
+                    samples, recall = _run(client, collection, queries, truth, params)
+                    results.append((m, ef_construct, quantization, build_seconds, ef, rescore, samples, recall))
+            client.delete_collection(collection)
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+
+    print(f"Top-{LIMIT} over {rows} x {dim} vectors, {query_count} queries (half price-filtered), Qdrant {url}")
+    print(f"{'m':>3} {'ef_c':>5} {'quant':>5} {'build':>7} {'ef':>4} {'rescore':>7} {'p50':>9} {'p99':>9} {'recall':>7}")
+    for m, ef_construct, quantization, build_seconds, ef, rescore, samples, recall in results:
+        print(
+            f"{m:>3} {ef_construct:>5} {quantization:>5} {build_seconds:>6.1f}s {ef:>4} {str(rescore):>7} "
+            f"{_percentile(samples, 0.50) * 1000:>7.2f}ms {_percentile(samples, 0.99) * 1000:>7.2f}ms {recall:>7.3f}"
+        )
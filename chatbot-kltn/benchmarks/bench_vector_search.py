@@ -0,0 +1,145 @@
+"""
+Benchmark: p50/p99 search latency of the in-process LocalVectorIndex versus
+Qdrant, on the same synthetic catalog and query vectors (query embedding is
+excluded: both backends share the cached query-vector path).
+
+Uses QDRANT_URL (+ QDRANT_API_KEY) when set, otherwise qdrant-client's local
+in-memory mode, which is not representative of a networked server. The
+benchmark creates and drops a scratch collection named bench_local_index.
+
+Usage (from chatbot-kltn/):
+    python benchmarks/bench_vector_search.py [rows] [queries] [dim]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from chatbot.local_index import LocalVectorIndex
+from core.config import get_settings
+from embedded_data_to_vector import EmbedConfig, export_local_index
+
+COLLECTION = "bench_local_index"
+LIMIT = 5
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _points(rows: int, dim: int, rng: np.random.Generator) -> list[dict]:
+    vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+    return [
+        {
+            "id": i,
+            "vector": vectors[i].tolist(),
+            "payload": {"product_id": str(i), "product_name": f"product {i}", "current_price": float(rng.integers(5, 500) * 1000)},
+        }
+        for i in range(rows)
+    ]
+
+
+def _qdrant_client():
+    from qdrant_client import QdrantClient
+
+    url = os.getenv("QDRANT_URL")
+    if url:
+        return QdrantClient(url=url, api_key=os.getenv("QDRANT_API_KEY") or None), f"Qdrant {url}"
+    return QdrantClient(":memory:"), "Qdrant local mode (in-process)"
+
+
+def _load_qdrant(client, points: list[dict], dim: int) -> None:
+    from qdrant_client import models
+
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(COLLECTION, vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE))
+    for start in range(0, len(points), 1000):
+        batch = points[start : start + 1000]
+        client.upsert(
+            COLLECTION,
+            points=[models.PointStruct(id=p["id"], vector=p["vector"], payload=p["payload"]) for p in batch],
+            wait=True,
+        )
+
+
+def _price_filter(min_price: float | None, max_price: float | None):
+    from qdrant_client import models
+
+    if min_price is None and max_price is None:
+        return None
+    return models.Filter(must=[models.FieldCondition(key="current_price", range=models.Range(gte=min_price, lte=max_price))])
+
+
+def _time(search, queries: list[tuple]) -> tuple[list[float], list[list[str]]]:
+    samples, results = [], []
+    for vector, min_price, max_price in queries:
+        start = time.perf_counter()
+        products = search(vector, min_price, max_price)
+        samples.append(time.perf_counter() - start)
+        results.append([p["product_id"] for p in products])
+    return samples, results
+
+
+def _report(name: str, samples: list[float], recall: float | None = None) -> None:
+    line = (
+        f"{name:<40} p50={_percentile(samples, 0.50) * 1000:8.3f}ms "
+        f"p99={_percentile(samples, 0.99) * 1000:8.3f}ms mean={statistics.mean(samples) * 1000:8.3f}ms"
+    )
+    if recall is not None:
+        line += f" recall@{LIMIT} vs exact={recall:.3f}"
+    print(line)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    dim = int(sys.argv[3]) if len(sys.argv) > 3 else 768
+
+    rng = np.random.default_rng(7)
+    points = _points(rows, dim, rng)
+    prices = [None, (None, 100_000.0), (50_000.0, 150_000.0)]
+    queries = []
+    for _ in range(query_count):
+        price = random.choice(prices)
+        queries.append((rng.standard_normal(dim, dtype=np.float32), *(price or (None, None))))
+
+    settings = get_settings()
+    sys.stdout, real_stdout = open(os.devnull, "w"), sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index")
+            export_local_index(path, points, EmbedConfig(json_path="", collection_name=COLLECTION))
+            settings.local_index_path = path
+            index = LocalVectorIndex(settings)
+            local = lambda v, lo, hi: index.search_by_vector(v, limit=LIMIT, min_price=lo, max_price=hi)
+            _time(local, queries[:20])  # warm-up
+            local_samples, exact = _time(local, queries)
+
+            client, qdrant_name = _qdrant_client()
+            _load_qdrant(client, points, dim)
+            qdrant = lambda v, lo, hi: [
+                {"product_id": p.payload["product_id"]}
+                for p in client.query_points(
+                    COLLECTION, query=v.tolist(), limit=LIMIT, query_filter=_price_filter(lo, hi), with_payload=True
+                ).points
+            ]
+            _time(qdrant, queries[:20])
+            qdrant_samples, approx = _time(qdrant, queries)
+            client.delete_collection(COLLECTION)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    recall = statistics.mean(len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(approx, exact))
+    print(f"Top-{LIMIT} search over {rows} x {dim} vectors, {query_count} queries (1/3 unfiltered, 2/3 price-filtered)")
+    _report("LocalVectorIndex (exact, mmap)", local_samples)
+    _report(qdrant_name, qdrant_samples, recall)
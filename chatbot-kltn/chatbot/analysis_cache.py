@@ -0,0 +1,101 @@
+import hashlib
+import json
+import re
+from typing import Any
+
+import redis
+import redis.asyncio as aioredis
+
+from core.config import Settings
+
+
+class AnalysisCache:
+    """Cache for consolidated analysis results (intent, keywords, price, context)."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.ttl = settings.analysis_cache_ttl
+        self.redis_client: redis.Redis | None = None
+        self.async_client: aioredis.Redis | None = None
+        if settings.redis_url:
+            try:
+                self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self.async_client = aioredis.from_url(settings.redis_url, decode_responses=True)
+                print(f"[AnalysisCache] Connected to Redis at {settings.redis_url}")
+            except Exception as e:
+                print(f"[AnalysisCache] Failed to connect to Redis: {e}")
+                self.redis_client = None
+                self.async_client = None
+
+    @property
+    def available(self) -> bool:
+        return self.redis_client is not None
+
+    @staticmethod
+    def _normalize_message(message: str) -> str:
+        """Lowercase, drop punctuation and extra whitespace. Word order is kept: it matters for intent."""
+        normalized = re.sub(r"[^\w\s]", " ", (message or "").lower())
+        return re.sub(r"\s+", " ", normalized).strip()
+
+    @staticmethod
+    def _history_digest(recent_messages: list[dict], summary: str | None = None) -> str:
+        """Hash of the summary and history window sent to the LLM (roles and contents, no timestamps)."""
+        window = [[msg.get("role", "unknown"), msg.get("content", "")] for msg in recent_messages or []]
+        if summary:
+            window.append(["summary", summary])
+        return hashlib.md5(json.dumps(window, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+    def _make_cache_key(self, message: str, recent_messages: list[dict], summary: str | None = None) -> str:
+        message_hash = hashlib.md5(self._normalize_message(message).encode("utf-8")).hexdigest()[:16]
+        return f"chatbot:analysis:{message_hash}:{self._history_digest(recent_messages, summary)}"
+
+    def get(
+        self, message: str, recent_messages: list[dict], summary: str | None = None
+    ) -> dict[str, Any] | None:
+        if not self.available or not message:
+            return None
+
+        try:
+            cached = self.redis_client.get(self._make_cache_key(message, recent_messages, summary))
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            print(f"[AnalysisCache] Error retrieving cache: {e}")
+            return None
+
+    async def aget(
+        self, message: str, recent_messages: list[dict], summary: str | None = None
+    ) -> dict[str, Any] | None:
+        if self.async_client is None or not message:
+            return None
+
+        try:
+            cached = await self.async_client.get(self._make_cache_key(message, recent_messages, summary))
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            print(f"[AnalysisCache] Error retrieving cache: {e}")
+            return None
+
+    def set(
+        self, message: str, recent_messages: list[dict], analysis: dict[str, Any], summary: str | None = None
+    ) -> None:
+        if not self.available or not message or not analysis.get("intent"):
+            return
+
+        try:
+            cache_key = self._make_cache_key(message, recent_messages, summary)
+            self.redis_client.setex(cache_key, self.ttl, json.dumps(analysis, ensure_ascii=False))
+            print(f"[AnalysisCache] Cached analysis for {cache_key} (TTL: {self.ttl}s)")
+        except Exception as e:
+            print(f"[AnalysisCache] Error caching analysis: {e}")
+
+    async def aset(
+        self, message: str, recent_messages: list[dict], analysis: dict[str, Any], summary: str | None = None
+    ) -> None:
+        if self.async_client is None or not message or not analysis.get("intent"):
+            return
+
+        try:
+            cache_key = self._make_cache_key(message, recent_messages, summary)
+            await self.async_client.setex(cache_key, self.ttl, json.dumps(analysis, ensure_ascii=False))
+            print(f"[AnalysisCache] Cached analysis for {cache_key} (TTL: {self.ttl}s)")
+        except Exception as e:
+            print(f"[AnalysisCache] Error caching analysis: {e}")
@@ -14,6 +14,20 @@ class APIMetrics:
         self.cache_hits = 0
         self.cache_misses = 0
         self.tokens_estimated = 0
+        self.semantic_cache_hits = 0
+        self.semantic_cache_misses = 0
+        self.analysis_cache_hits = 0
+        self.analysis_cache_misses = 0
+        self.fast_path_hits = 0
+        self.fast_path_misses = 0
+        self.summarized_turns = 0
+        self.embedding_cache_l1_hits = 0
+        self.embedding_cache_redis_hits = 0
+        self.embedding_cache_misses = 0
+        self.query_embeddings = 0
+        self.query_embedding_seconds = 0.0
+        self.history_chars_window = 0
+        self.history_chars_sent = 0
         self.start_time = datetime.utcnow()
     
     def log_llm_call(self, input_chars: int = 0, output_chars: int = 0) -> None:
@@ -34,18 +48,108 @@ class APIMetrics:
         self.cache_misses += 1
         print(f"[Metrics] Cache MISS | Total misses: {self.cache_misses}")
     
+    def log_semantic_cache_hit(self) -> None:
+        """Log a semantic (embedding-similarity) cache hit."""
+        self.semantic_cache_hits += 1
+        print(f"[Metrics] Semantic cache HIT | Total hits: {self.semantic_cache_hits}")
+    
+    def log_semantic_cache_miss(self) -> None:
+        """Log a semantic cache miss."""
+        self.semantic_cache_misses += 1
+        print(f"[Metrics] Semantic cache MISS | Total misses: {self.semantic_cache_misses}")
+    
+    def log_analysis_cache_hit(self) -> None:
+        """Log an analysis cache hit (one consolidated LLM call avoided)."""
+        self.analysis_cache_hits += 1
+        print(f"[Metrics] Analysis cache HIT | Total hits: {self.analysis_cache_hits}")
+    
+    def log_analysis_cache_miss(self) -> None:
+        """Log an analysis cache miss."""
+        self.analysis_cache_misses += 1
+        print(f"[Metrics] Analysis cache MISS | Total misses: {self.analysis_cache_misses}")
+    
+    def log_fast_path(self, bypassed: bool) -> None:
+        """Log whether the rule-based router skipped the analysis LLM call."""
+        if bypassed:
+            self.fast_path_hits += 1
+        else:
+            self.fast_path_misses += 1
+        total = self.fast_path_hits + self.fast_path_misses
+        print(f"[Metrics] Fast path {'BYPASS' if bypassed else 'MISS'} | Bypass rate: {self.fast_path_hits / total * 100:.1f}%")
+    
+    def log_history_compaction(self, window_chars: int, sent_chars: int) -> None:
+        """
+        Log history sent as stored summary + newest messages instead of the fetched
+        window. Savings are relative to that capped window, not the full stored history.
+        """
+        self.summarized_turns += 1
+        self.history_chars_window += window_chars
+        self.history_chars_sent += sent_chars
+        saved = (self.history_chars_window - self.history_chars_sent) // 4
+        print(f"[Metrics] History window compacted {window_chars} -> {sent_chars} chars | Est. tokens saved: {saved}")
+    
+    def log_embedding_cache(self, tier: str | None) -> None:
+        """Log a query embedding cache lookup: hit tier ("l1" / "redis") or None for a miss."""
+        if tier == "l1":
+            self.embedding_cache_l1_hits += 1
+        elif tier == "redis":
+            self.embedding_cache_redis_hits += 1
+        else:
+            self.embedding_cache_misses += 1
+        print(f"[Metrics] Embedding cache {tier.upper() + ' HIT' if tier else 'MISS'}")
+    
+    def log_query_embedding(self, seconds: float) -> None:
+        """Log the latency of computing one query embedding."""
+        self.query_embeddings += 1
+        self.query_embedding_seconds += seconds
+        print(f"[Metrics] Query embedded in {seconds * 1000:.1f}ms | Total: {self.query_embeddings}")
+    
     def get_stats(self) -> dict[str, Any]:
         """Get current metrics stats."""
         uptime = (datetime.utcnow() - self.start_time).total_seconds()
         total_cache_requests = self.cache_hits + self.cache_misses
         hit_rate = (self.cache_hits / total_cache_requests * 100) if total_cache_requests > 0 else 0
+        total_semantic_requests = self.semantic_cache_hits + self.semantic_cache_misses
+        semantic_hit_rate = (
+            self.semantic_cache_hits / total_semantic_requests * 100 if total_semantic_requests > 0 else 0
+        )
+        total_analysis_requests = self.analysis_cache_hits + self.analysis_cache_misses
+        analysis_hit_rate = (
+            self.analysis_cache_hits / total_analysis_requests * 100 if total_analysis_requests > 0 else 0
+        )
+        embedding_hits = self.embedding_cache_l1_hits + self.embedding_cache_redis_hits
+        total_embedding_lookups = embedding_hits + self.embedding_cache_misses
+        embedding_hit_rate = (
+            embedding_hits / total_embedding_lookups * 100 if total_embedding_lookups > 0 else 0
+        )
+        avg_embedding_ms = (
+            self.query_embedding_seconds / self.query_embeddings * 1000 if self.query_embeddings > 0 else 0
+        )
+        total_routed = self.fast_path_hits + self.fast_path_misses
+        bypass_rate = (self.fast_path_hits / total_routed * 100) if total_routed > 0 else 0
         
         return {
             "llm_calls": self.llm_calls,
             "cache_hits": self.cache_hits,
             "cache_misses": self.cache_misses,
             "cache_hit_rate": f"{hit_rate:.1f}%",
+            "semantic_cache_hits": self.semantic_cache_hits,
+            "semantic_cache_misses": self.semantic_cache_misses,
+            "semantic_cache_hit_rate": f"{semantic_hit_rate:.1f}%",
+            "analysis_cache_hits": self.analysis_cache_hits,
+            "analysis_cache_misses": self.analysis_cache_misses,
+            "analysis_cache_hit_rate": f"{analysis_hit_rate:.1f}%",
             "tokens_estimated": self.tokens_estimated,
+            "fast_path_bypasses": self.fast_path_hits,
+            "fast_path_bypass_rate": f"{bypass_rate:.1f}%",
+            "embedding_cache_l1_hits": self.embedding_cache_l1_hits,
+            "embedding_cache_redis_hits": self.embedding_cache_redis_hits,
+            "embedding_cache_misses": self.embedding_cache_misses,
+            "embedding_cache_hit_rate": f"{embedding_hit_rate:.1f}%",
+            "query_embeddings": self.query_embeddings,
+            "avg_query_embedding_ms": round(avg_embedding_ms, 1),
+            "summarized_turns": self.summarized_turns,
+            "history_window_tokens_saved": (self.history_chars_window - self.history_chars_sent) // 4,
             "uptime_seconds": int(uptime),
         }
     
@@ -56,7 +160,13 @@ class APIMetrics:
         print("[Metrics Summary]")
         print(f"  LLM Calls: {stats['llm_calls']}")
         print(f"  Cache Hit Rate: {stats['cache_hit_rate']}")
+        print(f"  Semantic Cache Hit Rate: {stats['semantic_cache_hit_rate']}")
+        print(f"  Analysis Cache Hit Rate: {stats['analysis_cache_hit_rate']}")
+        print(f"  Embedding Cache Hit Rate: {stats['embedding_cache_hit_rate']}")
+        print(f"  Avg Query Embedding: {stats['avg_query_embedding_ms']}ms")
         print(f"  Est. Tokens Used: {stats['tokens_estimated']}")
+        print(f"  Fast Path Bypass Rate: {stats['fast_path_bypass_rate']}")
+        print(f"  History Window Tokens Saved: {stats['history_window_tokens_saved']} ({stats['summarized_turns']} turns)")
         print(f"  Uptime: {stats['uptime_seconds']}s")
         print("=" * 50 + "\n")
 
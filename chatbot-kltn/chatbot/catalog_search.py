@@ -0,0 +1,444 @@
+"""
+In-process keyword search over the active catalog, replacing the SQL LIKE
+query on the chatbot's keyword path.
+
+Product names are folded ("Bắp Mỹ" -> "bap my") and indexed as word postings
+scored with BM25. Query words that are not in the vocabulary (typos, missing
+letters) are expanded through character-trigram postings over the vocabulary.
+Products matching every word of a keyword come first, like the old phrase
+LIKE; any-word matches are only a fallback. Price ranges are cut from a
+price-sorted array with binary search. The index follows the products table
+incrementally through ``updated_at``, and hard deletes are detected by
+comparing the active row count (then the id set) with the index.
+"""
+import asyncio
+import math
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable
+
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from chatbot.fast_router import fold_diacritics
+from models.models import Product
+
+# Rows per partition when the async path loads the whole catalog
+FULL_LOAD_BATCH = 1000
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", fold_diacritics(text or ""))
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f"^{term}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True if b is a insert, delete, substitution or adjacent swap away from a."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    i = 0
+    while i < len(shorter) and shorter[i] == longer[i]:
+        i += 1
+    return shorter[i:] == longer[i + 1 :]
+
+
+class CatalogSearchIndex:
+    """BM25 + trigram-expanded keyword search over product names, kept in sync with the DB."""
+
+    def __init__(
+        self,
+        to_result: Callable[[Product], dict[str, Any]],
+        *,
+        refresh_seconds: float = 30.0,
+        rebuild_seconds: float = 3600.0,
+        k1: float = 1.2,
+        b: float = 0.75,
+        fuzzy_min_similarity: float = 0.5,
+        fuzzy_max_expansions: int = 3,
+    ) -> None:
+        self.to_result = to_result
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.k1 = k1
+        self.b = b
+        self.fuzzy_min_similarity = fuzzy_min_similarity
+        self.fuzzy_max_expansions = fuzzy_max_expansions
+
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        # Documents live in dense slots so prices can sit in a flat array
+        self._slots: dict[int, int] = {}  # product id -> slot
+        self._free: list[int] = []
+        self._results: list[dict[str, Any] | None] = []
+        self._terms: list[Counter | None] = []
+        self._lengths: list[int] = []
+        self._created: list[float] = []
+        self._prices: list[float] = []
+        self._postings: dict[str, dict[int, int]] = {}  # term -> {slot: tf}
+        self._trigrams: dict[str, set[str]] = {}  # trigram -> vocabulary terms
+        self._gram_counts: dict[str, int] = {}
+        self._total_length = 0
+        # Derived on demand after changes
+        self._dirty = True
+        self._price_array = np.zeros(0, dtype=np.float64)
+        self._price_order = np.zeros(0, dtype=np.int64)
+        self._sorted_prices = np.zeros(0, dtype=np.float64)
+        self._recent: list[int] = []
+        self._length_array = np.zeros(0, dtype=np.float64)
+        self._recency = np.zeros(0, dtype=np.float64)  # 0..1, newest highest; breaks score ties
+        self._posting_arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+        self._loaded = False
+        self._checked_at = 0.0
+        self._rebuilt_at = 0.0
+        self._max_updated: datetime | None = None
+        self._row_count = 0
+
+    @property
+    def available(self) -> bool:
+        return self._loaded
+
+    @property
+    def size(self) -> int:
+        return len(self._slots)
+
+    # ---- maintenance -------------------------------------------------------
+
+    def _add(self, product: Product) -> None:
+        slot = self._free.pop() if self._free else len(self._results)
+        if slot == len(self._results):
+            self._results.append(None)
+            self._terms.append(None)
+            self._lengths.append(0)
+            self._created.append(0.0)
+            self._prices.append(math.nan)
+        terms = Counter(tokenize(product.product_name or ""))
+        self._slots[product.id] = slot
+        self._results[slot] = self.to_result(product)
+        self._terms[slot] = terms
+        self._lengths[slot] = sum(terms.values())
+        self._created[slot] = product.created_at.timestamp() if product.created_at else 0.0
+        # NULL prices never satisfy a price filter, as in SQL
+        self._prices[slot] = float(product.current_price) if product.current_price is not None else math.nan
+        self._total_length += self._lengths[slot]
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                grams = trigrams(term)
+                self._gram_counts[term] = len(grams)
+                for gram in grams:
+                    self._trigrams.setdefault(gram, set()).add(term)
+            postings[slot] = tf
+            self._posting_arrays.pop(term, None)
+
+    def _remove(self, product_id: int) -> None:
+        slot = self._slots.pop(product_id, None)
+        if slot is None:
+            return
+        for term in self._terms[slot]:
+            postings = self._postings[term]
+            postings.pop(slot, None)
+            self._posting_arrays.pop(term, None)
+            if not postings:
+                del self._postings[term]
+                del self._gram_counts[term]
+                for gram in trigrams(term):
+                    self._trigrams[gram].discard(term)
+                    if not self._trigrams[gram]:
+                        del self._trigrams[gram]
+        self._total_length -= self._lengths[slot]
+        self._results[slot] = None
+        self._terms[slot] = None
+        self._lengths[slot] = 0
+        self._prices[slot] = math.nan
+        self._free.append(slot)
+
+    # Everything rebuild() replaces
+    _INDEX_STATE = (
+        "_slots", "_free", "_results", "_terms", "_lengths", "_created", "_prices",
+        "_postings", "_trigrams", "_gram_counts", "_posting_arrays", "_total_length",
+    )
+
+    def rebuild(self, products: list[Product]) -> None:
+        # Built on the side and swapped in, so searches keep using the old index meanwhile
+        staged = CatalogSearchIndex(self.to_result)
+        for product in products:
+            if product.is_active:
+                staged._add(product)
+        with self._lock:
+            for name in self._INDEX_STATE:
+                setattr(self, name, getattr(staged, name))
+            self._dirty = True
+            self._loaded = True
+        self._rebuilt_at = time.monotonic()
+        print(f"[CatalogSearch] Indexed {len(self._slots)} products ({len(self._postings)} terms)")
+
+    def apply(self, products: list[Product]) -> None:
+        """Re-index changed rows; rows that are no longer active are dropped."""
+        with self._lock:
+            for product in products:
+                self._remove(product.id)
+                if product.is_active:
+                    self._add(product)
+            self._dirty = True
+        if products:
+            print(f"[CatalogSearch] Re-indexed {len(products)} changed products")
+
+    def _refresh_derived(self) -> None:
+        # Stable sort keeps equal prices in slot order; NaN (free or unpriced) sorts last
+        self._price_array = np.asarray(self._prices, dtype=np.float64)
+        self._price_order = np.argsort(self._price_array, kind="stable")
+        self._sorted_prices = self._price_array[self._price_order]
+        self._recent = sorted(self._slots.values(), key=lambda slot: self._created[slot], reverse=True)
+        self._length_array = np.asarray(self._lengths, dtype=np.float64)
+        self._recency = np.zeros(len(self._prices), dtype=np.float64)
+        if self._recent:
+            self._recency[self._recent] = np.linspace(1.0, 0.0, len(self._recent), endpoint=False)
+        self._dirty = False
+
+    def _posting_array(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        # Built on first use after a change to the term's postings
+        arrays = self._posting_arrays.get(term)
+        if arrays is None:
+            postings = self._postings[term]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+            self._posting_arrays[term] = arrays
+        return arrays
+
+    def reconcile(self, active_ids: set[int]) -> list[int]:
+        """Drop indexed products whose rows are gone; returns active ids missing from the index."""
+        with self._lock:
+            deleted = [product_id for product_id in self._slots if product_id not in active_ids]
+            for product_id in deleted:
+                self._remove(product_id)
+            if deleted:
+                self._dirty = True
+            missing = [product_id for product_id in active_ids if product_id not in self._slots]
+        if deleted:
+            print(f"[CatalogSearch] Dropped {len(deleted)} deleted products")
+        return missing
+
+    # ---- sync with the products table --------------------------------------
+
+    @staticmethod
+    def _state_stmt():
+        # COUNT skips the NULLs of inactive rows (portable, unlike FILTER)
+        return select(
+            func.max(Product.updated_at),
+            func.count(Product.id),
+            func.count(case((Product.is_active.is_(True), Product.id))),
+        )
+
+    @staticmethod
+    def _active_ids_stmt():
+        return select(Product.id).where(Product.is_active.is_(True))
+
+    @staticmethod
+    def _rows_stmt(product_ids: list[int]):
+        return select(Product).where(Product.id.in_(product_ids))
+
+    @staticmethod
+    def _full_stmt():
+        return select(Product).where(Product.is_active.is_(True))
+
+    @staticmethod
+    def _changed_stmt(since: datetime):
+        # >= so rows written within the same timestamp as the last sync are not missed
+        return select(Product).where(Product.updated_at >= since)
+
+    def _plan(self, max_updated: datetime | None, row_count: int, active_count: int) -> str:
+        if not self._loaded or self._max_updated is None:
+            return "full"
+        # Safety net for changes that bypass updated_at
+        if time.monotonic() - self._rebuilt_at > self.rebuild_seconds:
+            return "full"
+        if (max_updated, row_count, active_count) == (self._max_updated, self._row_count, self.size):
+            return "none"
+        return "delta"
+
+    def _mark_synced(self, max_updated: datetime | None, row_count: int) -> None:
+        self._max_updated, self._row_count = max_updated, row_count
+
+    def _due(self) -> bool:
+        return time.monotonic() - self._checked_at > self.refresh_seconds
+
+    def ensure_fresh(self, db: Session) -> None:
+        """Sync with the DB at most every refresh_seconds; concurrent callers keep using the current index."""
+        if not self._due() or not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            max_updated, row_count, active_count = db.execute(self._state_stmt()).one()
+            plan = self._plan(max_updated, row_count, active_count)
+            if plan == "full":
+                self.rebuild(list(db.scalars(self._full_stmt()).all()))
+            elif plan == "delta":
+                self.apply(list(db.scalars(self._changed_stmt(self._max_updated)).all()))
+                # Changed rows are applied; a size mismatch left means rows were deleted
+                if self.size != active_count:
+                    missing = self.reconcile(set(db.scalars(self._active_ids_stmt()).all()))
+                    if missing:
+                        self.apply(list(db.scalars(self._rows_stmt(missing)).all()))
+            self._mark_synced(max_updated, row_count)
+        except Exception as e:
+            print(f"[CatalogSearch] Error refreshing index: {e}")
+        finally:
+            self._checked_at = time.monotonic()
+            self._refresh_lock.release()
+
+    def _finish_rebuild(self, products: list[Product], max_updated: datetime | None, row_count: int) -> None:
+        """Worker-thread tail of aensure_fresh: full rebuild, then release the refresh lock."""
+        try:
+            self.rebuild(products)
+            self._mark_synced(max_updated, row_count)
+        except Exception as e:
+            print(f"[CatalogSearch] Error refreshing index: {e}")
+        finally:
+            self._checked_at = time.monotonic()
+            self._refresh_lock.release()
+
+    async def aensure_fresh(self, db: AsyncSession) -> None:
+        if not self._due() or not self._refresh_lock.acquire(blocking=False):
+            return
+        handed_off = False
+        try:
+            max_updated, row_count, active_count = (await db.execute(self._state_stmt())).one()
+            plan = self._plan(max_updated, row_count, active_count)
+            if plan == "full":
+                # Streamed in partitions so row loading yields to other requests too
+                products = []
+                result = await db.stream_scalars(self._full_stmt().execution_options(yield_per=FULL_LOAD_BATCH))
+                async for partition in result.partitions():
+                    products.extend(partition)
+                # Tokenizing the whole catalog is CPU-bound: run it off the event loop, shielded
+                # so a cancelled request cannot leave it half done with the lock released
+                handed_off = True
+                await asyncio.shield(asyncio.to_thread(self._finish_rebuild, products, max_updated, row_count))
+                return
+            if plan == "delta":
+                self.apply(list((await db.scalars(self._changed_stmt(self._max_updated))).all()))
+                if self.size != active_count:
+                    missing = self.reconcile(set((await db.scalars(self._active_ids_stmt())).all()))
+                    if missing:
+                        self.apply(list((await db.scalars(self._rows_stmt(missing))).all()))
+            self._mark_synced(max_updated, row_count)
+        except Exception as e:
+            print(f"[CatalogSearch] Error refreshing index: {e}")
+        finally:
+            if not handed_off:
+                self._checked_at = time.monotonic()
+                self._refresh_lock.release()
+
+    # ---- search ------------------------------------------------------------
+
+    def _expand(self, token: str) -> list[tuple[str, float]]:
+        """The token itself if indexed, else close vocabulary terms by trigram Dice similarity."""
+        if token in self._postings:
+            return [(token, 1.0)]
+        grams = trigrams(token)
+        shared: Counter = Counter()
+        for gram in grams:
+            for term in self._trigrams.get(gram, ()):
+                shared[term] += 1
+        scored = []
+        for term, count in shared.items():
+            similarity = 2.0 * count / (len(grams) + self._gram_counts[term])
+            # Short words share few trigrams, so one typo ("chau" for "chua") is accepted on edit distance
+            if len(token) >= 4 and within_one_edit(token, term):
+                similarity = max(similarity, 1.0 - 1.0 / len(token))
+            if similarity >= self.fuzzy_min_similarity:
+                scored.append((term, similarity))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[: self.fuzzy_max_expansions]
+
+    def _price_mask(self, min_price: float | None, max_price: float | None) -> np.ndarray | None:
+        if min_price is None and max_price is None:
+            return None
+        low = 0 if min_price is None else int(np.searchsorted(self._sorted_prices, min_price, side="left"))
+        if max_price is None:
+            high = int(np.count_nonzero(~np.isnan(self._sorted_prices)))
+        else:
+            high = int(np.searchsorted(self._sorted_prices, max_price, side="right"))
+        mask = np.zeros(len(self._price_array), dtype=bool)
+        mask[self._price_order[low:high]] = True
+        return mask
+
+    def search(
+        self,
+        keywords: list[str] | None,
+        *,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        limit: int = 5,
+    ) -> list[dict[str, Any]]:
+        phrases = [tokens for tokens in (tokenize(keyword) for keyword in keywords or []) if tokens]
+        tokens = list(dict.fromkeys(token for phrase in phrases for token in phrase))
+        with self._lock:
+            if self._dirty:
+                self._refresh_derived()
+            mask = self._price_mask(min_price, max_price)
+
+            if not tokens:
+                # Same as the SQL path: latest active products in the price range
+                slots = [slot for slot in self._recent if mask is None or mask[slot]][:limit]
+                return [dict(self._results[slot]) for slot in slots]
+
+            doc_count = len(self._slots)
+            avg_length = self._total_length / doc_count if doc_count else 1.0
+            norms = self.k1 * (1.0 - self.b + self.b * self._length_array / max(avg_length, 1e-9))
+            token_scores: dict[str, np.ndarray] = {}
+            for token in tokens:
+                # A token counts once per document, through its best expansion
+                best = np.zeros(len(self._price_array), dtype=np.float64)
+                for term, weight in self._expand(token):
+                    slots, tfs = self._posting_array(term)
+                    idf = math.log(1.0 + (doc_count - len(slots) + 0.5) / (len(slots) + 0.5))
+                    term_scores = weight * idf * tfs * (self.k1 + 1.0) / (tfs + norms[slots])
+                    best[slots] = np.maximum(best[slots], term_scores)
+                token_scores[token] = best
+            scores = np.sum(list(token_scores.values()), axis=0)
+            if mask is not None:
+                scores[~mask] = 0.0
+
+            # Like the phrase LIKE: only products containing every word of some keyword...
+            phrase_match = np.zeros(len(scores), dtype=bool)
+            for phrase in phrases:
+                phrase_match |= np.logical_and.reduce([token_scores[token] > 0 for token in phrase])
+            if (phrase_match & (scores > 0)).any():
+                scores[~phrase_match] = 0.0
+            else:
+                # ...else any-word matches, those matching more query words first
+                coverage = np.sum([token_score > 0 for token_score in token_scores.values()], axis=0)
+                scores = np.where(scores > 0, coverage * (scores.max(initial=0.0) + 1.0) + scores, 0.0)
+
+            matched = np.flatnonzero(scores)
+            if len(matched) == 0:
+                return []
+            # Recency only orders equal scores (newest first, like the SQL ORDER BY created_at DESC)
+            keys = scores[matched] + self._recency[matched] * 1e-9
+            if len(matched) > limit:
+                top = np.argpartition(-keys, limit - 1)[:limit]
+                matched, keys = matched[top], keys[top]
+            ranked = matched[np.argsort(-keys, kind="stable")]
+            # score stays None like the SQL path: the keyword list is fused by rank, not by score
+            return [dict(self._results[int(slot)]) for slot in ranked]
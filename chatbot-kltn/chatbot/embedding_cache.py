@@ -0,0 +1,191 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+
+from chatbot.api_metrics import get_metrics
+from core.config import Settings
+
+
+class QueryEmbeddingCache:
+    """
+    Query vectors keyed by model name + normalized query text.
+    In-process LRU of float32 vectors, backed by an optional Redis tier of float16 bytes.
+    """
+
+    def __init__(self, settings: Settings, model_name: str) -> None:
+        self.model_name = model_name
+        self.max_entries = settings.embedding_cache_max_entries
+        self.ttl = settings.embedding_cache_ttl
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_hash = hashlib.md5(model_name.encode("utf-8")).hexdigest()[:8]
+        self.redis_client: redis.Redis | None = None
+        self.async_client: aioredis.Redis | None = None
+        if settings.redis_url:
+            try:
+                # Raw bytes: vectors are stored as float16 buffers
+                self.redis_client = redis.from_url(settings.redis_url)
+                self.async_client = aioredis.from_url(settings.redis_url)
+                print(f"[EmbeddingCache] Connected to Redis at {settings.redis_url}")
+            except Exception as e:
+                print(f"[EmbeddingCache] Failed to connect to Redis: {e}")
+                self.redis_client = None
+                self.async_client = None
+
+    @staticmethod
+    def _normalize_query(text: str) -> str:
+        return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+    def _make_key(self, text: str) -> str:
+        text_hash = hashlib.md5(self._normalize_query(text).encode("utf-8")).hexdigest()[:16]
+        return f"chatbot:qemb:{self._model_hash}:{text_hash}"
+
+    def _local_get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def _local_set(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _from_redis(raw: bytes) -> np.ndarray:
+        return np.frombuffer(raw, dtype=np.float16).astype(np.float32)
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = self._make_key(text)
+        vector = self._local_get(key)
+        if vector is not None:
+            get_metrics().log_embedding_cache("l1")
+            return vector
+
+        if self.redis_client is not None:
+            try:
+                raw = self.redis_client.get(key)
+                if raw:
+                    vector = self._from_redis(raw)
+                    self._local_set(key, vector)
+                    get_metrics().log_embedding_cache("redis")
+                    return vector
+            except Exception as e:
+                print(f"[EmbeddingCache] Error retrieving vector: {e}")
+        get_metrics().log_embedding_cache(None)
+        return None
+
+    async def aget(self, text: str) -> np.ndarray | None:
+        key = self._make_key(text)
+        vector = self._local_get(key)
+        if vector is not None:
+            get_metrics().log_embedding_cache("l1")
+            return vector
+
+        if self.async_client is not None:
+            try:
+                raw = await self.async_client.get(key)
+                if raw:
+                    vector = self._from_redis(raw)
+                    self._local_set(key, vector)
+                    get_metrics().log_embedding_cache("redis")
+                    return vector
+            except Exception as e:
+                print(f"[EmbeddingCache] Error retrieving vector: {e}")
+        get_metrics().log_embedding_cache(None)
+        return None
+
+    def set(self, text: str, vector: np.ndarray) -> None:
+        key = self._make_key(text)
+        self._local_set(key, vector)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.setex(key, self.ttl, vector.astype(np.float16).tobytes())
+            except Exception as e:
+                print(f"[EmbeddingCache] Error caching vector: {e}")
+
+    async def aset(self, text: str, vector: np.ndarray) -> None:
+        key = self._make_key(text)
+        self._local_set(key, vector)
+        if self.async_client is not None:
+            try:
+                await self.async_client.setex(key, self.ttl, vector.astype(np.float16).tobytes())
+            except Exception as e:
+                print(f"[EmbeddingCache] Error caching vector: {e}")
+
+    def _log_many(self, tiers: list[str | None]) -> None:
+        for tier in tiers:
+            get_metrics().log_embedding_cache(tier)
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        """Batch lookup: in-process first, then one MGET for the rest."""
+        keys = [self._make_key(text) for text in texts]
+        vectors = [self._local_get(key) for key in keys]
+        tiers: list[str | None] = ["l1" if vector is not None else None for vector in vectors]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.redis_client is not None:
+            try:
+                for i, raw in zip(missing, self.redis_client.mget([keys[i] for i in missing])):
+                    if raw:
+                        vectors[i] = self._from_redis(raw)
+                        self._local_set(keys[i], vectors[i])
+                        tiers[i] = "redis"
+            except Exception as e:
+                print(f"[EmbeddingCache] Error retrieving vectors: {e}")
+        self._log_many(tiers)
+        return vectors
+
+    async def aget_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        keys = [self._make_key(text) for text in texts]
+        vectors = [self._local_get(key) for key in keys]
+        tiers: list[str | None] = ["l1" if vector is not None else None for vector in vectors]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.async_client is not None:
+            try:
+                for i, raw in zip(missing, await self.async_client.mget([keys[i] for i in missing])):
+                    if raw:
+                        vectors[i] = self._from_redis(raw)
+                        self._local_set(keys[i], vectors[i])
+                        tiers[i] = "redis"
+            except Exception as e:
+                print(f"[EmbeddingCache] Error retrieving vectors: {e}")
+        self._log_many(tiers)
+        return vectors
+
+    def set_many(self, texts: list[str], vectors: list[np.ndarray]) -> None:
+        keys = [self._make_key(text) for text in texts]
+        for key, vector in zip(keys, vectors):
+            self._local_set(key, vector)
+        if self.redis_client is not None:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, vector in zip(keys, vectors):
+                    pipe.setex(key, self.ttl, vector.astype(np.float16).tobytes())
+                pipe.execute()
+            except Exception as e:
+                print(f"[EmbeddingCache] Error caching vectors: {e}")
+
+    async def aset_many(self, texts: list[str], vectors: list[np.ndarray]) -> None:
+        keys = [self._make_key(text) for text in texts]
+        for key, vector in zip(keys, vectors):
+            self._local_set(key, vector)
+        if self.async_client is not None:
+            try:
+                pipe = self.async_client.pipeline(transaction=False)
+                for key, vector in zip(keys, vectors):
+                    pipe.setex(key, self.ttl, vector.astype(np.float16).tobytes())
+                await pipe.execute()
+            except Exception as e:
+                print(f"[EmbeddingCache] Error caching vectors: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"model": self.model_name, "entries": len(self._entries), "max_entries": self.max_entries}
@@ -0,0 +1,81 @@
+import numpy as np
+
+from core.config import Settings
+
+
+class QueryEmbedder:
+    """Local (fastembed / ONNX) text embedder for short user queries."""
+
+    def __init__(self, settings: Settings, model_name: str | None = None) -> None:
+        self.model_name = model_name or settings.query_embedding_model
+        self.model = None
+        try:
+            from fastembed import TextEmbedding
+
+            self.model = TextEmbedding(model_name=self.model_name)
+            print(f"[Embedder] Loaded {self.model_name}")
+        except Exception as e:
+            print(f"[Embedder] Failed to load {self.model_name}: {e}")
+            self.model = None
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed texts into an L2-normalized float32 matrix (one row per text)."""
+        vectors = np.asarray(list(self.model.embed(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class GeminiQueryEmbedder:
+    """Gemini embedding API for search queries (matches collections built with GeminiEmbedder)."""
+
+    def __init__(self, settings: Settings, model_name: str | None = None) -> None:
+        self.model_name = model_name or settings.rag_query_embedding_model
+        self.model = None
+        if settings.google_api_key:
+            try:
+                from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+                self.model = GoogleGenerativeAIEmbeddings(
+                    model=self.model_name,
+                    google_api_key=settings.google_api_key,
+                    task_type="retrieval_query",
+                )
+                print(f"[Embedder] Using Gemini {self.model_name}")
+            except Exception as e:
+                print(f"[Embedder] Failed to init Gemini {self.model_name}: {e}")
+                self.model = None
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return np.asarray(self.model.embed_query(text), dtype=np.float32)
+
+    async def aembed_one(self, text: str) -> np.ndarray:
+        return np.asarray(await self.model.aembed_query(text), dtype=np.float32)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed several queries in one batched API request."""
+        return np.asarray(self.model.embed_documents(texts, task_type="retrieval_query"), dtype=np.float32)
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        return np.asarray(
+            await self.model.aembed_documents(texts, task_type="retrieval_query"), dtype=np.float32
+        )
+
+
+def build_rag_embedder(settings: Settings) -> QueryEmbedder | GeminiQueryEmbedder | None:
+    """Client-side query embedder for Qdrant; None keeps the text query path."""
+    if settings.rag_query_embedder == "gemini":
+        return GeminiQueryEmbedder(settings)
+    if settings.rag_query_embedder == "fastembed":
+        return QueryEmbedder(settings, settings.rag_query_embedding_model)
+    return None
@@ -0,0 +1,255 @@
+"""
+Rule-based fast path for the analysis step.
+
+Handles messages whose intent, price range and product can be read locally
+("đơn hàng của tôi", "thông tin tài khoản", "bắp mỹ dưới 50k") so the graph can
+skip the consolidated Gemini call. Matching is diacritic-insensitive; product
+phrases are looked up against the active catalog.
+"""
+import re
+import time
+import unicodedata
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.models import Product
+
+
+def fold_diacritics(text: str) -> str:
+    """Lowercase and strip Vietnamese diacritics ("Bắp Mỹ" -> "bap my")."""
+    decomposed = unicodedata.normalize("NFD", text.lower().replace("đ", "d").replace("Đ", "d"))
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+
+def _tokenize(folded: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", folded)
+
+
+# Patterns are written without diacritics and matched on folded text
+INTENT_PATTERNS = {
+    "orders": [
+        r"\bdon hang\b",
+        r"\bdon cua (?:toi|minh|em)\b",
+        r"\blich su (?:mua|dat)",
+        r"\btrang thai don\b",
+        r"\b(?:theo doi|tra cuu) don\b",
+        r"\borders?\b",
+    ],
+    "profile": [
+        r"\btai khoan\b",
+        r"\bho so\b",
+        r"\bthong tin (?:ca nhan|cua (?:toi|minh|em))\b",
+        r"\bprofile\b",
+        r"\baccount\b",
+    ],
+}
+
+# Filler words that carry no product or intent meaning (folded)
+STOP_WORDS = {
+    "toi", "minh", "em", "anh", "chi", "ban", "shop", "muon", "mua", "can", "tim", "kiem", "cho", "xem",
+    "co", "gi", "nao", "voi", "la", "a", "nhe", "oi", "giup", "hay", "goi", "y", "san",
+    "pham", "loai", "nua", "duoc", "di", "ve", "nhung", "cac", "mot", "vai", "cua", "o", "day", "dang",
+    "xin", "vui", "long", "thong", "tin", "ho", "so", "tai", "khoan", "don", "hang", "lich", "su", "dat",
+    "trang", "thai", "theo", "doi", "tra", "cuu", "the", "nay", "kia", "gium", "dum", "with", "please",
+}
+
+# Negations flip the meaning of whatever follows ("không đường"); never routed locally.
+# Checked after the price phrase is removed, so "không quá 50k" still parses.
+NEGATION_WORDS = {"khong", "ko", "khg", "hok", "chang", "dung", "tru"}
+
+# Order/account actions the listing intents must not swallow ("hủy đơn hàng")
+ACTION_PATTERNS = [
+    r"\bhuy\b",
+    r"(?<!theo )\bdoi\b",
+    r"\btra (?:lai|hang|ve)\b",
+    r"\bhoan\b",
+    r"\bsua\b",
+    r"\bkhieu nai\b",
+    r"\bgiao\b",
+]
+
+# References to earlier turns ("cái đó giá bao nhiêu"); only the LLM sees the history
+FOLLOW_UP_PATTERNS = [
+    r"\b(?:cai|mon|loai|san pham|sp|hang|con) (?:do|nay|kia|ay|tren|vua roi|luc nay)\b",
+    r"\b(?:no|chung|nhu vay|nhu tren|vua roi|luc nay|con lai|khac|nua|them|thi sao)\b",
+]
+
+# Words that only belong to a price expression (folded)
+PRICE_WORDS = {
+    "gia", "re", "duoi", "tren", "hon", "khoang", "tam", "tu", "den", "toi", "da", "thieu", "it", "nhat",
+    "qua", "k", "nghin", "ngan", "tr", "trieu", "cu", "d", "dong", "vnd", "max", "min",
+}
+
+_UNIT = r"(k|nghin|ngan|tr|trieu|cu|d|dong|vnd)?"
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+_RANGE_RE = re.compile(rf"{_NUMBER}\s*{_UNIT}\s*(?:-|~|den|toi)\s*{_NUMBER}\s*{_UNIT}\b")
+_MAX_RE = re.compile(rf"\b(?:duoi|it hon|nho hon|khong qua|toi da|max|<=?)\s*{_NUMBER}\s*{_UNIT}\b")
+_MIN_RE = re.compile(rf"\b(?:tren|hon|lon hon|it nhat|toi thieu|tu|min|>=?)\s*{_NUMBER}\s*{_UNIT}\b")
+_ABOUT_RE = re.compile(rf"\b(?:khoang|tam|chung|gia)\s*{_NUMBER}\s*{_UNIT}\b")
+
+_MULTIPLIERS = {
+    "k": 1_000, "nghin": 1_000, "ngan": 1_000,
+    "tr": 1_000_000, "trieu": 1_000_000, "cu": 1_000_000,
+    "d": 1, "dong": 1, "vnd": 1,
+}
+
+
+def _to_vnd(number: str, unit: str | None) -> float:
+    # "1.5" / "1,5" are decimals; "50.000" is a thousands separator
+    if re.fullmatch(r"\d{1,3}(?:[.,]\d{3})+", number):
+        value = float(re.sub(r"[.,]", "", number))
+    else:
+        value = float(number.replace(",", "."))
+    if unit:
+        return value * _MULTIPLIERS[unit]
+    # Bare small numbers in a price phrase mean thousands ("dưới 50")
+    return value * 1_000 if value < 1_000 else value
+
+
+def parse_price_range(folded: str) -> tuple[float | None, float | None, str]:
+    """
+    Parse VND budgets such as "duoi 50k", "30-40 nghin", "tu 20k den 50k",
+    "khoang 100 nghin". Returns (min_price, max_price, text_without_price).
+    """
+    match = _RANGE_RE.search(folded)
+    if match:
+        low_num, low_unit, high_num, high_unit = match.groups()
+        low_unit = low_unit or high_unit
+        low, high = _to_vnd(low_num, low_unit), _to_vnd(high_num, high_unit)
+        return min(low, high), max(low, high), folded[: match.start()] + folded[match.end() :]
+
+    min_price = max_price = None
+    for regex in (_MAX_RE, _MIN_RE):
+        match = regex.search(folded)
+        if match:
+            value = _to_vnd(*match.groups())
+            if regex is _MAX_RE:
+                max_price = value
+            else:
+                min_price = value
+            folded = folded[: match.start()] + folded[match.end() :]
+    if min_price is None and max_price is None:
+        match = _ABOUT_RE.search(folded)
+        if match:
+            value = _to_vnd(*match.groups())
+            min_price, max_price = value * 0.8, value * 1.2
+            folded = folded[: match.start()] + folded[match.end() :]
+    return min_price, max_price, folded
+
+
+class FastPathRouter:
+    """Local intent / price / keyword extractor used before the LLM analysis."""
+
+    MAX_PHRASE_WORDS = 4
+
+    def __init__(self, catalog_ttl: int = 600) -> None:
+        self.catalog_ttl = catalog_ttl
+        self._catalog_loaded_at = 0.0
+        # folded n-gram -> original catalog spelling
+        self._phrases: dict[str, str] = {}
+
+    @property
+    def catalog_size(self) -> int:
+        return len(self._phrases)
+
+    def _catalog_stale(self) -> bool:
+        return time.monotonic() - self._catalog_loaded_at > self.catalog_ttl
+
+    def load_catalog(self, product_names: list[str]) -> None:
+        phrases: dict[str, str] = {}
+        for name in product_names:
+            if not name:
+                continue
+            original = re.findall(r"\w+", name.lower())
+            folded = [fold_diacritics(word) for word in original]
+            for size in range(1, self.MAX_PHRASE_WORDS + 1):
+                for start in range(len(folded) - size + 1):
+                    key = " ".join(folded[start : start + size])
+                    phrases.setdefault(key, " ".join(original[start : start + size]))
+        self._phrases = phrases
+        self._catalog_loaded_at = time.monotonic()
+        print(f"[FastPath] Loaded {len(product_names)} product names ({len(phrases)} phrases)")
+
+    @staticmethod
+    def _catalog_stmt():
+        return select(Product.product_name).where(Product.is_active.is_(True))
+
+    def ensure_catalog(self, db: Session | None) -> None:
+        if db is None or not self._catalog_stale():
+            return
+        try:
+            self.load_catalog(list(db.scalars(self._catalog_stmt()).all()))
+        except Exception as e:
+            print(f"[FastPath] Error loading catalog: {e}")
+            self._catalog_loaded_at = time.monotonic()
+
+    async def aensure_catalog(self, db: AsyncSession | None) -> None:
+        if db is None or not self._catalog_stale():
+            return
+        try:
+            self.load_catalog(list((await db.scalars(self._catalog_stmt())).all()))
+        except Exception as e:
+            print(f"[FastPath] Error loading catalog: {e}")
+            self._catalog_loaded_at = time.monotonic()
+
+    def route(self, message: str, recent_messages: list[Any] | None = None) -> dict[str, Any] | None:
+        """
+        Return an analysis dict shaped like ``LLMAnalyzer.analyze_input`` when
+        the message is unambiguous, otherwise None so the LLM decides.
+
+        The rules never read ``recent_messages``; they are only used to bail out
+        when the message refers back to them.
+        """
+        folded = fold_diacritics(message or "")
+        if not folded.strip():
+            return None
+        if recent_messages and any(re.search(pattern, folded) for pattern in FOLLOW_UP_PATTERNS):
+            return None
+
+        for intent, patterns in INTENT_PATTERNS.items():
+            if any(re.search(pattern, folded) for pattern in patterns):
+                if any(re.search(pattern, folded) for pattern in ACTION_PATTERNS):
+                    return None
+                residual = [t for t in _tokenize(folded) if t not in STOP_WORDS]
+                # Anything left ("đơn hàng bắp mỹ", "đơn hàng không") needs the LLM
+                return None if residual else self._result(intent)
+
+        min_price, max_price, rest = parse_price_range(folded)
+        tokens = _tokenize(rest)
+        if any(t in NEGATION_WORDS for t in tokens):
+            return None
+        residual = [t for t in tokens if t not in STOP_WORDS and t not in PRICE_WORDS]
+        # A lone word ("mỹ", "500ml") hits too many unrelated n-grams to be confident
+        if len(residual) < 2 or len(residual) > self.MAX_PHRASE_WORDS:
+            return None
+        phrase = self._phrases.get(" ".join(residual))
+        if not phrase:
+            return None
+        return self._result(
+            "product_search",
+            keywords=[phrase],
+            query=phrase,
+            min_price=min_price,
+            max_price=max_price,
+        )
+
+    @staticmethod
+    def _result(
+        intent: str,
+        *,
+        keywords: list[str] | None = None,
+        query: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+    ) -> dict[str, Any]:
+        return {
+            "intent": intent,
+            "keywords": keywords or [],
+            "query": query,
+            "min_price": min_price,
+            "max_price": max_price,
+            "context_summary": None,
+        }
@@ -0,0 +1,48 @@
+"""
+Rank fusion shared by the retrieval paths: hybrid RAG + SQL search and the
+multi-phrasing vector batches.
+"""
+from typing import Any
+
+
+def product_key(product: dict[str, Any]) -> str:
+    """Identity of a product across result lists: product_code, else id, else normalized name."""
+    code = product.get("product_code")
+    if code:
+        return f"code:{code}"
+    if product.get("product_id"):
+        return f"id:{product['product_id']}"
+    return f"name:{(product.get('product_name') or '').strip().lower()}"
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: dict[str, list[dict[str, Any]]],
+    *,
+    k: int = 60,
+    limit: int = 5,
+) -> list[dict[str, Any]]:
+    """
+    Merge ranked result lists with RRF (score = sum 1 / (k + rank)).
+
+    Hits are deduplicated on product_code; the first list that returned a
+    product supplies its fields, and ``sources`` records every list it came from.
+    """
+    fused: dict[str, dict[str, Any]] = {}
+    scores: dict[str, float] = {}
+    for source, products in ranked_lists.items():
+        for rank, product in enumerate(products, start=1):
+            key = product_key(product)
+            if key not in fused:
+                fused[key] = {**product, "sources": []}
+                scores[key] = 0.0
+            else:
+                # Keep the richest payload (e.g. discount_percent only comes from SQL)
+                for field, value in product.items():
+                    if fused[key].get(field) is None and value is not None:
+                        fused[key][field] = value
+            if source not in fused[key]["sources"]:
+                fused[key]["sources"].append(source)
+            scores[key] += 1.0 / (k + rank)
+
+    ordered = sorted(fused, key=lambda key: scores[key], reverse=True)
+    return [fused[key] for key in ordered[:limit]]
@@ -1,14 +1,28 @@
 import re
+from typing import AsyncIterator
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from chatbot.api_metrics import get_metrics
+from chatbot.fast_router import FastPathRouter
+from chatbot.hybrid_search import ahybrid_search, hybrid_search
 from chatbot.llm import LLMAnalyzer
 from chatbot.memory import ConversationMemory
 from chatbot.rag import QdrantRAG
 from chatbot.redis_memory import RedisConversationMemory
 from chatbot.state import ChatbotState
-from chatbot.tools import get_user_orders, get_user_profile, search_products_by_keyword, suggest_products
+from chatbot.tools import (
+    aget_user_orders,
+    aget_user_profile,
+    asuggest_products,
+    get_user_orders,
+    get_user_profile,
+    suggest_products,
+)
+from core.config import get_settings
 
 INTENT_KEYWORDS = {
     "orders": ["order", "orders", "tracking", "shipment"],
@@ -31,30 +45,13 @@ STOP_WORDS = {
 }
 
 
-def _analyze_request(
-    ai: LLMAnalyzer | None, redis_memory: RedisConversationMemory | None, state: ChatbotState
-) -> ChatbotState:
-    session_id = state.get("session_id", "")
-    current_message = state.get("message", "")
-    user_id = state.get("user_id")
-    print(f"[LangGraph] Analyzing request for session {session_id}, user_id={user_id}")
+def _get_db(config: RunnableConfig | None) -> Session | AsyncSession | None:
+    """Per-request DB session handed in through ``config["configurable"]["db"]``."""
+    return ((config or {}).get("configurable") or {}).get("db")
 
-    # 1. Fetch recent messages (use user_id if logged in for persistent history)
-    recent_messages = []
-    if redis_memory and redis_memory.available:
-        recent_messages = redis_memory.get_recent_messages(session_id, limit=5, user_id=user_id)
-        state["recent_messages"] = recent_messages
-        print(f"[LangGraph] Retrieved {len(recent_messages)} recent messages")
-    else:
-        state["recent_messages"] = []
-        print("[LangGraph] Redis memory unavailable")
 
-    # 2. Consolidated API Call
-    result = {}
-    if ai and ai.available:
-        result = ai.analyze_input(recent_messages, current_message)
-    else:
-        print("[LangGraph] AI unavailable, processing locally")
+def _apply_analysis(state: ChatbotState, result: dict) -> ChatbotState:
+    current_message = state.get("message", "")
 
     # 3. Parse Results
     intent = result.get("intent")
@@ -95,7 +92,86 @@ def _analyze_request(
     return state
 
 
-def run_tools(state: ChatbotState, db: Session, rag: QdrantRAG | None) -> ChatbotState:
+def _analyze_request(
+    ai: LLMAnalyzer | None,
+    redis_memory: RedisConversationMemory | None,
+    router: FastPathRouter | None,
+    state: ChatbotState,
+    config: RunnableConfig,
+) -> ChatbotState:
+    session_id = state.get("session_id", "")
+    current_message = state.get("message", "")
+    user_id = state.get("user_id")
+    print(f"[LangGraph] Analyzing request for session {session_id}, user_id={user_id}")
+
+    # 1. Fetch recent messages (use user_id if logged in for persistent history)
+    recent_messages, summary = [], None
+    if redis_memory and redis_memory.available:
+        recent_messages, summary = redis_memory.get_history(session_id, limit=5, user_id=user_id)
+        state["recent_messages"] = recent_messages
+        state["conversation_summary"] = summary
+        print(f"[LangGraph] Retrieved {len(recent_messages)} recent messages")
+    else:
+        state["recent_messages"] = []
+        print("[LangGraph] Redis memory unavailable")
+
+    # 2. Rule-based fast path; the consolidated API call only when it is not confident
+    result = None
+    if router:
+        router.ensure_catalog(_get_db(config))
+        result = router.route(current_message, recent_messages)
+        get_metrics().log_fast_path(result is not None)
+
+    if result is None:
+        result = {}
+        if ai and ai.available:
+            result = ai.analyze_input(recent_messages, current_message, summary)
+        else:
+            print("[LangGraph] AI unavailable, processing locally")
+
+    return _apply_analysis(state, result)
+
+
+async def _aanalyze_request(
+    ai: LLMAnalyzer | None,
+    redis_memory: RedisConversationMemory | None,
+    router: FastPathRouter | None,
+    state: ChatbotState,
+    config: RunnableConfig,
+) -> ChatbotState:
+    session_id = state.get("session_id", "")
+    current_message = state.get("message", "")
+    user_id = state.get("user_id")
+    print(f"[LangGraph] Analyzing request for session {session_id}, user_id={user_id}")
+
+    recent_messages, summary = [], None
+    if redis_memory and redis_memory.available:
+        recent_messages, summary = await redis_memory.aget_history(session_id, limit=5, user_id=user_id)
+        state["recent_messages"] = recent_messages
+        state["conversation_summary"] = summary
+        print(f"[LangGraph] Retrieved {len(recent_messages)} recent messages")
+    else:
+        state["recent_messages"] = []
+        print("[LangGraph] Redis memory unavailable")
+
+    result = None
+    if router:
+        await router.aensure_catalog(_get_db(config))
+        result = router.route(current_message, recent_messages)
+        get_metrics().log_fast_path(result is not None)
+
+    if result is None:
+        result = {}
+        if ai and ai.available:
+            result = await ai.aanalyze_input(recent_messages, current_message, summary)
+        else:
+            print("[LangGraph] AI unavailable, processing locally")
+
+    return _apply_analysis(state, result)
+
+
+def run_tools(state: ChatbotState, config: RunnableConfig, rag: QdrantRAG | None) -> ChatbotState:
+    db = _get_db(config)
     intent = state.get("intent")
     print(f"[LangGraph] Running tools for intent: {intent}")
 
@@ -123,21 +199,19 @@ def run_tools(state: ChatbotState, db: Session, rag: QdrantRAG | None) -> Chatbo
         min_price = state.get("min_price")
         max_price = state.get("max_price")
 
-        products = []
-        # Try RAG first if query is descriptive and RAG available
-        if rag and rag.available and query_text and len(query_text.split()) > 2:
-            print(f"[LangGraph] Attempting RAG search for: {query_text}")
-            products = rag.search_products(query_text, limit=5, min_price=min_price, max_price=max_price)
-        
-        # Fallback or combine with SQL if RAG returned nothing
-        if not products:
-             print("[LangGraph] RAG empty or unavailable, using SQL Keyword search")
-             products = search_products_by_keyword(
-                db,
-                keywords,
-                min_price=min_price,
-                max_price=max_price,
-            )
+        # RAG (if query is descriptive) and SQL keyword search run concurrently, fused by RRF
+        settings = get_settings()
+        products = hybrid_search(
+            db,
+            rag,
+            keywords=keywords,
+            query_text=query_text,
+            min_price=min_price,
+            max_price=max_price,
+            deadline_ms=settings.hybrid_search_deadline_ms,
+            rrf_k=settings.hybrid_rrf_k,
+            max_rag_queries=settings.hybrid_rag_max_queries,
+        )
         
         state["tool_result"] = {"products": products}
 
@@ -145,108 +219,257 @@ def run_tools(state: ChatbotState, db: Session, rag: QdrantRAG | None) -> Chatbo
     return state
 
 
-def craft_response(
-    state: ChatbotState,
-    memory: ConversationMemory,
-    ai: LLMAnalyzer | None,
-    redis_memory: RedisConversationMemory | None,
-    db: Session,
-) -> ChatbotState:
+async def arun_tools(state: ChatbotState, config: RunnableConfig, rag: QdrantRAG | None) -> ChatbotState:
+    db = _get_db(config)
     intent = state.get("intent")
-    result = state.get("tool_result") or {}
-    print(f"[LangGraph] Crafting response for intent: {intent}")
+    print(f"[LangGraph] Running tools for intent: {intent}")
 
     if intent == "orders":
-        orders = result.get("orders", [])
-        if orders:
-            reply = "Đây là các đơn hàng gần đây của bạn:"
+        if state.get("user_id"):
+            print("[LangGraph] Fetching order history")
+            state["tool_result"] = {"orders": await aget_user_orders(db, state["user_id"])}
         else:
-            reply = "Bạn chưa có đơn hàng nào. Hãy đặt hàng để bắt đầu mua sắm nhé!"
+            print("[LangGraph] Order request without user_id")
+            state["tool_result"] = {"orders": None}
+
     elif intent == "profile":
-        profile = result.get("profile")
-        if profile:
-            reply = "Thông tin tài khoản của bạn:"
-        else:
-            reply = "Không tìm thấy thông tin tài khoản. Vui lòng kiểm tra lại."
-    elif intent == "product_search":
-        products = result.get("products", [])
-        query_desc = state.get("product_query")
-        original_message = state.get("message", "")  # Use original message for cache key
-        
-        if products:
-            ai_reply = (
-                ai.compose_product_response(
-                    query=query_desc, 
-                    products=products, 
-                    suggested_products=[],
-                    original_message=original_message
-                )
-                if ai and ai.available
-                else None
-            )
-            if ai_reply:
-                reply = ai_reply
-            else:
-                names = ", ".join(p["product_name"] for p in products if p.get("product_name"))
-                prefix = f"Bạn đang tìm: {query_desc}. " if query_desc else ""
-                reply = f"{prefix}Tôi tìm thấy các sản phẩm sau: {names}"
+        if state.get("user_id"):
+            print("[LangGraph] Fetching user profile")
+            state["tool_result"] = {"profile": await aget_user_profile(db, state["user_id"])}
         else:
-            suggested = suggest_products(db, limit=3) if db else []
-            state["tool_result"]["suggested_products"] = suggested
-            ai_reply = (
-                ai.compose_product_response(
-                    query=query_desc, 
-                    products=[], 
-                    suggested_products=suggested,
-                    original_message=original_message
-                )
-                if ai and ai.available
-                else None
-            )
-            if ai_reply:
-                reply = ai_reply
-            else:
-                if suggested:
-                    names = ", ".join(p["product_name"] for p in suggested if p.get("product_name"))
-                    reply = (
-                        f"Rất tiếc, tôi không tìm thấy sản phẩm phù hợp với yêu cầu của bạn. "
-                        f"Tuy nhiên, bạn có thể tham khảo một số sản phẩm phổ biến sau: {names}"
-                    )
-                else:
-                    reply = (
-                        "Rất tiếc, hiện tại không có sản phẩm phù hợp. "
-                        "Bạn có thể thử tìm kiếm với từ khóa khác hoặc liên hệ hỗ trợ để được tư vấn thêm."
-                    )
+            print("[LangGraph] Profile request without user_id")
+            state["tool_result"] = {"profile": None}
+
     else:
-        reply = "Xin lỗi, tôi chưa hiểu rõ yêu cầu của bạn. Bạn có thể diễn đạt lại được không?"
+        print("[LangGraph] Searching products (SQL + RAG)")
+        keywords = state.get("keywords")
+        query_text = state.get("product_query")
+        min_price = state.get("min_price")
+        max_price = state.get("max_price")
+
+        settings = get_settings()
+        products = await ahybrid_search(
+            db,
+            rag,
+            keywords=keywords,
+            query_text=query_text,
+            min_price=min_price,
+            max_price=max_price,
+            deadline_ms=settings.hybrid_search_deadline_ms,
+            rrf_k=settings.hybrid_rrf_k,
+            max_rag_queries=settings.hybrid_rag_max_queries,
+        )
+
+        state["tool_result"] = {"products": products}
+
+    print(f"[LangGraph] Tool result keys: {list((state.get('tool_result') or {}).keys())}")
+    return state
+
+
+def _static_reply(intent: str | None, result: dict) -> str | None:
+    """Replies that need no LLM call; None means the intent is product_search."""
+    if intent == "orders":
+        orders = result.get("orders", [])
+        if orders:
+            return "Đây là các đơn hàng gần đây của bạn:"
+        return "Bạn chưa có đơn hàng nào. Hãy đặt hàng để bắt đầu mua sắm nhé!"
+    if intent == "profile":
+        profile = result.get("profile")
+        if profile:
+            return "Thông tin tài khoản của bạn:"
+        return "Không tìm thấy thông tin tài khoản. Vui lòng kiểm tra lại."
+    if intent == "product_search":
+        return None
+    return "Xin lỗi, tôi chưa hiểu rõ yêu cầu của bạn. Bạn có thể diễn đạt lại được không?"
+
+
+def _compose_inputs(state: ChatbotState) -> dict:
+    """Keyword arguments of the analyzer's product-response calls, shared by every reply path."""
+    result = state.get("tool_result") or {}
+    products = result.get("products") or []
+    return {
+        "query": state.get("product_query"),
+        "products": products,
+        "suggested_products": [] if products else result.get("suggested_products") or [],
+        "original_message": state.get("message", ""),  # Use original message for cache key
+    }
+
+
+def _fallback_reply(inputs: dict) -> str:
+    """Reply used when the LLM is unavailable or returns nothing."""
+    products = inputs["products"]
+    if products:
+        names = ", ".join(p["product_name"] for p in products if p.get("product_name"))
+        prefix = f"Bạn đang tìm: {inputs['query']}. " if inputs["query"] else ""
+        return f"{prefix}Tôi tìm thấy các sản phẩm sau: {names}"
+    suggested = inputs["suggested_products"]
+    if suggested:
+        names = ", ".join(p["product_name"] for p in suggested if p.get("product_name"))
+        return (
+            f"Rất tiếc, tôi không tìm thấy sản phẩm phù hợp với yêu cầu của bạn. "
+            f"Tuy nhiên, bạn có thể tham khảo một số sản phẩm phổ biến sau: {names}"
+        )
+    return (
+        "Rất tiếc, hiện tại không có sản phẩm phù hợp. "
+        "Bạn có thể thử tìm kiếm với từ khóa khác hoặc liên hệ hỗ trợ để được tư vấn thêm."
+    )
+
+
+def _needs_suggestions(state: ChatbotState) -> bool:
+    return state.get("intent") == "product_search" and not (state.get("tool_result") or {}).get("products")
+
+
+def _store_suggestions(state: ChatbotState, suggested: list[dict]) -> None:
+    result = state.get("tool_result") or {}
+    result["suggested_products"] = suggested
+    state["tool_result"] = result
+
+
+def _turn_summary(state: ChatbotState) -> str | None:
+    """
+    Rolling summary to store with the turn. Turns without a fresh summary (fast
+    path, analysis failure) carry the previous one forward.
+    """
+    return state.get("conversation_context") or state.get("conversation_summary")
 
+
+def _record_reply(state: ChatbotState, reply: str, memory: ConversationMemory) -> tuple[str, str | None, str]:
+    """Store the reply in session memory; returns (session_id, user_id, user_message) for Redis."""
     memory.append(state["session_id"], "assistant", reply)
+    state["response"] = reply
+    return state.get("session_id", ""), state.get("user_id"), state.get("message", "")
+
 
+def craft_response(
+    state: ChatbotState,
+    config: RunnableConfig,
+    memory: ConversationMemory,
+    ai: LLMAnalyzer | None,
+    redis_memory: RedisConversationMemory | None,
+) -> ChatbotState:
+    intent = state.get("intent")
+    print(f"[LangGraph] Crafting response for intent: {intent}")
+
+    reply = _static_reply(intent, state.get("tool_result") or {})
+    if reply is None:
+        if _needs_suggestions(state):
+            db = _get_db(config)
+            _store_suggestions(state, suggest_products(db, limit=3) if db else [])
+        inputs = _compose_inputs(state)
+        ai_reply = ai.compose_product_response(**inputs) if ai and ai.available else None
+        reply = ai_reply or _fallback_reply(inputs)
+
+    session_id, user_id, user_message = _record_reply(state, reply, memory)
     if redis_memory and redis_memory.available:
-        session_id = state.get("session_id", "")
-        user_id = state.get("user_id")
-        user_message = state.get("message", "")
-        redis_memory.append(session_id, "user", user_message, user_id=user_id)
-        redis_memory.append(session_id, "assistant", reply, user_id=user_id)
+        redis_memory.append_turn(
+            session_id, user_message, reply, user_id=user_id, summary=_turn_summary(state)
+        )
         print(f"[LangGraph] Saved messages to Redis for session {session_id}, user_id={user_id}")
+    print(f"[LangGraph] Reply generated: {reply}")
+    return state
+
 
+async def acraft_response(
+    state: ChatbotState,
+    config: RunnableConfig,
+    memory: ConversationMemory,
+    ai: LLMAnalyzer | None,
+    redis_memory: RedisConversationMemory | None,
+) -> ChatbotState:
+    intent = state.get("intent")
+    print(f"[LangGraph] Crafting response for intent: {intent}")
+
+    reply = _static_reply(intent, state.get("tool_result") or {})
+    if reply is None:
+        await aprepare_stream_context(state, config)
+        inputs = _compose_inputs(state)
+        ai_reply = await ai.acompose_product_response(**inputs) if ai and ai.available else None
+        reply = ai_reply or _fallback_reply(inputs)
+
+    await _apersist_reply(state, reply, memory, redis_memory)
+    return state
+
+
+async def _apersist_reply(
+    state: ChatbotState,
+    reply: str,
+    memory: ConversationMemory,
+    redis_memory: RedisConversationMemory | None,
+) -> None:
+    session_id, user_id, user_message = _record_reply(state, reply, memory)
+    if redis_memory and redis_memory.available:
+        await redis_memory.aappend_turn(
+            session_id, user_message, reply, user_id=user_id, summary=_turn_summary(state)
+        )
+        print(f"[LangGraph] Saved messages to Redis for session {session_id}, user_id={user_id}")
     print(f"[LangGraph] Reply generated: {reply}")
-    state["response"] = reply
+
+
+async def aprepare_stream_context(state: ChatbotState, config: RunnableConfig) -> ChatbotState:
+    """
+    Fetch fallback suggestions up front so the complete MessageContext is known
+    before the first token is streamed.
+    """
+    if _needs_suggestions(state):
+        db = _get_db(config)
+        _store_suggestions(state, await asuggest_products(db, limit=3) if db else [])
     return state
 
 
+async def astream_reply(
+    state: ChatbotState,
+    memory: ConversationMemory,
+    ai: LLMAnalyzer | None,
+    redis_memory: RedisConversationMemory | None,
+) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of acraft_response for a state that went through the
+    prepare graph and aprepare_stream_context. Yields reply chunks, then stores
+    the assembled reply in memory (ResponseCache is filled by the analyzer).
+    """
+    intent = state.get("intent")
+    result = state.get("tool_result") or {}
+    print(f"[LangGraph] Streaming response for intent: {intent}")
+
+    reply = _static_reply(intent, result)
+    if reply is None:
+        inputs = _compose_inputs(state)
+        parts: list[str] = []
+        if ai and ai.available:
+            async for chunk in ai.astream_product_response(**inputs):
+                parts.append(chunk)
+                yield chunk
+        reply = "".join(parts).strip()
+        if not reply:
+            reply = _fallback_reply(inputs)
+            yield reply
+    else:
+        yield reply
+
+    await _apersist_reply(state, reply, memory, redis_memory)
+
+
 def build_graph(
-    db: Session,
     memory: ConversationMemory,
     ai: LLMAnalyzer | None,
     rag: QdrantRAG | None = None,
     redis_memory: RedisConversationMemory | None = None,
+    router: FastPathRouter | None = None,
 ) -> StateGraph:
+    """
+    Compile the chatbot pipeline once. Long-lived dependencies are bound here;
+    the per-request DB session is read from ``config["configurable"]["db"]``
+    and the user travels in the state, so the compiled graph can be shared.
+    """
     graph = StateGraph(ChatbotState)
 
-    graph.add_node("analyze_request", lambda state: _analyze_request(ai, redis_memory, state))
-    graph.add_node("run_tools", lambda state: run_tools(state, db, rag))
-    graph.add_node("craft_response", lambda state: craft_response(state, memory, ai, redis_memory,db=db))
+    graph.add_node(
+        "analyze_request", lambda state, config: _analyze_request(ai, redis_memory, router, state, config)
+    )
+    graph.add_node("run_tools", lambda state, config: run_tools(state, config, rag))
+    graph.add_node(
+        "craft_response", lambda state, config: craft_response(state, config, memory, ai, redis_memory)
+    )
 
     graph.add_edge(START, "analyze_request")
     graph.add_edge("analyze_request", "run_tools")
@@ -256,6 +479,42 @@ def build_graph(
     return graph.compile()
 
 
-    
+def build_async_graph(
+    memory: ConversationMemory,
+    ai: LLMAnalyzer | None,
+    rag: QdrantRAG | None = None,
+    redis_memory: RedisConversationMemory | None = None,
+    router: FastPathRouter | None = None,
+    *,
+    with_response: bool = True,
+) -> StateGraph:
+    """
+    Same pipeline as build_graph with coroutine nodes, for ``graph.ainvoke``.
+    ``config["configurable"]["db"]`` must be an AsyncSession. With
+    ``with_response=False`` the graph stops after run_tools so the reply can
+    be streamed by astream_reply.
+    """
+    graph = StateGraph(ChatbotState)
+
+    async def analyze_node(state: ChatbotState, config: RunnableConfig) -> ChatbotState:
+        return await _aanalyze_request(ai, redis_memory, router, state, config)
+
+    async def tools_node(state: ChatbotState, config: RunnableConfig) -> ChatbotState:
+        return await arun_tools(state, config, rag)
+
+    async def respond_node(state: ChatbotState, config: RunnableConfig) -> ChatbotState:
+        return await acraft_response(state, config, memory, ai, redis_memory)
+
+    graph.add_node("analyze_request", analyze_node)
+    graph.add_node("run_tools", tools_node)
 
-   
\ No newline at end of file
+    graph.add_edge(START, "analyze_request")
+    graph.add_edge("analyze_request", "run_tools")
+    if with_response:
+        graph.add_node("craft_response", respond_node)
+        graph.add_edge("run_tools", "craft_response")
+        graph.add_edge("craft_response", END)
+    else:
+        graph.add_edge("run_tools", END)
+
+    return graph.compile()
@@ -0,0 +1,152 @@
+"""
+Hybrid product retrieval: Qdrant (semantic) and SQL (keyword) searches run
+concurrently under a deadline and are merged with reciprocal-rank fusion.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from chatbot.fusion import reciprocal_rank_fusion
+from chatbot.rag import QdrantRAG
+from chatbot.tools import asearch_products_by_keyword, search_products_by_keyword
+
+SOURCE_RAG = "rag"
+SOURCE_SQL = "sql"
+
+# Shared pool for the sync path; Qdrant and SQL calls are I/O bound
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-search")
+
+
+def _use_rag(rag: QdrantRAG | None, query_text: str | None) -> bool:
+    # Semantic search only pays off for descriptive queries
+    return bool(rag and rag.available and query_text and len(query_text.split()) > 2)
+
+
+def _rag_queries(rag: QdrantRAG, query_text: str, keywords: list[str] | None, max_queries: int) -> list[str]:
+    """
+    The query summary first, then keyword phrasings it does not already contain.
+    Extra phrasings only when the backend embeds client-side and can batch them.
+    """
+    queries = [query_text]
+    if not rag.batches_queries:
+        return queries
+    lowered = query_text.lower()
+    for keyword in keywords or []:
+        if len(queries) >= max_queries:
+            break
+        if keyword and keyword.strip() and keyword.strip().lower() not in lowered:
+            queries.append(keyword.strip())
+    return queries
+
+
+async def _akeyword_search(
+    db: AsyncSession, keywords: list[str] | None, min_price: float | None, max_price: float | None
+) -> list[dict[str, Any]]:
+    """
+    SQL keyword search on its own short-lived session, so a query that misses the
+    deadline can be cancelled without touching the request's session.
+    """
+    async with AsyncSession(db.bind, expire_on_commit=False) as search_db:
+        return await asearch_products_by_keyword(search_db, keywords, min_price=min_price, max_price=max_price)
+
+
+def _keyword_search(
+    db: Session, keywords: list[str] | None, min_price: float | None, max_price: float | None
+) -> list[dict[str, Any]]:
+    """Sync counterpart of _akeyword_search, run on a worker thread."""
+    with Session(db.get_bind()) as search_db:
+        return search_products_by_keyword(search_db, keywords, min_price=min_price, max_price=max_price)
+
+
+async def ahybrid_search(
+    db: AsyncSession,
+    rag: QdrantRAG | None,
+    *,
+    keywords: list[str] | None,
+    query_text: str | None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    limit: int = 5,
+    deadline_ms: int = 800,
+    rrf_k: int = 60,
+    max_rag_queries: int = 1,
+) -> list[dict[str, Any]]:
+    """
+    Fire RAG and SQL searches together and fuse whatever finished by the
+    deadline; a late search is cancelled. SQL runs on its own session, so
+    cancelling it leaves the request's session usable for later nodes.
+    """
+    tasks: dict[asyncio.Task, str] = {
+        asyncio.create_task(_akeyword_search(db, keywords, min_price, max_price)): SOURCE_SQL
+    }
+    if _use_rag(rag, query_text):
+        tasks[asyncio.create_task(rag.asearch_products_batch(
+            _rag_queries(rag, query_text, keywords, max_rag_queries),
+            limit=limit, min_price=min_price, max_price=max_price, rrf_k=rrf_k,
+        ))] = SOURCE_RAG
+
+    start = time.perf_counter()
+    await asyncio.wait(tasks, timeout=deadline_ms / 1000)
+    done = {task for task in tasks if task.done()}
+    for task in tasks.keys() - done:
+        print(f"[Hybrid] {tasks[task]} search missed the {deadline_ms}ms deadline, cancelling")
+        task.cancel()
+
+    ranked_lists: dict[str, list[dict[str, Any]]] = {}
+    for task in done:
+        try:
+            ranked_lists[tasks[task]] = task.result()
+        except Exception as e:
+            print(f"[Hybrid] {tasks[task]} search failed: {e}")
+
+    products = reciprocal_rank_fusion(ranked_lists, k=rrf_k, limit=limit)
+    counts = {source: len(items) for source, items in ranked_lists.items()}
+    print(f"[Hybrid] Fused {len(products)} products from {counts} in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return products
+
+
+def hybrid_search(
+    db: Session,
+    rag: QdrantRAG | None,
+    *,
+    keywords: list[str] | None,
+    query_text: str | None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    limit: int = 5,
+    deadline_ms: int = 800,
+    rrf_k: int = 60,
+    max_rag_queries: int = 1,
+) -> list[dict[str, Any]]:
+    """
+    Sync variant of ahybrid_search. Both searches run on worker threads (SQL on
+    its own Session, which must not be shared across threads); a search that
+    misses the deadline is abandoned and its result discarded.
+    """
+    start = time.perf_counter()
+    futures = {_executor.submit(_keyword_search, db, keywords, min_price, max_price): SOURCE_SQL}
+    if _use_rag(rag, query_text):
+        futures[_executor.submit(
+            rag.search_products_batch,
+            _rag_queries(rag, query_text, keywords, max_rag_queries),
+            limit=limit, min_price=min_price, max_price=max_price, rrf_k=rrf_k,
+        )] = SOURCE_RAG
+
+    ranked_lists: dict[str, list[dict[str, Any]]] = {}
+    for future, source in futures.items():
+        remaining = max(0.0, deadline_ms / 1000 - (time.perf_counter() - start))
+        try:
+            ranked_lists[source] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            print(f"[Hybrid] {source} search missed the {deadline_ms}ms deadline, skipping")
+        except Exception as e:
+            print(f"[Hybrid] {source} search failed: {e}")
+
+    products = reciprocal_rank_fusion(ranked_lists, k=rrf_k, limit=limit)
+    print(f"[Hybrid] Fused {len(products)} products in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return products
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+import re
+from typing import Any, AsyncIterator
 
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
@@ -15,10 +16,83 @@ from chatbot.prompts import (
     KEYWORD_PROMPT,
     PRODUCT_RESPONSE_PROMPT,
 )
+from chatbot.analysis_cache import AnalysisCache
+from chatbot.fusion import product_key
 from chatbot.response_cache import ResponseCache
 from chatbot.api_metrics import get_metrics
 
 
+_TABLE_SEPARATOR = re.compile(r"^[\|\-\s:]+$")
+_BLANK_RUN = re.compile(r"\n{3,}")
+
+
+def _clean_table_line(line: str, in_table: bool) -> tuple[str | None, bool]:
+    """
+    One line of table removal: returns (text to keep or None, whether a table
+    continues). Table rows become comma-separated cells, separators and the rest
+    of a table are dropped, and a blank line ends the table.
+    """
+    stripped = line.strip()
+    if _TABLE_SEPARATOR.match(stripped):
+        return None, True
+    if "|" in stripped and stripped.count("|") >= 2:
+        parts = [p.strip() for p in stripped.split("|") if p.strip()]
+        return (", ".join(parts) if parts else None), True
+    if in_table:
+        return None, bool(stripped)
+    return line, False
+
+
+class _TableFormatStripper:
+    """
+    Streaming counterpart of ``LLMAnalyzer._remove_table_format``.
+
+    A line is only cleaned once its newline arrives (any partial line may still
+    turn into a table row), and trailing whitespace is held back until text
+    follows it, so the concatenated output equals the batch result.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._in_table = False
+        self._has_line = False
+        self._started = False
+        self._held = ""  # whitespace not yet known to be inside the text
+
+    def feed(self, chunk: str) -> str:
+        out = []
+        self._buffer += chunk
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            out.append(self._finish_line(line))
+        return "".join(out)
+
+    def flush(self) -> str:
+        line, self._buffer = self._buffer, ""
+        return self._finish_line(line)
+
+    def _finish_line(self, line: str) -> str:
+        kept, self._in_table = _clean_table_line(line, self._in_table)
+        if kept is None:
+            return ""
+        text = ("\n" if self._has_line else "") + kept
+        self._has_line = True
+        return self._emit(text)
+
+    def _emit(self, text: str) -> str:
+        # Same as strip() + collapsing blank runs on the whole reply: whitespace is
+        # released only once non-whitespace text follows it
+        text = self._held + text
+        body = text.rstrip()
+        self._held = text[len(body):]
+        if not body:
+            return ""
+        if not self._started:
+            self._started = True
+            body = body.lstrip()
+        return _BLANK_RUN.sub("\n\n", body)
+
+
 class LLMAnalyzer:
     def __init__(self, settings: Settings) -> None:
         api_key = settings.google_api_key
@@ -33,6 +107,8 @@ class LLMAnalyzer:
         )
         # Initialize cache
         self.cache = ResponseCache(settings)
+        self.analysis_cache = AnalysisCache(settings)
+        self.summary_recent_messages = settings.summary_recent_messages
         self.intent_chain = (
             ChatPromptTemplate.from_messages(
                 [
@@ -98,7 +174,10 @@ class LLMAnalyzer:
                         "system",
                         CONSOLIDATED_ANALYSIS_PROMPT,
                     ),
-                    ("human", "Recent Messages:\n{history}\n\nCurrent Message: {message}"),
+                    (
+                        "human",
+                        "Conversation Summary:\n{summary}\n\nRecent Messages:\n{history}\n\nCurrent Message: {message}",
+                    ),
                 ]
             )
             | self.model
@@ -168,65 +247,124 @@ class LLMAnalyzer:
             print(f"[LLM] Error analyzing conversation: {e}")
             return None
 
+    @staticmethod
+    def _history_text(recent_messages: list[dict]) -> str:
+        return "\n".join(
+            [f"{msg.get('role', 'unknown')}: {msg.get('content', '')}" for msg in recent_messages]
+        ) if recent_messages else "No history."
+
+    def _history_window(self, recent_messages: list[dict], summary: str | None) -> list[dict]:
+        """With a stored rolling summary only the newest messages are sent alongside it."""
+        if not summary:
+            return recent_messages
+        window = recent_messages[: self.summary_recent_messages]
+        get_metrics().log_history_compaction(
+            len(self._history_text(recent_messages)), len(self._history_text(window)) + len(summary)
+        )
+        return window
+
+    @staticmethod
+    def _empty_analysis() -> dict[str, Any]:
+        return {
+            "intent": None,
+            "keywords": [],
+            "query": None,
+            "min_price": None,
+            "max_price": None,
+            "context_summary": None,
+        }
+
     def analyze_input(
-        self, recent_messages: list[dict], current_message: str
+        self, recent_messages: list[dict], current_message: str, summary: str | None = None
     ) -> dict[str, Any]:
         """
         Consolidated analysis: Intent, Keywords, Query, Price, and Context in ONE call.
         """
         if not self.available:
-            return {
-                "intent": None,
-                "keywords": [],
-                "query": None,
-                "min_price": None,
-                "max_price": None,
-                "context_summary": None,
-            }
+            return self._empty_analysis()
 
-        history_text = "\n".join(
-            [f"{msg.get('role', 'unknown')}: {msg.get('content', '')}" for msg in recent_messages]
-        ) if recent_messages else "No history."
+        recent_messages = self._history_window(recent_messages, summary)
+
+        if self.analysis_cache.available:
+            cached = self.analysis_cache.get(current_message, recent_messages, summary)
+            if cached:
+                get_metrics().log_analysis_cache_hit()
+                return cached
+            get_metrics().log_analysis_cache_miss()
+
+        history_text = self._history_text(recent_messages)
+        summary_text = summary or "No summary."
 
         try:
             print(f"[LLM] Analyzing input with consolidated prompt...")
             result = self.consolidated_chain.invoke(
-                {"history": history_text, "message": current_message}
+                {"summary": summary_text, "history": history_text, "message": current_message}
             )
+            get_metrics().log_llm_call(len(summary_text) + len(history_text) + len(current_message), len(result))
             data = self._load_json(result) or {}
             print(f"[LLM] Consolidated analysis result: {data}")
+            self.analysis_cache.set(current_message, recent_messages, data, summary)
             return data
         except Exception as e:
             print(f"[LLM] Error in consolidated analysis: {e}")
             return {}
 
-    def compose_product_response(
-        self, *, query: str | None, products: list[dict], suggested_products: list[dict] | None = None, original_message: str | None = None
-    ) -> str | None:
+    async def aanalyze_input(
+        self, recent_messages: list[dict], current_message: str, summary: str | None = None
+    ) -> dict[str, Any]:
+        """Async variant of analyze_input using ``ainvoke``."""
         if not self.available:
-            return None
+            return self._empty_analysis()
+
+        recent_messages = self._history_window(recent_messages, summary)
+
+        if self.analysis_cache.available:
+            cached = await self.analysis_cache.aget(current_message, recent_messages, summary)
+            if cached:
+                get_metrics().log_analysis_cache_hit()
+                return cached
+            get_metrics().log_analysis_cache_miss()
+
+        history_text = self._history_text(recent_messages)
+        summary_text = summary or "No summary."
+
+        try:
+            print(f"[LLM] Analyzing input with consolidated prompt...")
+            result = await self.consolidated_chain.ainvoke(
+                {"summary": summary_text, "history": history_text, "message": current_message}
+            )
+            get_metrics().log_llm_call(len(summary_text) + len(history_text) + len(current_message), len(result))
+            data = self._load_json(result) or {}
+            print(f"[LLM] Consolidated analysis result: {data}")
+            await self.analysis_cache.aset(current_message, recent_messages, data, summary)
+            return data
+        except Exception as e:
+            print(f"[LLM] Error in consolidated analysis: {e}")
+            return {}
 
-        # Determine cache context and TTL
+    @staticmethod
+    def _cache_context(products: list[dict], suggested_products: list[dict] | None) -> tuple[str, int]:
+        """Determine cache context and TTL."""
         has_products = len(products) > 0 or len(suggested_products or []) > 0
         if has_products:
-            context_type = "product"
-            ttl = 3600  # 1 hour for product-based answers
-        else:
-            context_type = "advice"
-            ttl = 604800  # 7 days for general advice/nutrition
+            return "product", 3600  # 1 hour for product-based answers
+        return "advice", 604800  # 7 days for general advice/nutrition
 
-        # Use original_message for cache key (more consistent than LLM-generated query)
-        cache_key = original_message or query
-        
-        # Check cache first
-        if self.cache and self.cache.available and cache_key:
-            cached_response = self.cache.get_cached_response(cache_key, context_type)
-            if cached_response:
-                get_metrics().log_cache_hit()
-                return cached_response
-            else:
-                get_metrics().log_cache_miss()
+    @staticmethod
+    def _semantic_scope(message: str | None, products: list[dict], suggested_products: list[dict] | None) -> str:
+        """
+        What a semantic cache hit must share besides a close embedding: the products
+        the reply names and the quantities in the message ("dưới 20k" vs "dưới 50k"),
+        which barely move the vector.
+        """
+        keys = [product_key(p) for p in products] + [product_key(p) for p in suggested_products or []]
+        numbers = re.findall(r"\d+(?:[.,]\d+)*[^\W\d_]*", (message or "").lower())
+        return "|".join(keys) + "#" + ",".join(numbers)
 
+    @staticmethod
+    def _product_payload(
+        query: str | None, products: list[dict], suggested_products: list[dict] | None
+    ) -> dict[str, str]:
         def _filter_product(p: dict) -> dict:
             return {
                 "name": p.get("product_name"),
@@ -238,11 +376,93 @@ class LLMAnalyzer:
         filtered_products = [_filter_product(p) for p in products]
         filtered_suggested = [_filter_product(p) for p in (suggested_products or [])]
 
-        payload = {
+        return {
             "query": query or "",
             "products": json.dumps(filtered_products, ensure_ascii=False),
             "suggested_products": json.dumps(filtered_suggested, ensure_ascii=False),
         }
+
+    def _lookup_cache(self, cache_key: str | None, context_type: str, scope: str) -> tuple[str | None, Any]:
+        """Exact Redis key first, then the semantic tier. Returns (reply, query vector for storing)."""
+        if not cache_key:
+            return None, None
+
+        if self.cache.available:
+            cached_response = self.cache.get_cached_response(cache_key, context_type)
+            if cached_response:
+                get_metrics().log_cache_hit()
+                return cached_response, None
+            get_metrics().log_cache_miss()
+
+        if self.cache.semantic.handles(context_type):
+            cached_response, vector = self.cache.semantic.lookup(cache_key, context_type, scope)
+            if cached_response:
+                get_metrics().log_semantic_cache_hit()
+            else:
+                get_metrics().log_semantic_cache_miss()
+            return cached_response, vector
+        return None, None
+
+    async def _alookup_cache(
+        self, cache_key: str | None, context_type: str, scope: str
+    ) -> tuple[str | None, Any]:
+        if not cache_key:
+            return None, None
+
+        if self.cache.available:
+            cached_response = await self.cache.aget_cached_response(cache_key, context_type)
+            if cached_response:
+                get_metrics().log_cache_hit()
+                return cached_response, None
+            get_metrics().log_cache_miss()
+
+        if self.cache.semantic.handles(context_type):
+            cached_response, vector = await self.cache.semantic.alookup(cache_key, context_type, scope)
+            if cached_response:
+                get_metrics().log_semantic_cache_hit()
+            else:
+                get_metrics().log_semantic_cache_miss()
+            return cached_response, vector
+        return None, None
+
+    def _store_cache(
+        self, cache_key: str | None, response: str, context_type: str, ttl: int, vector: Any, scope: str
+    ) -> None:
+        if not cache_key or not response:
+            return
+        if self.cache.available:
+            self.cache.cache_response(cache_key, response, context_type, ttl)
+        if self.cache.semantic.handles(context_type):
+            self.cache.semantic.add(cache_key, response, context_type, ttl, vector, scope)
+
+    async def _astore_cache(
+        self, cache_key: str | None, response: str, context_type: str, ttl: int, vector: Any, scope: str
+    ) -> None:
+        if not cache_key or not response:
+            return
+        if self.cache.available:
+            await self.cache.acache_response(cache_key, response, context_type, ttl)
+        if self.cache.semantic.handles(context_type):
+            await self.cache.semantic.aadd(cache_key, response, context_type, ttl, vector, scope)
+
+    def compose_product_response(
+        self, *, query: str | None, products: list[dict], suggested_products: list[dict] | None = None, original_message: str | None = None
+    ) -> str | None:
+        if not self.available:
+            return None
+
+        context_type, ttl = self._cache_context(products, suggested_products)
+
+        # Use original_message for cache key (more consistent than LLM-generated query)
+        cache_key = original_message or query
+        scope = self._semantic_scope(cache_key, products, suggested_products)
+        
+        # Check cache first (exact key, then semantic similarity)
+        cached_response, query_vector = self._lookup_cache(cache_key, context_type, scope)
+        if cached_response:
+            return cached_response
+
+        payload = self._product_payload(query, products, suggested_products)
         
         # Calculate input size for metrics
         input_chars = len(str(payload))
@@ -256,40 +476,94 @@ class LLMAnalyzer:
             get_metrics().log_llm_call(input_chars, len(cleaned))
             
             # Cache the response
-            if self.cache and self.cache.available and cache_key and cleaned:
-                self.cache.cache_response(cache_key, cleaned, context_type, ttl)
+            self._store_cache(cache_key, cleaned, context_type, ttl, query_vector, scope)
             
             return cleaned
         return None
 
+    async def acompose_product_response(
+        self, *, query: str | None, products: list[dict], suggested_products: list[dict] | None = None, original_message: str | None = None
+    ) -> str | None:
+        """Async variant of compose_product_response using ``ainvoke`` and async Redis."""
+        if not self.available:
+            return None
+
+        context_type, ttl = self._cache_context(products, suggested_products)
+        cache_key = original_message or query
+        scope = self._semantic_scope(cache_key, products, suggested_products)
+
+        cached_response, query_vector = await self._alookup_cache(cache_key, context_type, scope)
+        if cached_response:
+            return cached_response
+
+        payload = self._product_payload(query, products, suggested_products)
+        input_chars = len(str(payload))
+
+        response = await self.product_chain.ainvoke(payload)
+        if isinstance(response, str):
+            cleaned = response.strip()
+            cleaned = self._remove_table_format(cleaned)
+
+            get_metrics().log_llm_call(input_chars, len(cleaned))
+
+            await self._astore_cache(cache_key, cleaned, context_type, ttl, query_vector, scope)
+
+            return cleaned
+        return None
+
+    async def astream_product_response(
+        self, *, query: str | None, products: list[dict], suggested_products: list[dict] | None = None, original_message: str | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of acompose_product_response: yields cleaned text chunks
+        from ``product_chain.astream`` and caches the assembled reply at the end.
+        A cache hit is yielded as a single chunk.
+        """
+        if not self.available:
+            return
+
+        context_type, ttl = self._cache_context(products, suggested_products)
+        cache_key = original_message or query
+        scope = self._semantic_scope(cache_key, products, suggested_products)
+
+        cached_response, query_vector = await self._alookup_cache(cache_key, context_type, scope)
+        if cached_response:
+            yield cached_response
+            return
+
+        payload = self._product_payload(query, products, suggested_products)
+        input_chars = len(str(payload))
+
+        stripper = _TableFormatStripper()
+        parts: list[str] = []
+        async for chunk in self.product_chain.astream(payload):
+            text = stripper.feed(chunk)
+            if text:
+                parts.append(text)
+                yield text
+        tail = stripper.flush()
+        if tail:
+            parts.append(tail)
+            yield tail
+
+        cleaned = "".join(parts).rstrip()
+        get_metrics().log_llm_call(input_chars, len(cleaned))
+
+        await self._astore_cache(cache_key, cleaned, context_type, ttl, query_vector, scope)
+
     @staticmethod
     def _remove_table_format(text: str) -> str:
         """Remove table formatting from text response."""
-        import re
-
-        lines = text.split("\n")
         cleaned_lines = []
         in_table = False
 
-        for line in lines:
-            stripped = line.strip()
-            if re.match(r"^[\|\-\s:]+$", stripped):
-                in_table = True
-                continue
-            if "|" in stripped and stripped.count("|") >= 2:
-                in_table = True
-                parts = [p.strip() for p in stripped.split("|") if p.strip()]
-                if parts:
-                    cleaned_lines.append(", ".join(parts))
-                continue
-            if in_table and not stripped:
-                in_table = False
-                continue
-            if not in_table:
-                cleaned_lines.append(line)
+        for line in text.split("\n"):
+            kept, in_table = _clean_table_line(line, in_table)
+            if kept is not None:
+                cleaned_lines.append(kept)
 
         result = "\n".join(cleaned_lines).strip()
-        result = re.sub(r"\n{3,}", "\n\n", result)
+        result = _BLANK_RUN.sub("\n\n", result)
         return result
 
     @staticmethod
@@ -0,0 +1,203 @@
+import asyncio
+import json
+from typing import Any
+
+import numpy as np
+
+from chatbot.rag import QueryVectorMixin, fuse_query_results, payload_to_product, unique_queries
+from core.config import Settings
+
+# Above this many rows the exact scan is moved off the event loop in asearch_products
+_INLINE_SEARCH_ROWS = 20000
+
+
+class LocalVectorIndex(QueryVectorMixin):
+    """
+    In-process exact vector search over the catalog, same contract as QdrantRAG.
+    Loads ``<path>.npy`` (L2-normalized float32 rows, memory-mapped) and ``<path>.json``
+    (payloads + metadata) as written by ``embedded_data_to_vector.py`` with LOCAL_INDEX_PATH.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.path = settings.local_index_path
+        self.vectors: np.ndarray | None = None
+        self.payloads: list[dict[str, Any]] = []
+        self.prices: np.ndarray | None = None
+        if self.path:
+            try:
+                self._load(self.path)
+                print(f"[LocalIndex] Loaded {len(self.payloads)} vectors (dim {self.vectors.shape[1]}) from {self.path}")
+            except Exception as e:
+                print(f"[LocalIndex] Failed to load index from {self.path}: {e}")
+                self.vectors = None
+        if self.vectors is not None:
+            self._init_query_embeddings(settings)
+            if self.embedding_cache is None:
+                print("[LocalIndex] No query embedder configured (RAG_QUERY_EMBEDDER), index disabled")
+
+    def _load(self, path: str) -> None:
+        vectors = np.load(f"{path}.npy", mmap_mode="r")
+        if vectors.dtype != np.float32 or vectors.ndim != 2:
+            raise ValueError(f"expected a 2-D float32 matrix, got {vectors.dtype} {vectors.shape}")
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        payloads = meta["payloads"]
+        if len(payloads) != vectors.shape[0]:
+            raise ValueError(f"{len(payloads)} payloads for {vectors.shape[0]} vectors")
+        self.vectors = vectors
+        self.payloads = payloads
+        # NaN for missing prices: every comparison is False, so price filters exclude them like Qdrant does
+        self.prices = np.array(
+            [p.get("current_price") if p.get("current_price") is not None else np.nan for p in payloads],
+            dtype=np.float64,
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.vectors is not None and self.embedding_cache is not None
+
+    def _price_mask(self, min_price: float | None, max_price: float | None) -> np.ndarray | None:
+        if min_price is None and max_price is None:
+            return None
+        mask = np.ones(len(self.prices), dtype=bool)
+        if min_price is not None:
+            mask &= self.prices >= min_price
+        if max_price is not None:
+            mask &= self.prices <= max_price
+        return mask
+
+    def search_by_vector(
+        self,
+        vector: np.ndarray,
+        *,
+        limit: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Exact top-k by cosine similarity (rows are pre-normalized)."""
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.vectors @ query
+
+        mask = self._price_mask(min_price, max_price)
+        candidates = len(scores)
+        if mask is not None:
+            candidates = int(mask.sum())
+            scores = np.where(mask, scores, -np.inf)
+        k = min(limit, candidates)
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [payload_to_product(self.payloads[i], float(scores[i])) for i in top]
+
+    def search_products(
+        self,
+        query_text: str,
+        *,
+        limit: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+    ) -> list[dict[str, Any]]:
+        if not self.available:
+            return []
+        if not query_text or not query_text.strip():
+            print("[LocalIndex] Empty query text, skipping search")
+            return []
+
+        try:
+            vector = self._query_vector(query_text.strip())
+            if vector is None:
+                return []
+            products = self.search_by_vector(vector, limit=limit, min_price=min_price, max_price=max_price)
+            print(f"[LocalIndex] Found {len(products)} products for query: {query_text}")
+            return products
+        except Exception as e:
+            print(f"[LocalIndex] Error searching: {e}")
+            return []
+
+    async def asearch_products(
+        self,
+        query_text: str,
+        *,
+        limit: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Async variant of search_products; only the query embedding is awaited."""
+        if not self.available:
+            return []
+        if not query_text or not query_text.strip():
+            print("[LocalIndex] Empty query text, skipping search")
+            return []
+
+        try:
+            vector = await self._aquery_vector(query_text.strip())
+            if vector is None:
+                return []
+            if len(self.payloads) > _INLINE_SEARCH_ROWS:
+                products = await asyncio.to_thread(
+                    self.search_by_vector, vector, limit=limit, min_price=min_price, max_price=max_price
+                )
+            else:
+                products = self.search_by_vector(vector, limit=limit, min_price=min_price, max_price=max_price)
+            print(f"[LocalIndex] Found {len(products)} products for query: {query_text}")
+            return products
+        except Exception as e:
+            print(f"[LocalIndex] Error searching: {e}")
+            return []
+
+    def search_products_batch(
+        self,
+        queries: list[str],
+        *,
+        limit: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        rrf_k: int = 60,
+    ) -> list[dict[str, Any]]:
+        """Several phrasings in one batched embedding call, fused with RRF (see QdrantRAG)."""
+        queries = unique_queries(queries)
+        if not self.available or not queries:
+            return []
+
+        try:
+            vectors = self._query_vectors(queries)
+            if vectors is None:
+                return []
+            ranked_lists = [
+                self.search_by_vector(vector, limit=limit, min_price=min_price, max_price=max_price)
+                for vector in vectors
+            ]
+            return fuse_query_results(queries, ranked_lists, limit=limit, rrf_k=rrf_k)
+        except Exception as e:
+            print(f"[LocalIndex] Error in batch search: {e}")
+            return []
+
+    async def asearch_products_batch(
+        self,
+        queries: list[str],
+        *,
+        limit: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        rrf_k: int = 60,
+    ) -> list[dict[str, Any]]:
+        """Async variant of search_products_batch."""
+        queries = unique_queries(queries)
+        if not self.available or not queries:
+            return []
+
+        try:
+            vectors = await self._aquery_vectors(queries)
+            if vectors is None:
+                return []
+            ranked_lists = [
+                self.search_by_vector(vector, limit=limit, min_price=min_price, max_price=max_price)
+                for vector in vectors
+            ]
+            return fuse_query_results(queries, ranked_lists, limit=limit, rrf_k=rrf_k)
+        except Exception as e:
+            print(f"[LocalIndex] Error in batch search: {e}")
+            return []
@@ -1,17 +1,122 @@
-from collections import defaultdict, deque
+import threading
+import time
+from collections import OrderedDict, deque
 from typing import Deque
 
 
+class _Session:
+    __slots__ = ("turns", "bytes", "last_access")
+
+    def __init__(self, max_turns: int) -> None:
+        self.turns: Deque[str] = deque(maxlen=max_turns)
+        self.bytes = 0
+        self.last_access = time.monotonic()
+
+
 class ConversationMemory:
-    def __init__(self, max_turns: int = 10) -> None:
-        self._storage: dict[str, Deque[str]] = defaultdict(lambda: deque(maxlen=max_turns))
+    """
+    Per-worker short-term history, bounded by session count, total bytes and idle TTL.
+    Sessions are kept in last-access order so eviction and expiry pop from the front.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 10,
+        max_sessions: int = 10000,
+        idle_ttl: float = 3600,
+        max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self._storage: OrderedDict[str, _Session] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    @staticmethod
+    def _sizeof(text: str) -> int:
+        return len(text.encode("utf-8"))
+
+    def _drop(self, session_id: str) -> None:
+        session = self._storage.pop(session_id)
+        self._bytes -= session.bytes + self._sizeof(session_id)
+
+    def _expire_idle(self, now: float) -> None:
+        while self._storage:
+            session_id, session = next(iter(self._storage.items()))
+            if now - session.last_access < self.idle_ttl:
+                break
+            self._drop(session_id)
+            self.expired += 1
+
+    def _evict_over_budget(self, keep: str) -> None:
+        while len(self._storage) > 1 and (
+            len(self._storage) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            session_id = next(iter(self._storage))
+            if session_id == keep:
+                break
+            self._drop(session_id)
+            self.evicted += 1
 
     def append(self, session_id: str, role: str, content: str) -> None:
-        self._storage[session_id].append(f"{role}: {content}")
+        line = f"{role}: {content}"
+        size = self._sizeof(line)
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            session = self._storage.get(session_id)
+            if session is None:
+                session = _Session(self.max_turns)
+                self._storage[session_id] = session
+                self._bytes += self._sizeof(session_id)
+            else:
+                self._storage.move_to_end(session_id)
+            if len(session.turns) == session.turns.maxlen:
+                dropped = self._sizeof(session.turns[0])
+                session.bytes -= dropped
+                self._bytes -= dropped
+            session.turns.append(line)
+            session.bytes += size
+            session.last_access = now
+            self._bytes += size
+            self._evict_over_budget(keep=session_id)
 
     def get_context(self, session_id: str) -> str:
-        return "\n".join(self._storage[session_id])
+        now = time.monotonic()
+        with self._lock:
+            session = self._storage.get(session_id)
+            if session is None:
+                return ""
+            if now - session.last_access >= self.idle_ttl:
+                self._drop(session_id)
+                self.expired += 1
+                return ""
+            session.last_access = now
+            self._storage.move_to_end(session_id)
+            return "\n".join(session.turns)
 
     def reset(self, session_id: str) -> None:
-        if session_id in self._storage:
-            del self._storage[session_id]
+        with self._lock:
+            if session_id in self._storage:
+                self._drop(session_id)
+
+    def session_bytes(self, session_id: str) -> int:
+        with self._lock:
+            session = self._storage.get(session_id)
+            return session.bytes if session else 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._expire_idle(time.monotonic())
+            return {
+                "sessions": len(self._storage),
+                "max_sessions": self.max_sessions,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evicted": self.evicted,
+                "expired": self.expired,
+            }
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+import msgpack
+
+from core.config import Settings
+
+# First byte of a stored entry identifies its format; legacy JSON entries start with "{"
+MSGPACK_MAGIC = 0x01
+ZSTD_MAGIC = 0x02
+
+# Roles are stored as a single-byte msgpack positive fixint; unknown roles fall back to the string
+ROLE_CODES = {"user": 1, "assistant": 2, "system": 3}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+
+def _pack(role: str, content: str, timestamp: int) -> bytes:
+    return msgpack.packb([timestamp, ROLE_CODES.get(role, role), content], use_bin_type=True)
+
+
+def _unpack(payload: bytes) -> dict[str, Any]:
+    timestamp, role, content = msgpack.unpackb(payload, raw=False)
+    return {"role": ROLE_NAMES.get(role, role), "content": content, "timestamp": timestamp}
+
+
+class MessageCodec:
+    """
+    Legacy JSON codec: {"role", "content", "timestamp": ISO string}.
+    decode() understands every format, so switching codecs keeps old history readable.
+    """
+
+    name = "json"
+
+    def __init__(self, zstd_dict: bytes | None = None) -> None:
+        self._zstd_dict = zstd_dict
+        self._local = threading.local()  # zstd (de)compressors are not thread-safe
+
+    def encode(self, role: str, content: str) -> bytes:
+        message = {"role": role, "content": content, "timestamp": datetime.utcnow().isoformat()}
+        return json.dumps(message, ensure_ascii=False).encode("utf-8")
+
+    def _decompressor(self) -> Any:
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            import zstandard
+
+            dict_data = zstandard.ZstdCompressionDict(self._zstd_dict) if self._zstd_dict else None
+            decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+            self._local.decompressor = decompressor
+        return decompressor
+
+    def decode(self, raw: bytes | str) -> dict[str, Any] | None:
+        try:
+            if isinstance(raw, str):
+                raw = raw.encode("utf-8")
+            if not raw:
+                return None
+            marker = raw[0]
+            if marker == MSGPACK_MAGIC:
+                return _unpack(raw[1:])
+            if marker == ZSTD_MAGIC:
+                return _unpack(self._decompressor().decompress(raw[1:]))
+            return json.loads(raw)
+        except Exception:
+            return None
+
+    def decode_all(self, raw_messages: list[bytes]) -> list[dict[str, Any]]:
+        messages = []
+        for raw in raw_messages:
+            message = self.decode(raw)
+            if message is not None:
+                messages.append(message)
+        return messages
+
+
+class MsgpackCodec(MessageCodec):
+    """[epoch seconds, role byte, content] packed with msgpack."""
+
+    name = "msgpack"
+
+    def encode(self, role: str, content: str) -> bytes:
+        return bytes([MSGPACK_MAGIC]) + _pack(role, content, int(time.time()))
+
+
+class ZstdMsgpackCodec(MessageCodec):
+    """msgpack payload compressed with zstd, optionally against a trained dictionary."""
+
+    name = "zstd"
+
+    def __init__(self, zstd_dict: bytes | None = None, level: int = 3) -> None:
+        super().__init__(zstd_dict)
+        self.level = level
+
+    def _compressor(self) -> Any:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            import zstandard
+
+            dict_data = zstandard.ZstdCompressionDict(self._zstd_dict) if self._zstd_dict else None
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data, write_checksum=False)
+            self._local.compressor = compressor
+        return compressor
+
+    def encode(self, role: str, content: str) -> bytes:
+        payload = _pack(role, content, int(time.time()))
+        return bytes([ZSTD_MAGIC]) + self._compressor().compress(payload)
+
+
+def train_zstd_dictionary(messages: list[tuple[str, str]], dict_size: int = 16 * 1024) -> bytes:
+    """Train a zstd dictionary on (role, content) samples, e.g. exported chat history."""
+    import zstandard
+
+    now = int(time.time())
+    samples = [_pack(role, content, now) for role, content in messages]
+    return zstandard.train_dictionary(dict_size, samples).as_bytes()
+
+
+def build_codec(settings: Settings) -> MessageCodec:
+    """Pick the write codec from settings; any codec reads all formats."""
+    # The dictionary is loaded whatever the write codec, so zstd entries stay readable after switching back
+    zstd_dict = None
+    if settings.history_zstd_dict_path:
+        try:
+            with open(settings.history_zstd_dict_path, "rb") as dict_file:
+                zstd_dict = dict_file.read()
+        except OSError as e:
+            print(f"[RedisMemory] Failed to load zstd dictionary: {e}")
+
+    if settings.history_codec == "zstd":
+        try:
+            import zstandard  # noqa: F401
+
+            return ZstdMsgpackCodec(zstd_dict)
+        except ImportError as e:
+            print(f"[RedisMemory] zstd codec unavailable, using msgpack: {e}")
+            return MsgpackCodec(zstd_dict)
+    if settings.history_codec == "msgpack":
+        return MsgpackCodec(zstd_dict)
+    return MessageCodec(zstd_dict)
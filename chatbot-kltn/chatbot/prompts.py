@@ -90,9 +90,11 @@ CONSOLIDATED_ANALYSIS_PROMPT = (
     "     Nếu người dùng tìm cụ thể, query là 'Khách tìm gạo ST25 loại 5kg'.\n"
     "   - Giá (min_price, max_price): Nếu có đề cập ngân sách (ví dụ: 'dưới 50k', 'khoảng 100 nghìn'), hãy parse ra số float. Nếu không thì null.\n"
     "\n"
-    "3. CONTEXT (Ngữ cảnh): Tóm tắt ngắn gọn (1-2 câu) nội dung chính của hội thoại đến thời điểm hiện tại để lưu làm memory.\n"
+    "3. CONTEXT (Ngữ cảnh): Cập nhật bản tóm tắt hội thoại: gộp Conversation Summary trước đó (nếu có) với Recent Messages và Current Message "
+    "thành 1-3 câu ngắn gọn (giữ lại sản phẩm, ngân sách, sở thích của khách). Bản tóm tắt này được lưu làm memory và thay cho lịch sử cũ ở lượt sau.\n"
     "\n"
     "Input:\n"
+    "- Conversation Summary:\n{summary}\n"
     "- Recent Messages:\n{history}\n"
     "- Current Message: {message}\n"
     "\n"
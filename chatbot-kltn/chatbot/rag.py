@@ -1,32 +1,224 @@
+import asyncio
+import time
 from typing import Any
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, Range
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Filter, FieldCondition, QuantizationSearchParams, Range, SearchParams
 
+from chatbot.api_metrics import get_metrics
+from chatbot.embedding_cache import QueryEmbeddingCache
+from chatbot.embeddings import build_rag_embedder
+from chatbot.fusion import product_key, reciprocal_rank_fusion
 from core.config import Settings
 
 
-class QdrantRAG:
+class QueryVectorMixin:
+    """Client-side query embeddings with a cache, shared by the vector retrieval backends."""
+
+    embedder: Any = None
+    embedding_cache: QueryEmbeddingCache | None = None
+
+    def _init_query_embeddings(self, settings: Settings) -> None:
+        # Client-side query embeddings let repeated queries skip embedding entirely
+        self.embedder = build_rag_embedder(settings)
+        self.embedding_cache = (
+            QueryEmbeddingCache(settings, self.embedder.model_name)
+            if self.embedder is not None and self.embedder.available
+            else None
+        )
+
+    @property
+    def batches_queries(self) -> bool:
+        """Several phrasings per search need client-side vectors; text queries cannot be batched."""
+        return self.embedding_cache is not None
+
+    def _query_vector(self, query_text: str) -> np.ndarray | None:
+        if self.embedding_cache is None:
+            return None
+        vector = self.embedding_cache.get(query_text)
+        if vector is not None:
+            return vector
+        try:
+            start = time.perf_counter()
+            vector = self.embedder.embed_one(query_text)
+            get_metrics().log_query_embedding(time.perf_counter() - start)
+            self.embedding_cache.set(query_text, vector)
+            return vector
+        except Exception as e:
+            print(f"[RAG] Error embedding query: {e}")
+            return None
+
+    async def _aquery_vector(self, query_text: str) -> np.ndarray | None:
+        if self.embedding_cache is None:
+            return None
+        vector = await self.embedding_cache.aget(query_text)
+        if vector is not None:
+            return vector
+        try:
+            start = time.perf_counter()
+            if hasattr(self.embedder, "aembed_one"):
+                vector = await self.embedder.aembed_one(query_text)
+            else:
+                # Local ONNX inference is CPU-bound; keep it off the event loop
+                vector = await asyncio.to_thread(self.embedder.embed_one, query_text)
+            get_metrics().log_query_embedding(time.perf_counter() - start)
+            await self.embedding_cache.aset(query_text, vector)
+            return vector
+        except Exception as e:
+            print(f"[RAG] Error embedding query: {e}")
+            return None
+
+
+    def _query_vectors(self, texts: list[str]) -> list[np.ndarray] | None:
+        """Vectors for several queries: cache hits plus one batched embedding call for the misses."""
+        if self.embedding_cache is None:
+            return None
+        vectors = self.embedding_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            try:
+                start = time.perf_counter()
+                embedded = self.embedder.embed([texts[i] for i in missing])
+                get_metrics().log_query_embedding(time.perf_counter() - start)
+            except Exception as e:
+                print(f"[RAG] Error embedding queries: {e}")
+                return None
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+            self.embedding_cache.set_many([texts[i] for i in missing], list(embedded))
+        return vectors
+
+    async def _aquery_vectors(self, texts: list[str]) -> list[np.ndarray] | None:
+        if self.embedding_cache is None:
+            return None
+        vectors = await self.embedding_cache.aget_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            try:
+                start = time.perf_counter()
+                pending = [texts[i] for i in missing]
+                if hasattr(self.embedder, "aembed"):
+                    embedded = await self.embedder.aembed(pending)
+                else:
+                    embedded = await asyncio.to_thread(self.embedder.embed, pending)
+                get_metrics().log_query_embedding(time.perf_counter() - start)
+            except Exception as e:
+                print(f"[RAG] Error embedding queries: {e}")
+                return None
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+            await self.embedding_cache.aset_many(pending, list(embedded))
+        return vectors
+
+
+def unique_queries(queries: list[str]) -> list[str]:
+    """Drop empty and duplicate (case/whitespace-insensitive) queries, keeping order."""
+    seen: set[str] = set()
+    unique = []
+    for query in queries:
+        normalized = " ".join((query or "").lower().split())
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            unique.append(query.strip())
+    return unique
+
+
+def fuse_query_results(
+    queries: list[str], ranked_lists: list[list[dict[str, Any]]], *, limit: int, rrf_k: int
+) -> list[dict[str, Any]]:
+    """RRF across the per-query lists; ``score`` keeps the best similarity seen for each product."""
+    best: dict[str, float] = {}
+    for products in ranked_lists:
+        for product in products:
+            if product.get("score") is not None:
+                key = product_key(product)
+                best[key] = max(best.get(key, product["score"]), product["score"])
+    fused = reciprocal_rank_fusion(dict(zip(queries, ranked_lists)), k=rrf_k, limit=limit)
+    for product in fused:
+        product.pop("sources", None)
+        product["score"] = best.get(product_key(product), product.get("score"))
+    return fused
+
+
+def payload_to_product(payload: dict[str, Any], score: float | None) -> dict[str, Any]:
+    return {
+        "product_id": payload.get("product_id"),
+        "product_code": payload.get("product_code"),
+        "product_name": payload.get("product_name") or payload.get("title"),
+        "price": payload.get("current_price", 0),
+        "price_text": payload.get("current_price_text"),
+        "unit": payload.get("unit"),
+        "product_url": payload.get("product_url"),
+        "image_url": payload.get("image_url"),
+        "score": score,
+    }
+
+
+class QdrantRAG(QueryVectorMixin):
     def __init__(self, settings: Settings) -> None:
         self.url = settings.qdrant_url
         self.api_key = settings.qdrant_api_key
         self.collection = settings.qdrant_collection
+        # Ignored by collections without quantization
+        self.search_params = SearchParams(
+            hnsw_ef=settings.qdrant_hnsw_ef,
+            quantization=QuantizationSearchParams(
+                rescore=settings.qdrant_quantization_rescore,
+                oversampling=settings.qdrant_quantization_oversampling,
+            ),
+        )
         self.client: QdrantClient | None = None
+        self.async_client: AsyncQdrantClient | None = None
         if self.url:
             try:
                 self.client = QdrantClient(
                     url=self.url,
                     api_key=self.api_key if self.api_key else None,
                 )
+                self.async_client = AsyncQdrantClient(
+                    url=self.url,
+                    api_key=self.api_key if self.api_key else None,
+                )
                 print(f"[RAG] Connected to Qdrant at {self.url}, collection: {self.collection}")
             except Exception as e:
                 print(f"[RAG] Failed to connect to Qdrant: {e}")
                 self.client = None
+                self.async_client = None
+        if self.client is not None:
+            self._init_query_embeddings(settings)
+            if not self.batches_queries and settings.hybrid_rag_max_queries > 1:
+                print("[RAG] No client-side query embedder (RAG_QUERY_EMBEDDER), hybrid search sends one phrasing per turn")
 
     @property
     def available(self) -> bool:
         return self.client is not None
 
+    @staticmethod
+    def _build_filter(min_price: float | None, max_price: float | None) -> Filter | None:
+        filters = []
+        if min_price is not None or max_price is not None:
+            price_filter = {}
+            if min_price is not None:
+                price_filter["gte"] = min_price
+            if max_price is not None:
+                price_filter["lte"] = max_price
+            filters.append(
+                FieldCondition(
+                    key="current_price",
+                    range=Range(**price_filter),
+                )
+            )
+        return Filter(must=filters) if filters else None
+
+    @staticmethod
+    def _to_products(results: Any) -> list[dict[str, Any]]:
+        products = []
+        for point in results.points:
+            if point.payload:
+                products.append(payload_to_product(point.payload, point.score))
+        return products
+
     def search_products(
         self,
         query_text: str,
@@ -39,73 +231,219 @@ class QdrantRAG:
             return []
 
         try:
-            filters = []
-            if min_price is not None or max_price is not None:
-                price_filter = {}
-                if min_price is not None:
-                    price_filter["gte"] = min_price
-                if max_price is not None:
-                    price_filter["lte"] = max_price
-                filters.append(
-                    FieldCondition(
-                        key="current_price",
-                        range=Range(**price_filter),
+            search_filter = self._build_filter(min_price, max_price)
+
+            if not query_text or not query_text.strip():
+                print("[RAG] Empty query text, skipping Qdrant search")
+                return []
+
+            query_text_clean = query_text.strip()
+
+            results = None
+            vector = self._query_vector(query_text_clean)
+            if vector is not None:
+                try:
+                    results = self.client.query_points(
+                        collection_name=self.collection,
+                        query=vector.tolist(),
+                        limit=limit,
+                        query_filter=search_filter,
+                        search_params=self.search_params,
+                        with_payload=True,
                     )
-                )
+                except Exception as e:
+                    print(f"[RAG] Error querying by vector: {e}, falling back to text query")
 
-            search_filter = Filter(must=filters) if filters else None
+            if results is None:
+                try:
+                    from qdrant_client.models import QueryRequest, Query
+                    query_req = QueryRequest(
+                        query=Query(text=query_text_clean),
+                        limit=limit,
+                        filter=search_filter,
+                    )
+                    results = self.client.query(
+                        collection_name=self.collection,
+                        query_request=query_req,
+                    )
+                except Exception as e:
+                    print(f"[RAG] Error with QueryRequest: {e}")
+                    try:
+                        results = self.client.query(
+                            collection_name=self.collection,
+                            query_text=query_text_clean,
+                            limit=limit,
+                            query_filter=search_filter,
+                        )
+                    except Exception as e2:
+                        print(f"[RAG] Error with query_text: {e2}, falling back to SQL")
+                        return []
+
+            products = self._to_products(results)
+            print(f"[RAG] Found {len(products)} products for query: {query_text}")
+            return products
+        except Exception as e:
+            print(f"[RAG] Error searching Qdrant: {e}")
+            return []
+
+    def _batch_requests(self, vectors: list[np.ndarray], limit: int, search_filter: Filter | None) -> list[Any]:
+        from qdrant_client.models import QueryRequest
+
+        return [
+            QueryRequest(
+                query=vector.tolist(), filter=search_filter, params=self.search_params, limit=limit, with_payload=True
+            )
+            for vector in vectors
+        ]
+
+    def search_products_batch(
+        self,
+        queries: list[str],
+        *,
+        limit: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        rrf_k: int = 60,
+    ) -> list[dict[str, Any]]:
+        """
+        Search several phrasings (query summary, keywords, synonyms) at once:
+        one batched embedding call and one ``query_batch_points`` round trip,
+        fused with RRF and deduplicated.
+        """
+        queries = unique_queries(queries)
+        if not self.available or not queries:
+            return []
+        if len(queries) == 1:
+            return self.search_products(queries[0], limit=limit, min_price=min_price, max_price=max_price)
+
+        vectors = self._query_vectors(queries)
+        if vectors is None:
+            # Text queries cannot be batched; keep the primary phrasing only
+            print(f"[RAG] No query vectors, searching the primary phrasing only of {len(queries)}")
+            return self.search_products(queries[0], limit=limit, min_price=min_price, max_price=max_price)
+
+        try:
+            responses = self.client.query_batch_points(
+                collection_name=self.collection,
+                requests=self._batch_requests(vectors, limit, self._build_filter(min_price, max_price)),
+            )
+            products = fuse_query_results(
+                queries, [self._to_products(response) for response in responses], limit=limit, rrf_k=rrf_k
+            )
+            print(f"[RAG] Found {len(products)} products for {len(queries)} queries: {queries}")
+            return products
+        except Exception as e:
+            print(f"[RAG] Error in batch search: {e}")
+            return []
+
+    async def asearch_products_batch(
+        self,
+        queries: list[str],
+        *,
+        limit: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        rrf_k: int = 60,
+    ) -> list[dict[str, Any]]:
+        """Async variant of search_products_batch."""
+        queries = unique_queries(queries)
+        if self.async_client is None or not queries:
+            return []
+        if len(queries) == 1:
+            return await self.asearch_products(queries[0], limit=limit, min_price=min_price, max_price=max_price)
+
+        vectors = await self._aquery_vectors(queries)
+        if vectors is None:
+            print(f"[RAG] No query vectors, searching the primary phrasing only of {len(queries)}")
+            return await self.asearch_products(queries[0], limit=limit, min_price=min_price, max_price=max_price)
+
+        try:
+            responses = await self.async_client.query_batch_points(
+                collection_name=self.collection,
+                requests=self._batch_requests(vectors, limit, self._build_filter(min_price, max_price)),
+            )
+            products = fuse_query_results(
+                queries, [self._to_products(response) for response in responses], limit=limit, rrf_k=rrf_k
+            )
+            print(f"[RAG] Found {len(products)} products for {len(queries)} queries: {queries}")
+            return products
+        except Exception as e:
+            print(f"[RAG] Error in batch search: {e}")
+            return []
+
+    async def asearch_products(
+        self,
+        query_text: str,
+        *,
+        limit: int = 5,
+        min_price: float | None = None,
+        max_price: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Async variant of search_products backed by AsyncQdrantClient."""
+        if self.async_client is None:
+            return []
+
+        try:
+            search_filter = self._build_filter(min_price, max_price)
 
             if not query_text or not query_text.strip():
                 print("[RAG] Empty query text, skipping Qdrant search")
                 return []
 
             query_text_clean = query_text.strip()
-            
-            try:
-                from qdrant_client.models import QueryRequest, Query
-                query_req = QueryRequest(
-                    query=Query(text=query_text_clean),
-                    limit=limit,
-                    filter=search_filter,
-                )
-                results = self.client.query(
-                    collection_name=self.collection,
-                    query_request=query_req,
-                )
-            except Exception as e:
-                print(f"[RAG] Error with QueryRequest: {e}")
+
+            results = None
+            vector = await self._aquery_vector(query_text_clean)
+            if vector is not None:
                 try:
-                    results = self.client.query(
+                    results = await self.async_client.query_points(
                         collection_name=self.collection,
-                        query_text=query_text_clean,
+                        query=vector.tolist(),
                         limit=limit,
                         query_filter=search_filter,
+                        search_params=self.search_params,
+                        with_payload=True,
                     )
-                except Exception as e2:
-                    print(f"[RAG] Error with query_text: {e2}, falling back to SQL")
-                    return []
-
-            products = []
-            for point in results.points:
-                payload = point.payload
-                if payload:
-                    products.append(
-                        {
-                            "product_id": payload.get("product_id"),
-                            "product_code": payload.get("product_code"),
-                            "product_name": payload.get("product_name") or payload.get("title"),
-                            "price": payload.get("current_price", 0),
-                            "price_text": payload.get("current_price_text"),
-                            "unit": payload.get("unit"),
-                            "product_url": payload.get("product_url"),
-                            "image_url": payload.get("image_url"),
-                            "score": point.score,
-                        }
+                except Exception as e:
+                    print(f"[RAG] Error querying by vector: {e}, falling back to text query")
+
+            if results is None:
+                try:
+                    from qdrant_client.models import QueryRequest, Query
+                    query_req = QueryRequest(
+                        query=Query(text=query_text_clean),
+                        limit=limit,
+                        filter=search_filter,
+                    )
+                    results = await self.async_client.query(
+                        collection_name=self.collection,
+                        query_request=query_req,
                     )
+                except Exception as e:
+                    print(f"[RAG] Error with QueryRequest: {e}")
+                    try:
+                        results = await self.async_client.query(
+                            collection_name=self.collection,
+                            query_text=query_text_clean,
+                            limit=limit,
+                            query_filter=search_filter,
+                        )
+                    except Exception as e2:
+                        print(f"[RAG] Error with query_text: {e2}, falling back to SQL")
+                        return []
 
+            products = self._to_products(results)
             print(f"[RAG] Found {len(products)} products for query: {query_text}")
             return products
         except Exception as e:
             print(f"[RAG] Error searching Qdrant: {e}")
             return []
 
+
+def build_retriever(settings: Settings) -> Any:
+    """Semantic retrieval backend selected by RAG_BACKEND ("qdrant" or "local")."""
+    if settings.rag_backend == "local":
+        from chatbot.local_index import LocalVectorIndex
+
+        return LocalVectorIndex(settings)
+    return QdrantRAG(settings)
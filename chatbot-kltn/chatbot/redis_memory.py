@@ -1,21 +1,27 @@
-import json
 from typing import Any
 
 import redis
+import redis.asyncio as aioredis
 
+from chatbot.message_codec import build_codec
 from core.config import Settings
 
 
 class RedisConversationMemory:
     def __init__(self, settings: Settings) -> None:
         self.redis_client: redis.Redis | None = None
+        self.async_client: aioredis.Redis | None = None
+        self.codec = build_codec(settings)
         if settings.redis_url:
             try:
-                self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                # Raw bytes: history entries may be msgpack/zstd rather than text
+                self.redis_client = redis.from_url(settings.redis_url)
+                self.async_client = aioredis.from_url(settings.redis_url)
                 print(f"[RedisMemory] Connected to Redis at {settings.redis_url}")
             except Exception as e:
                 print(f"[RedisMemory] Failed to connect to Redis: {e}")
                 self.redis_client = None
+                self.async_client = None
 
     @property
     def available(self) -> bool:
@@ -28,57 +34,197 @@ class RedisConversationMemory:
         """Key for user-based chat history (persistent across sessions)."""
         return f"chatbot:user:{user_id}:messages"
 
+    def _history_key(self, session_id: str, user_id: int | None) -> str:
+        # Use user key if logged in, otherwise use session key
+        return self._user_key(user_id) if user_id else self._key(session_id)
+
+    def _summary_key(self, session_id: str, user_id: int | None) -> str:
+        """Rolling conversation summary, scoped like the history it summarizes."""
+        return f"chatbot:user:{user_id}:summary" if user_id else f"chatbot:session:{session_id}:summary"
+
+    @staticmethod
+    def _history_ttl(user_id: int | None) -> int:
+        return 86400 * 30 if user_id else 86400 * 7
+
+    def _encode(self, role: str, content: str) -> bytes:
+        return self.codec.encode(role, content)
+
+    def _decode_all(self, raw_messages: list[bytes]) -> list[dict[str, Any]]:
+        return self.codec.decode_all(raw_messages)
+
+    def _queue_push(self, pipe: Any, session_id: str, encoded: list[str], user_id: int | None) -> None:
+        """Queue LPUSH/LTRIM/EXPIRE for the session key (and user key when logged in)."""
+        # Save to session key
+        key = self._key(session_id)
+        pipe.lpush(key, *encoded)
+        pipe.ltrim(key, 0, 49)
+        pipe.expire(key, self._history_ttl(None))
+
+        # Also save to user key if user is logged in (persistent history)
+        if user_id:
+            user_key = self._user_key(user_id)
+            pipe.lpush(user_key, *encoded)
+            pipe.ltrim(user_key, 0, 99)  # Keep more history for users
+            pipe.expire(user_key, self._history_ttl(user_id))  # 30 days for logged-in users
+
+    def _queue_summary(self, pipe: Any, session_id: str, user_id: int | None, summary: str | None) -> None:
+        """Store the turn's summary, or keep the previous one alive as long as the history it summarizes."""
+        key = self._summary_key(session_id, user_id)
+        if isinstance(summary, str) and summary.strip():
+            pipe.set(key, summary.strip(), ex=self._history_ttl(user_id))
+        else:
+            pipe.expire(key, self._history_ttl(user_id))
+
+    @staticmethod
+    def _log_saved(session_id: str, user_id: int | None, roles: str) -> None:
+        if user_id:
+            print(f"[RedisMemory] Saved message for user {user_id}: {roles}")
+        else:
+            print(f"[RedisMemory] Saved message for session {session_id}: {roles}")
+
     def append(self, session_id: str, role: str, content: str, user_id: int | None = None) -> None:
         if not self.available:
             return
 
         try:
-            message = {"role": role, "content": content, "timestamp": self._get_timestamp()}
-            
-            # Save to session key
-            key = self._key(session_id)
-            self.redis_client.lpush(key, json.dumps(message, ensure_ascii=False))
-            self.redis_client.ltrim(key, 0, 49)
-            self.redis_client.expire(key, 86400 * 7)
-            
-            # Also save to user key if user is logged in (persistent history)
-            if user_id:
-                user_key = self._user_key(user_id)
-                self.redis_client.lpush(user_key, json.dumps(message, ensure_ascii=False))
-                self.redis_client.ltrim(user_key, 0, 99)  # Keep more history for users
-                self.redis_client.expire(user_key, 86400 * 30)  # 30 days for logged-in users
-                print(f"[RedisMemory] Saved message for user {user_id}: {role}")
-            else:
-                print(f"[RedisMemory] Saved message for session {session_id}: {role}")
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_push(pipe, session_id, [self._encode(role, content)], user_id)
+            pipe.execute()
+            self._log_saved(session_id, user_id, role)
         except Exception as e:
             print(f"[RedisMemory] Error saving message: {e}")
 
+    async def aappend(self, session_id: str, role: str, content: str, user_id: int | None = None) -> None:
+        """Async variant of append using the redis.asyncio client."""
+        if self.async_client is None:
+            return
+
+        try:
+            pipe = self.async_client.pipeline(transaction=False)
+            self._queue_push(pipe, session_id, [self._encode(role, content)], user_id)
+            await pipe.execute()
+            self._log_saved(session_id, user_id, role)
+        except Exception as e:
+            print(f"[RedisMemory] Error saving message: {e}")
+
+    def append_turn(
+        self,
+        session_id: str,
+        user_message: str,
+        reply: str,
+        user_id: int | None = None,
+        summary: str | None = None,
+    ) -> None:
+        """Save a user message, the assistant reply and the updated rolling summary in a single round trip."""
+        if not self.available:
+            return
+
+        try:
+            encoded = [self._encode("user", user_message), self._encode("assistant", reply)]
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_push(pipe, session_id, encoded, user_id)
+            self._queue_summary(pipe, session_id, user_id, summary)
+            pipe.execute()
+            self._log_saved(session_id, user_id, "user+assistant")
+        except Exception as e:
+            print(f"[RedisMemory] Error saving turn: {e}")
+
+    async def aappend_turn(
+        self,
+        session_id: str,
+        user_message: str,
+        reply: str,
+        user_id: int | None = None,
+        summary: str | None = None,
+    ) -> None:
+        """Async variant of append_turn."""
+        if self.async_client is None:
+            return
+
+        try:
+            encoded = [self._encode("user", user_message), self._encode("assistant", reply)]
+            pipe = self.async_client.pipeline(transaction=False)
+            self._queue_push(pipe, session_id, encoded, user_id)
+            self._queue_summary(pipe, session_id, user_id, summary)
+            await pipe.execute()
+            self._log_saved(session_id, user_id, "user+assistant")
+        except Exception as e:
+            print(f"[RedisMemory] Error saving turn: {e}")
+
     def get_recent_messages(self, session_id: str, limit: int = 5, user_id: int | None = None) -> list[dict[str, Any]]:
         if not self.available:
             return []
 
         try:
-            # Use user key if logged in, otherwise use session key
             if user_id:
-                key = self._user_key(user_id)
                 print(f"[RedisMemory] Retrieving messages for user {user_id}")
-            else:
-                key = self._key(session_id)
+            key = self._history_key(session_id, user_id)
             
             raw_messages = self.redis_client.lrange(key, 0, limit - 1)
-            messages = []
-            for raw_msg in raw_messages:
-                try:
-                    msg = json.loads(raw_msg)
-                    messages.append(msg)
-                except json.JSONDecodeError:
-                    continue
+            messages = self._decode_all(raw_messages)
             print(f"[RedisMemory] Retrieved {len(messages)} recent messages")
             return messages
         except Exception as e:
             print(f"[RedisMemory] Error retrieving messages: {e}")
             return []
 
+    async def aget_recent_messages(
+        self, session_id: str, limit: int = 5, user_id: int | None = None
+    ) -> list[dict[str, Any]]:
+        """Async variant of get_recent_messages."""
+        if self.async_client is None:
+            return []
+
+        try:
+            key = self._history_key(session_id, user_id)
+            raw_messages = await self.async_client.lrange(key, 0, limit - 1)
+            messages = self._decode_all(raw_messages)
+            print(f"[RedisMemory] Retrieved {len(messages)} recent messages")
+            return messages
+        except Exception as e:
+            print(f"[RedisMemory] Error retrieving messages: {e}")
+            return []
+
+    def get_history(
+        self, session_id: str, limit: int = 5, user_id: int | None = None
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Recent messages plus the stored rolling summary, fetched in one round trip."""
+        if not self.available:
+            return [], None
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.lrange(self._history_key(session_id, user_id), 0, limit - 1)
+            pipe.get(self._summary_key(session_id, user_id))
+            raw_messages, raw_summary = pipe.execute()
+            messages = self._decode_all(raw_messages)
+            summary = raw_summary.decode("utf-8") if raw_summary else None
+            print(f"[RedisMemory] Retrieved {len(messages)} recent messages, summary={'yes' if summary else 'no'}")
+            return messages, summary
+        except Exception as e:
+            print(f"[RedisMemory] Error retrieving history: {e}")
+            return [], None
+
+    async def aget_history(
+        self, session_id: str, limit: int = 5, user_id: int | None = None
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Async variant of get_history."""
+        if self.async_client is None:
+            return [], None
+
+        try:
+            pipe = self.async_client.pipeline(transaction=False)
+            pipe.lrange(self._history_key(session_id, user_id), 0, limit - 1)
+            pipe.get(self._summary_key(session_id, user_id))
+            raw_messages, raw_summary = await pipe.execute()
+            messages = self._decode_all(raw_messages)
+            summary = raw_summary.decode("utf-8") if raw_summary else None
+            print(f"[RedisMemory] Retrieved {len(messages)} recent messages, summary={'yes' if summary else 'no'}")
+            return messages, summary
+        except Exception as e:
+            print(f"[RedisMemory] Error retrieving history: {e}")
+            return [], None
+
     def get_all_messages(self, session_id: str) -> list[dict[str, Any]]:
         if not self.available:
             return []
@@ -86,14 +232,7 @@ class RedisConversationMemory:
         try:
             key = self._key(session_id)
             raw_messages = self.redis_client.lrange(key, 0, -1)
-            messages = []
-            for raw_msg in raw_messages:
-                try:
-                    msg = json.loads(raw_msg)
-                    messages.append(msg)
-                except json.JSONDecodeError:
-                    continue
-            return messages
+            return self._decode_all(raw_messages)
         except Exception as e:
             print(f"[RedisMemory] Error retrieving all messages: {e}")
             return []
@@ -103,15 +242,7 @@ class RedisConversationMemory:
             return
 
         try:
-            key = self._key(session_id)
-            self.redis_client.delete(key)
+            self.redis_client.delete(self._key(session_id), self._summary_key(session_id, None))
             print(f"[RedisMemory] Cleared messages for session {session_id}")
         except Exception as e:
             print(f"[RedisMemory] Error clearing messages: {e}")
-
-    @staticmethod
-    def _get_timestamp() -> str:
-        from datetime import datetime
-
-        return datetime.utcnow().isoformat()
-
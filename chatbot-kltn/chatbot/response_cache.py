@@ -1,29 +1,127 @@
 import hashlib
 import json
 import re
+import time
 from typing import Any
 
 import redis
+import redis.asyncio as aioredis
 
+from chatbot.local_cache import LocalLRUCache
+from chatbot.semantic_cache import SemanticResponseCache
 from core.config import Settings
 
 
+INVALIDATION_CHANNEL = "chatbot:cache:invalidate"
+# Per-context ZSETs of cache keys scored by expiry time, plus the set of known context types.
+# Kept outside the chatbot:cache:* namespace so cache patterns never match them.
+INDEX_PREFIX = "chatbot:cacheidx"
+INDEX_TYPES_KEY = f"{INDEX_PREFIX}:types"
+UNLINK_BATCH = 500
+# Reconnect backoff of the invalidation listener (seconds)
+LISTENER_MIN_BACKOFF = 0.5
+LISTENER_MAX_BACKOFF = 30.0
+
+
 class ResponseCache:
     """Cache for LLM responses to reduce token usage on repeated queries."""
     
     def __init__(self, settings: Settings) -> None:
+        # L1: per-worker LRU in front of Redis, kept coherent through pub/sub invalidation
+        self.l1 = LocalLRUCache(settings.l1_cache_max_entries, settings.l1_cache_max_bytes)
+        self.l1_default_ttl = settings.l1_cache_default_ttl
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self._invalidation_thread = None
+        self._listener_backoff = LISTENER_MIN_BACKOFF
+        # Index patterns already swept for keys written before the index existed
+        self._legacy_swept: set[str] = set()
         self.redis_client: redis.Redis | None = None
+        self.async_client: aioredis.Redis | None = None
         if settings.redis_url:
             try:
                 self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+                self.async_client = aioredis.from_url(settings.redis_url, decode_responses=True)
                 print(f"[ResponseCache] Connected to Redis at {settings.redis_url}")
             except Exception as e:
                 print(f"[ResponseCache] Failed to connect to Redis: {e}")
                 self.redis_client = None
+                self.async_client = None
+        # Embedding-similarity tier consulted after an exact-key miss
+        self.semantic = SemanticResponseCache(settings)
+        self._subscribe_invalidations()
     
     @property
     def available(self) -> bool:
         return self.redis_client is not None
+
+    def _subscribe_invalidations(self) -> None:
+        if not self.available:
+            return
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation})
+            self._invalidation_thread = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=self._on_invalidation_error
+            )
+        except Exception as e:
+            # Without the feed L1 would serve entries other workers invalidated
+            self.l1.disable()
+            print(f"[ResponseCache] Invalidation listener unavailable, L1 disabled: {e}")
+
+    def _on_invalidation(self, message: dict) -> None:
+        self._apply_invalidation(message.get("data") or "")
+
+    def _on_invalidation_error(self, error: Exception, pubsub: Any, thread: Any) -> None:
+        """
+        Runs on the listener thread after a pub/sub failure (e.g. Redis restart).
+        Invalidations may be missed while disconnected, so L1 is cleared and
+        bypassed until the subscription is back; reconnects back off exponentially.
+        """
+        if self.l1.enabled:
+            self.l1.disable()
+            print(f"[ResponseCache] Invalidation listener error, L1 disabled until it reconnects: {error}")
+        time.sleep(self._listener_backoff)
+        try:
+            # Reconnects and resubscribes the channel
+            pubsub.ping()
+        except Exception as e:
+            self._listener_backoff = min(self._listener_backoff * 2, LISTENER_MAX_BACKOFF)
+            print(f"[ResponseCache] Invalidation listener reconnect failed, retrying in {self._listener_backoff:.1f}s: {e}")
+            return
+        self._listener_backoff = LISTENER_MIN_BACKOFF
+        self.l1.enable()
+        print("[ResponseCache] Invalidation listener reconnected, L1 re-enabled")
+
+    def _apply_invalidation(self, pattern: str) -> None:
+        """Clear this worker's L1 and semantic entries for a Redis key pattern."""
+        if not pattern:
+            return
+        removed = self.l1.delete_pattern(pattern)
+        match = re.fullmatch(r"chatbot:cache:(\w+):\*", pattern)
+        if pattern == "chatbot:cache:*":
+            self.semantic.invalidate()
+        elif match:
+            self.semantic.invalidate(match.group(1))
+        print(f"[ResponseCache] Invalidated {removed} L1 entries for {pattern}")
+
+    @staticmethod
+    def _index_key(context_type: str) -> str:
+        return f"{INDEX_PREFIX}:{context_type}"
+
+    def _index_write(self, pipe: Any, cache_key: str, context_type: str, ttl: int) -> None:
+        """Queue index bookkeeping for a cached key; expired members are pruned on the way."""
+        now = time.time()
+        index_key = self._index_key(context_type)
+        pipe.zadd(index_key, {cache_key: now + ttl})
+        pipe.zremrangebyscore(index_key, "-inf", now)
+        pipe.sadd(INDEX_TYPES_KEY, context_type)
+
+    def _l1_ttl(self, pttl: int | None) -> float:
+        # Mirror the remaining Redis TTL so L1 never outlives the Redis entry
+        if pttl is not None and pttl > 0:
+            return pttl / 1000
+        return self.l1_default_ttl
     
     def _normalize_query(self, query: str) -> str:
         """Normalize query for consistent cache keys."""
@@ -62,12 +160,23 @@ class ResponseCache:
         
         try:
             cache_key = self._make_cache_key(query, context_type)
-            cached = self.redis_client.get(cache_key)
+            cached = self.l1.get(cache_key)
+            if cached is not None:
+                print(f"[ResponseCache] L1 HIT for query: {query[:50]}...")
+                return cached
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(cache_key)
+            pipe.pttl(cache_key)
+            cached, pttl = pipe.execute()
             
             if cached:
+                self.redis_hits += 1
+                self.l1.set(cache_key, cached, self._l1_ttl(pttl))
                 print(f"[ResponseCache] Cache HIT for query: {query[:50]}...")
                 return cached
             else:
+                self.redis_misses += 1
                 print(f"[ResponseCache] Cache MISS for query: {query[:50]}...")
                 return None
                 
@@ -75,6 +184,36 @@ class ResponseCache:
             print(f"[ResponseCache] Error retrieving cache: {e}")
             return None
     
+    async def aget_cached_response(self, query: str, context_type: str = "general") -> str | None:
+        """Async variant of get_cached_response."""
+        if self.async_client is None or not query:
+            return None
+
+        try:
+            cache_key = self._make_cache_key(query, context_type)
+            cached = self.l1.get(cache_key)
+            if cached is not None:
+                print(f"[ResponseCache] L1 HIT for query: {query[:50]}...")
+                return cached
+
+            pipe = self.async_client.pipeline(transaction=False)
+            pipe.get(cache_key)
+            pipe.pttl(cache_key)
+            cached, pttl = await pipe.execute()
+
+            if cached:
+                self.redis_hits += 1
+                self.l1.set(cache_key, cached, self._l1_ttl(pttl))
+                print(f"[ResponseCache] Cache HIT for query: {query[:50]}...")
+                return cached
+            self.redis_misses += 1
+            print(f"[ResponseCache] Cache MISS for query: {query[:50]}...")
+            return None
+
+        except Exception as e:
+            print(f"[ResponseCache] Error retrieving cache: {e}")
+            return None
+
     def cache_response(
         self, 
         query: str, 
@@ -88,23 +227,88 @@ class ResponseCache:
         
         try:
             cache_key = self._make_cache_key(query, context_type)
-            self.redis_client.setex(cache_key, ttl, response)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(cache_key, ttl, response)
+            self._index_write(pipe, cache_key, context_type, ttl)
+            pipe.execute()
+            self.l1.set(cache_key, response, ttl)
             print(f"[ResponseCache] Cached response for {cache_key} (TTL: {ttl}s)")
         except Exception as e:
             print(f"[ResponseCache] Error caching response: {e}")
     
+    async def acache_response(
+        self,
+        query: str,
+        response: str,
+        context_type: str = "general",
+        ttl: int = 3600
+    ) -> None:
+        """Async variant of cache_response."""
+        if self.async_client is None or not query or not response:
+            return
+
+        try:
+            cache_key = self._make_cache_key(query, context_type)
+            pipe = self.async_client.pipeline(transaction=False)
+            pipe.setex(cache_key, ttl, response)
+            self._index_write(pipe, cache_key, context_type, ttl)
+            await pipe.execute()
+            self.l1.set(cache_key, response, ttl)
+            print(f"[ResponseCache] Cached response for {cache_key} (TTL: {ttl}s)")
+        except Exception as e:
+            print(f"[ResponseCache] Error caching response: {e}")
+
+    def _unlink_indexed(self, context_type: str) -> int:
+        """Drain one context index in small batches so Redis keeps serving other clients."""
+        index_key = self._index_key(context_type)
+        count = 0
+        while True:
+            popped = self.redis_client.zpopmin(index_key, UNLINK_BATCH)
+            if not popped:
+                break
+            count += self.redis_client.unlink(*[key for key, _ in popped])
+        self.redis_client.srem(INDEX_TYPES_KEY, context_type)
+        return count
+
+    def _unlink_scanned(self, pattern: str) -> int:
+        """Fallback for arbitrary patterns: incremental SCAN + batched UNLINK."""
+        count = 0
+        batch = []
+        for key in self.redis_client.scan_iter(match=pattern, count=UNLINK_BATCH):
+            batch.append(key)
+            if len(batch) >= UNLINK_BATCH:
+                count += self.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            count += self.redis_client.unlink(*batch)
+        return count
+
     def clear_cache_pattern(self, pattern: str = "chatbot:cache:*") -> int:
         """Clear cache entries matching pattern. Returns number of keys deleted."""
+        # Clear this worker now and tell the others to drop their L1 copies
+        self._apply_invalidation(pattern)
         if not self.available:
             return 0
         
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                count = self.redis_client.delete(*keys)
-                print(f"[ResponseCache] Cleared {count} cache entries")
-                return count
-            return 0
+            self.redis_client.publish(INVALIDATION_CHANNEL, pattern)
+            match = re.fullmatch(r"chatbot:cache:(\w+):\*", pattern)
+            if pattern == "chatbot:cache:*":
+                count = sum(
+                    self._unlink_indexed(context_type)
+                    for context_type in self.redis_client.smembers(INDEX_TYPES_KEY)
+                )
+            elif match:
+                count = self._unlink_indexed(match.group(1))
+            else:
+                count = self._unlink_scanned(pattern)
+            if (pattern == "chatbot:cache:*" or match) and pattern not in self._legacy_swept:
+                # Once per process: entries cached before the index existed (or by workers
+                # still on the old code) are not indexed, so sweep the keyspace as well
+                count += self._unlink_scanned(pattern)
+                self._legacy_swept.add(pattern)
+            print(f"[ResponseCache] Cleared {count} cache entries")
+            return count
         except Exception as e:
             print(f"[ResponseCache] Error clearing cache: {e}")
             return 0
@@ -117,21 +321,38 @@ class ResponseCache:
         """Clear cache entries for specific context type (advice/product)."""
         return self.clear_cache_pattern(f"chatbot:cache:{context_type}:*")
     
+    def _tier_stats(self) -> dict:
+        redis_lookups = self.redis_hits + self.redis_misses
+        return {
+            "l1": self.l1.get_stats(),
+            "redis": {
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "hit_rate": f"{(self.redis_hits / redis_lookups * 100) if redis_lookups else 0:.1f}%",
+            },
+        }
+
     def get_stats(self) -> dict:
         """Get cache statistics."""
         if not self.available:
             return {"available": False, "entries": 0}
         
         try:
-            keys = self.redis_client.keys("chatbot:cache:*")
-            advice_keys = [k for k in keys if ":advice:" in k]
-            product_keys = [k for k in keys if ":product:" in k]
+            # ZCOUNT over unexpired scores: O(log N) per context, no keyspace walk
+            now = time.time()
+            context_types = sorted(self.redis_client.smembers(INDEX_TYPES_KEY))
+            pipe = self.redis_client.pipeline(transaction=False)
+            for context_type in context_types:
+                pipe.zcount(self._index_key(context_type), f"({now}", "+inf")
+            counts = dict(zip(context_types, pipe.execute()))
             
             return {
                 "available": True,
-                "total_entries": len(keys),
-                "advice_entries": len(advice_keys),
-                "product_entries": len(product_keys),
+                "total_entries": sum(counts.values()),
+                "advice_entries": counts.get("advice", 0),
+                "product_entries": counts.get("product", 0),
+                "tiers": self._tier_stats(),
+                "semantic": self.semantic.get_stats(),
             }
         except Exception as e:
             print(f"[ResponseCache] Error getting stats: {e}")
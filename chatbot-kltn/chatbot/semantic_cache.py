@@ -0,0 +1,188 @@
+"""
+Semantic tier for ResponseCache: paraphrased queries ("bắp cải có vitamin gì"
+vs "vitamin trong bắp cải") reuse a stored reply when their embeddings are
+close enough. The index is a per-worker NumPy matrix per context type.
+
+Only the context types in ``semantic_cache_context_types`` use the tier
+(advice by default): product replies name the retrieved products and prices,
+so a paraphrase is only reused when its scope (retrieved product keys and the
+numbers in the message) is identical too.
+"""
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from chatbot.embeddings import QueryEmbedder
+from core.config import Settings
+
+
+class _VectorSlots:
+    """Fixed-capacity matrix of normalized query vectors with TTL and LRU bookkeeping."""
+
+    def __init__(self, capacity: int, dimension: int) -> None:
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.expires_at = np.zeros(capacity, dtype=np.float64)  # 0 = empty slot
+        self.last_access = np.zeros(capacity, dtype=np.float64)
+        self.scope_hashes = np.zeros(capacity, dtype=np.int64)
+        self.scopes: list[str | None] = [None] * capacity
+        self.queries: list[str | None] = [None] * capacity
+        self.responses: list[str | None] = [None] * capacity
+
+    def search(self, vector: np.ndarray, scope: str, now: float) -> tuple[int, float]:
+        scores = self.vectors @ vector
+        scores[(self.expires_at <= now) | (self.scope_hashes != hash(scope))] = -np.inf
+        best = int(np.argmax(scores))
+        if self.scopes[best] != scope:
+            return best, -np.inf
+        return best, float(scores[best])
+
+    def free_slot(self, now: float) -> int:
+        expired = np.flatnonzero(self.expires_at <= now)
+        if expired.size:
+            return int(expired[0])
+        return int(np.argmin(self.last_access))  # evict least recently used
+
+    def put(
+        self, slot: int, vector: np.ndarray, scope: str, query: str, response: str, ttl: int, now: float
+    ) -> None:
+        self.vectors[slot] = vector
+        self.scope_hashes[slot] = hash(scope)
+        self.scopes[slot] = scope
+        self.expires_at[slot] = now + ttl
+        self.last_access[slot] = now
+        self.queries[slot] = query
+        self.responses[slot] = response
+
+    def clear(self) -> None:
+        self.expires_at[:] = 0
+        self.scopes = [None] * len(self.scopes)
+        self.queries = [None] * len(self.queries)
+        self.responses = [None] * len(self.responses)
+
+    def size(self, now: float) -> int:
+        return int(np.count_nonzero(self.expires_at > now))
+
+
+class SemanticResponseCache:
+    """Embedding-similarity lookup in front of the LLM, after the exact-key tier misses."""
+
+    def __init__(self, settings: Settings, embedder: QueryEmbedder | None = None) -> None:
+        self.context_types = {
+            name.strip() for name in settings.semantic_cache_context_types.split(",") if name.strip()
+        }
+        self.enabled = settings.semantic_cache_enabled and bool(self.context_types)
+        self.capacity = settings.semantic_cache_max_entries
+        self.thresholds = {
+            "advice": settings.semantic_cache_threshold_advice,
+            "product": settings.semantic_cache_threshold_product,
+        }
+        self.embedder = embedder if embedder is not None else (QueryEmbedder(settings) if self.enabled else None)
+        self._slots: dict[str, _VectorSlots] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self.embedder is not None and self.embedder.available
+
+    def handles(self, context_type: str) -> bool:
+        return self.available and context_type in self.context_types
+
+    def _threshold(self, context_type: str) -> float:
+        return self.thresholds.get(context_type, max(self.thresholds.values()))
+
+    def _slots_for(self, context_type: str, dimension: int) -> _VectorSlots:
+        if context_type not in self._slots:
+            self._slots[context_type] = _VectorSlots(self.capacity, dimension)
+        return self._slots[context_type]
+
+    def embed(self, query: str) -> np.ndarray | None:
+        if not self.available or not query:
+            return None
+        try:
+            return self.embedder.embed_one(query.strip().lower())
+        except Exception as e:
+            print(f"[SemanticCache] Error embedding query: {e}")
+            return None
+
+    def lookup(
+        self, query: str, context_type: str, scope: str = ""
+    ) -> tuple[str | None, np.ndarray | None]:
+        """
+        Return (cached reply or None, query vector). Only entries stored with the
+        same ``scope`` can match. The vector is handed back so a miss can be
+        stored with ``add`` without embedding the query twice.
+        """
+        if context_type not in self.context_types:
+            return None, None
+        vector = self.embed(query)
+        if vector is None:
+            return None, None
+
+        now = time.time()
+        with self._lock:
+            slots = self._slots.get(context_type)
+            if slots is None:
+                return None, vector
+            slot, score = slots.search(vector, scope, now)
+            if score < self._threshold(context_type):
+                return None, vector
+            slots.last_access[slot] = now
+            print(f"[SemanticCache] HIT ({score:.3f}) '{query[:40]}' ~ '{(slots.queries[slot] or '')[:40]}'")
+            return slots.responses[slot], vector
+
+    def add(
+        self,
+        query: str,
+        response: str,
+        context_type: str,
+        ttl: int,
+        vector: np.ndarray | None = None,
+        scope: str = "",
+    ) -> None:
+        if context_type not in self.context_types:
+            return
+        if vector is None:
+            vector = self.embed(query)
+        if vector is None or not response:
+            return
+
+        now = time.time()
+        with self._lock:
+            slots = self._slots_for(context_type, vector.shape[0])
+            slots.put(slots.free_slot(now), vector, scope, query, response, ttl, now)
+
+    async def alookup(
+        self, query: str, context_type: str, scope: str = ""
+    ) -> tuple[str | None, np.ndarray | None]:
+        # Embedding is CPU-bound ONNX inference; keep it off the event loop
+        return await asyncio.to_thread(self.lookup, query, context_type, scope)
+
+    async def aadd(
+        self,
+        query: str,
+        response: str,
+        context_type: str,
+        ttl: int,
+        vector: np.ndarray | None = None,
+        scope: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.add, query, response, context_type, ttl, vector, scope)
+
+    def invalidate(self, context_type: str | None = None) -> None:
+        with self._lock:
+            for name, slots in self._slots.items():
+                if context_type is None or name == context_type:
+                    slots.clear()
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            entries = {name: slots.size(now) for name, slots in self._slots.items()}
+        return {
+            "available": self.available,
+            "context_types": sorted(self.context_types),
+            "capacity": self.capacity,
+            "entries": entries,
+        }
@@ -1,25 +1,44 @@
+import json
 from contextlib import contextmanager
-from typing import Any
+from typing import Any, AsyncIterator
 from uuid import uuid4
 
-from chatbot.graph import build_graph
+from chatbot.fast_router import FastPathRouter
+from chatbot.graph import aprepare_stream_context, astream_reply, build_async_graph, build_graph
 from chatbot.llm import LLMAnalyzer
 from chatbot.memory import ConversationMemory
-from chatbot.rag import QdrantRAG
+from chatbot.rag import build_retriever
 from chatbot.redis_memory import RedisConversationMemory
 from chatbot.state import ChatbotState
 from core.config import get_settings
-from db.database import SessionLocal
+from db.database import AsyncSessionLocal, SessionLocal
 from schemas.schemas import MessageContext
 
 
 class ChatbotService:
     def __init__(self) -> None:
         self.settings = get_settings()
-        self.memory = ConversationMemory()
+        self.memory = ConversationMemory(
+            max_sessions=self.settings.memory_max_sessions,
+            idle_ttl=self.settings.memory_session_ttl,
+            max_bytes=self.settings.memory_max_bytes,
+        )
         self.analyzer = LLMAnalyzer(self.settings)
-        self.rag = QdrantRAG(self.settings)
+        self.rag = build_retriever(self.settings)
         self.redis_memory = RedisConversationMemory(self.settings)
+        self.router = (
+            FastPathRouter(catalog_ttl=self.settings.fast_path_catalog_ttl)
+            if self.settings.fast_path_enabled
+            else None
+        )
+        # Compiled once; the per-request DB session is passed via config
+        self.graph = build_graph(self.memory, self.analyzer, self.rag, self.redis_memory, self.router)
+        self.async_graph = build_async_graph(
+            self.memory, self.analyzer, self.rag, self.redis_memory, self.router
+        )
+        self.async_prepare_graph = build_async_graph(
+            self.memory, self.analyzer, self.rag, self.redis_memory, self.router, with_response=False
+        )
 
     @contextmanager
     def _db(self):
@@ -36,26 +55,74 @@ class ChatbotService:
         print(f"[ChatbotService] Created session {session_id} for user {user_id}")
         return session_id
 
+    @staticmethod
+    def _initial_state(session_id: str, message: str, user_id: int | None) -> ChatbotState:
+        return {
+            "session_id": session_id,
+            "user_id": user_id,
+            "message": message,
+        }
+
+    @staticmethod
+    def _build_context(result: dict[str, Any]) -> dict[str, Any]:
+        tool_result = result.get("tool_result") or {}
+        context = MessageContext(
+            products=tool_result.get("products"),
+            suggested_products=tool_result.get("suggested_products"),
+            orders=tool_result.get("orders"),
+            profile=tool_result.get("profile"),
+        )
+        return context.model_dump(exclude_none=True)
+
+    def _build_response(self, session_id: str, result: dict[str, Any]) -> dict[str, Any]:
+        print(f"[ChatbotService] Graph completed for session {session_id}")
+        return {
+            "reply": result.get("response", "I am not sure how to respond yet."),
+            "session_id": session_id,
+            "context": self._build_context(result),
+        }
+
+    @staticmethod
+    def _sse(event: str, data: dict[str, Any]) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
     def send_message(self, *, session_id: str, message: str, user_id: int | None = None) -> dict[str, Any]:
         print(f"[ChatbotService] Received message for session {session_id}: {message}")
         with self._db() as db:
-            graph = build_graph(db, self.memory, self.analyzer, self.rag, self.redis_memory)
-            state: ChatbotState = {
-                "session_id": session_id,
-                "user_id": user_id,
-                "message": message,
-            }
-            result = graph.invoke(state)
-            print(f"[ChatbotService] Graph completed for session {session_id}")
-            tool_result = result.get("tool_result", {})
-            context = MessageContext(
-                products=tool_result.get("products"),
-                suggested_products=tool_result.get("suggested_products"),
-                orders=tool_result.get("orders"),
-                profile=tool_result.get("profile"),
-            )
-            return {
-                "reply": result.get("response", "I am not sure how to respond yet."),
-                "session_id": session_id,
-                "context": context.model_dump(exclude_none=True),
-            }
+            state = self._initial_state(session_id, message, user_id)
+            result = self.graph.invoke(state, config={"configurable": {"db": db}})
+            return self._build_response(session_id, result)
+
+    async def asend_message(
+        self, *, session_id: str, message: str, user_id: int | None = None
+    ) -> dict[str, Any]:
+        """Async message path: no thread is held while Redis, Qdrant, MySQL or Gemini respond."""
+        print(f"[ChatbotService] Received message for session {session_id}: {message}")
+        async with AsyncSessionLocal() as db:
+            state = self._initial_state(session_id, message, user_id)
+            result = await self.async_graph.ainvoke(state, config={"configurable": {"db": db}})
+            return self._build_response(session_id, result)
+
+    async def astream_message(
+        self, *, session_id: str, message: str, user_id: int | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Server-sent events for one turn: ``context`` first, then ``token``
+        chunks as Gemini generates them, then ``done`` with the full reply.
+        """
+        print(f"[ChatbotService] Streaming message for session {session_id}: {message}")
+        async with AsyncSessionLocal() as db:
+            config = {"configurable": {"db": db}}
+            try:
+                state = self._initial_state(session_id, message, user_id)
+                state = await self.async_prepare_graph.ainvoke(state, config=config)
+                state = await aprepare_stream_context(state, config)
+                yield self._sse("context", {"session_id": session_id, "context": self._build_context(state)})
+
+                async for chunk in astream_reply(state, self.memory, self.analyzer, self.redis_memory):
+                    yield self._sse("token", {"text": chunk})
+
+                yield self._sse("done", {"session_id": session_id, "reply": state.get("response", "")})
+            except Exception as e:
+                print(f"[ChatbotService] Error streaming message: {e}")
+                yield self._sse("error", {"detail": "Chatbot is unavailable"})
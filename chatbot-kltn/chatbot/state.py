@@ -6,6 +6,7 @@ class ChatbotState(TypedDict, total=False):
     user_id: int | None
     message: str
     recent_messages: list[dict[str, Any]] | None
+    conversation_summary: str | None
     conversation_context: str | None
     intent: str | None
     keywords: list[str] | None
@@ -1,8 +1,15 @@
-from sqlalchemy import or_
+import re
+import threading
+
+from sqlalchemy import Select, or_, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from chatbot.catalog_search import CatalogSearchIndex
 from chatbot.prompts import TOOL_PROMPTS
 from chatbot.rag import QdrantRAG
+from core.config import get_settings
 from models.models import Order, Product, User
 
 SEARCH_PRODUCTS_PROMPT = TOOL_PROMPTS["search_products_by_keyword"]
@@ -10,31 +17,59 @@ GET_ORDERS_PROMPT = TOOL_PROMPTS["get_user_orders"]
 GET_PROFILE_PROMPT = TOOL_PROMPTS["get_user_profile"]
 
 
-def search_products_by_keyword(
-    db: Session,
+# Shortest term the FULLTEXT ngram parser can match (MySQL ngram_token_size, default 2)
+FULLTEXT_MIN_TERM = 2
+
+
+def _fulltext_query(terms: list[str]) -> str:
+    """Boolean-mode query: each term is an optional phrase, so rows matching any term are ranked by relevance."""
+    phrases = []
+    for term in terms:
+        # Drop characters with meaning in boolean mode; the ngram parser handles the rest
+        cleaned = " ".join(re.sub(r'["()<>~*+\-@]', " ", term).split())
+        if len(cleaned) >= FULLTEXT_MIN_TERM:
+            phrases.append(f'"{cleaned}"')
+    return " ".join(phrases)
+
+
+def _keyword_search_stmt(
     keywords: list[str] | None,
-    *,
-    min_price: float | None = None,
-    max_price: float | None = None,
-) -> list[dict]:
+    min_price: float | None,
+    max_price: float | None,
+    fulltext: bool = False,
+) -> Select:
     clean_terms = [term.lower() for term in (keywords or []) if term]
     print(f"[Tools] search_products_by_keyword terms={clean_terms}, min={min_price}, max={max_price}")
 
-    print("[Tools] Using SQL search")
-    query = db.query(Product).filter(Product.is_active.is_(True))
-    if clean_terms:
+    stmt = select(Product).where(Product.is_active.is_(True))
+    order_by = [Product.created_at.desc()]
+    fulltext_query = _fulltext_query(clean_terms) if fulltext else ""
+    if fulltext_query:
+        print("[Tools] Using SQL full-text search")
+        relevance = match(Product.product_name, against=fulltext_query).in_boolean_mode()
+        stmt = stmt.where(relevance)
+        order_by.insert(0, relevance.desc())
+    elif clean_terms:
+        print("[Tools] Using SQL search")
         like_clauses = [Product.product_name.ilike(f"%{term}%") for term in clean_terms]
-        query = query.filter(or_(*like_clauses))
+        stmt = stmt.where(or_(*like_clauses))
     else:
         print("[Tools] No keyword provided, returning latest active products.")
 
     if min_price is not None:
-        query = query.filter(Product.current_price >= min_price)
+        stmt = stmt.where(Product.current_price >= min_price)
     if max_price is not None:
-        query = query.filter(Product.current_price <= max_price)
+        stmt = stmt.where(Product.current_price <= max_price)
+
+    return stmt.order_by(*order_by).limit(5)
 
-    products = query.order_by(Product.created_at.desc()).limit(5).all()
 
+def _use_fulltext(db: Session | AsyncSession) -> bool:
+    # MATCH ... AGAINST needs MySQL and the ft_products_name index (BE/create_tables.py)
+    return get_settings().keyword_search_fulltext and db.get_bind().dialect.name == "mysql"
+
+
+def _keyword_results(products: list[Product]) -> list[dict]:
     return [
         {
             "product_id": str(product.id),
@@ -52,8 +87,75 @@ def search_products_by_keyword(
     ]
 
 
-def get_user_orders(db: Session, user_id: int) -> list[dict]:
-    orders = db.query(Order).filter(Order.user_id == user_id).order_by(Order.created_at.desc()).limit(5)
+_catalog_index: CatalogSearchIndex | None = None
+_catalog_index_lock = threading.Lock()
+
+
+def _get_catalog_index() -> CatalogSearchIndex | None:
+    """Process-wide in-memory catalog index, or None when KEYWORD_SEARCH_ENGINE=sql."""
+    global _catalog_index
+    settings = get_settings()
+    if settings.keyword_search_engine != "memory":
+        return None
+    if _catalog_index is None:
+        with _catalog_index_lock:
+            if _catalog_index is None:
+                _catalog_index = CatalogSearchIndex(
+                    lambda product: _keyword_results([product])[0],
+                    refresh_seconds=settings.catalog_index_refresh_seconds,
+                    rebuild_seconds=settings.catalog_index_rebuild_seconds,
+                )
+    return _catalog_index
+
+
+def _memory_search(
+    index: CatalogSearchIndex,
+    keywords: list[str] | None,
+    min_price: float | None,
+    max_price: float | None,
+) -> list[dict]:
+    print(f"[Tools] search_products_by_keyword terms={keywords}, min={min_price}, max={max_price}")
+    print(f"[Tools] Using in-memory catalog search ({index.size} products)")
+    return index.search(keywords, min_price=min_price, max_price=max_price)
+
+
+def search_products_by_keyword(
+    db: Session,
+    keywords: list[str] | None,
+    *,
+    min_price: float | None = None,
+    max_price: float | None = None,
+) -> list[dict]:
+    index = _get_catalog_index()
+    if index is not None:
+        index.ensure_fresh(db)
+        if index.available:
+            return _memory_search(index, keywords, min_price, max_price)
+    stmt = _keyword_search_stmt(keywords, min_price, max_price, fulltext=_use_fulltext(db))
+    return _keyword_results(db.scalars(stmt).all())
+
+
+async def asearch_products_by_keyword(
+    db: AsyncSession,
+    keywords: list[str] | None,
+    *,
+    min_price: float | None = None,
+    max_price: float | None = None,
+) -> list[dict]:
+    index = _get_catalog_index()
+    if index is not None:
+        await index.aensure_fresh(db)
+        if index.available:
+            return _memory_search(index, keywords, min_price, max_price)
+    stmt = _keyword_search_stmt(keywords, min_price, max_price, fulltext=_use_fulltext(db))
+    return _keyword_results((await db.scalars(stmt)).all())
+
+
+def _orders_stmt(user_id: int) -> Select:
+    return select(Order).where(Order.user_id == user_id).order_by(Order.created_at.desc()).limit(5)
+
+
+def _order_results(orders: list[Order]) -> list[dict]:
     return [
         {
             "order_number": order.order_number,
@@ -64,15 +166,24 @@ def get_user_orders(db: Session, user_id: int) -> list[dict]:
     ]
 
 
-def suggest_products(db: Session, limit: int = 3) -> list[dict]:
-    """Suggest popular products when search returns no results."""
-    products = (
-        db.query(Product)
-        .filter(Product.is_active.is_(True))
+def get_user_orders(db: Session, user_id: int) -> list[dict]:
+    return _order_results(db.scalars(_orders_stmt(user_id)).all())
+
+
+async def aget_user_orders(db: AsyncSession, user_id: int) -> list[dict]:
+    return _order_results((await db.scalars(_orders_stmt(user_id))).all())
+
+
+def _suggest_stmt(limit: int) -> Select:
+    return (
+        select(Product)
+        .where(Product.is_active.is_(True))
         .order_by(Product.created_at.desc())
         .limit(limit)
-        .all()
     )
+
+
+def _suggest_results(products: list[Product]) -> list[dict]:
     return [
         {
             "product_id": product.product_id,
@@ -90,9 +201,17 @@ def suggest_products(db: Session, limit: int = 3) -> list[dict]:
     ]
 
 
-def get_user_profile(db: Session, user_id: int) -> dict | None:
-    print(f"Get user profile for user_id={user_id}")
-    user = db.query(User).filter(User.id == user_id).first()
+def suggest_products(db: Session, limit: int = 3) -> list[dict]:
+    """Suggest popular products when search returns no results."""
+    return _suggest_results(db.scalars(_suggest_stmt(limit)).all())
+
+
+async def asuggest_products(db: AsyncSession, limit: int = 3) -> list[dict]:
+    """Async variant of suggest_products."""
+    return _suggest_results((await db.scalars(_suggest_stmt(limit))).all())
+
+
+def _profile_result(user: User | None) -> dict | None:
     if not user:
         return None
     return {
@@ -102,6 +221,19 @@ def get_user_profile(db: Session, user_id: int) -> dict | None:
     }
 
 
+def get_user_profile(db: Session, user_id: int) -> dict | None:
+    print(f"Get user profile for user_id={user_id}")
+    return _profile_result(db.get(User, user_id))
+
+
+async def aget_user_profile(db: AsyncSession, user_id: int) -> dict | None:
+    print(f"Get user profile for user_id={user_id}")
+    return _profile_result(await db.get(User, user_id))
+
+
 search_products_by_keyword.__doc__ = SEARCH_PRODUCTS_PROMPT
+asearch_products_by_keyword.__doc__ = SEARCH_PRODUCTS_PROMPT
 get_user_orders.__doc__ = GET_ORDERS_PROMPT
+aget_user_orders.__doc__ = GET_ORDERS_PROMPT
 get_user_profile.__doc__ = GET_PROFILE_PROMPT
+aget_user_profile.__doc__ = GET_PROFILE_PROMPT
@@ -5,6 +5,8 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     chatbot_port: int = 8001
     database_url: str
+    # Optional asyncio driver URL; derived from database_url when unset
+    async_database_url: str | None = None
     redis_url: str | None = None
     google_api_key: str | None = None
     gemini_model: str = "gemini-flash-latest"
@@ -12,6 +14,59 @@ class Settings(BaseSettings):
     qdrant_url: str | None = None
     qdrant_api_key: str | None = None
     qdrant_collection: str = "products"
+    # Search-time tuning: HNSW beam (None = server default) and rescoring of int8-quantized candidates
+    qdrant_hnsw_ef: int | None = None
+    qdrant_quantization_rescore: bool = True
+    qdrant_quantization_oversampling: float = 2.0
+    # Redis history codec for new entries: "json" (legacy), "msgpack" or "zstd"; all formats stay readable
+    history_codec: str = "msgpack"
+    history_zstd_dict_path: str | None = None
+    # Messages sent next to the stored rolling summary (the raw window is used until a summary exists)
+    summary_recent_messages: int = 2
+    # Per-worker ConversationMemory bounds (LRU by last access + idle expiry)
+    memory_max_sessions: int = 10000
+    memory_session_ttl: int = 3600
+    memory_max_bytes: int = 64 * 1024 * 1024
+    # In-process L1 in front of the Redis response cache
+    l1_cache_max_entries: int = 1024
+    l1_cache_max_bytes: int = 16 * 1024 * 1024
+    l1_cache_default_ttl: int = 300
+    # TTL for cached consolidated analysis results (message + history digest)
+    analysis_cache_ttl: int = 86400
+    # Local query embedding model (fastembed) and semantic response cache
+    query_embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    semantic_cache_enabled: bool = True
+    # Comma-separated context types served by the semantic tier. Product replies name the retrieved
+    # products and prices; adding "product" reuses them only when those products and the message's numbers match
+    semantic_cache_context_types: str = "advice"
+    semantic_cache_max_entries: int = 2048
+    semantic_cache_threshold_advice: float = 0.90
+    semantic_cache_threshold_product: float = 0.95
+    # Semantic retrieval backend: "qdrant" or "local" (in-process index written by embedded_data_to_vector.py)
+    rag_backend: str = "qdrant"
+    local_index_path: str | None = None
+    # Client-side query embeddings for Qdrant ("gemini" | "fastembed" | "none" for Qdrant text queries),
+    # must match the model the collection was built with. The default matches embedded_data_to_vector.py's
+    # default (EMBEDDER_TYPE=gemini, text-embedding-004) and needs GOOGLE_API_KEY
+    rag_query_embedder: str | None = "gemini"
+    rag_query_embedding_model: str = "models/text-embedding-004"
+    embedding_cache_max_entries: int = 4096
+    embedding_cache_ttl: int = 86400 * 7
+    # Hybrid retrieval: RAG + SQL run concurrently, fused with reciprocal-rank fusion
+    hybrid_search_deadline_ms: int = 800
+    hybrid_rrf_k: int = 60
+    # Phrasings sent to the vector store per turn (query summary + keywords), searched in one batch.
+    # Needs client-side query vectors (RAG_QUERY_EMBEDDER or the local backend); Qdrant text queries send one
+    hybrid_rag_max_queries: int = 4
+    # Keyword search engine: "memory" (in-process BM25 index synced on updated_at) or "sql"
+    keyword_search_engine: str = "memory"
+    catalog_index_refresh_seconds: float = 30.0
+    catalog_index_rebuild_seconds: float = 3600.0
+    # SQL keyword search via MATCH ... AGAINST on MySQL (needs the FULLTEXT index from BE/create_tables.py)
+    keyword_search_fulltext: bool = True
+    # Rule-based router that skips the analysis LLM call for unambiguous messages
+    fast_path_enabled: bool = True
+    fast_path_catalog_ttl: int = 600
     allowed_origins: str | list[str] = "*"
 
     model_config = {
@@ -1,6 +1,7 @@
 from contextlib import contextmanager
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from core.config import get_settings
@@ -10,6 +11,35 @@ engine = create_engine(settings.database_url, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+_ASYNC_DRIVER_PREFIXES = {
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "mysql://": "mysql+aiomysql://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+_ASYNC_DRIVERS = ("aiomysql", "asyncmy", "aiosqlite", "asyncpg", "psycopg_async")
+
+
+def _async_database_url(url: str) -> str:
+    """Map a sync driver URL onto its asyncio driver (pymysql -> aiomysql, sqlite -> aiosqlite)."""
+    for prefix, async_prefix in _ASYNC_DRIVER_PREFIXES.items():
+        if url.startswith(prefix):
+            return url.replace(prefix, async_prefix, 1)
+    scheme = url.split("://", 1)[0]
+    if scheme.partition("+")[2] in _ASYNC_DRIVERS:
+        return url
+    raise ValueError(
+        f"No asyncio driver known for DATABASE_URL scheme '{scheme}'; "
+        "set ASYNC_DATABASE_URL to an async driver URL (e.g. mysql+aiomysql://...)"
+    )
+
+
+async_engine = create_async_engine(
+    settings.async_database_url or _async_database_url(settings.database_url),
+    pool_pre_ping=True,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+
 @contextmanager
 def get_db() -> Session:
     db = SessionLocal()
@@ -1,5 +1,6 @@
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from chatbot.service import ChatbotService
 from core.config import get_settings
@@ -47,8 +48,8 @@ def create_session(payload: SessionCreateRequest, service: ChatbotService = Depe
 
 
 @app.post("/api/v1/chatbot/message", response_model=MessageResponse)
-def send_message(payload: MessageRequest, service: ChatbotService = Depends(get_service)):
-    response = service.send_message(
+async def send_message(payload: MessageRequest, service: ChatbotService = Depends(get_service)):
+    response = await service.asend_message(
         session_id=payload.session_id,
         message=payload.message,
         user_id=payload.user_id,
@@ -56,3 +57,16 @@ def send_message(payload: MessageRequest, service: ChatbotService = Depends(get_
     if not response:
         raise HTTPException(status_code=500, detail="Chatbot is unavailable")
     return MessageResponse(**response)
+
+
+@app.post("/api/v1/chatbot/message/stream")
+async def stream_message(payload: MessageRequest, service: ChatbotService = Depends(get_service)):
+    return StreamingResponse(
+        service.astream_message(
+            session_id=payload.session_id,
+            message=payload.message,
+            user_id=payload.user_id,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -37,6 +37,9 @@ class ProductInfo(BaseModel):
     image_url: str | None = Field(None, description="Product image URL")
     discount_percent: int | None = Field(None, description="Discount percentage (0-100)")
     score: float | None = Field(None, description="Semantic similarity score (0-1) when using Qdrant RAG")
+    sources: list[str] | None = Field(
+        None, description="Retrieval backends that returned this product: 'rag' (Qdrant) and/or 'sql' (keyword)"
+    )
 
 
 class OrderInfo(BaseModel):
@@ -0,0 +1,133 @@
+"""In-memory catalog search: ranking, typo expansion, price ranges and DB sync."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from chatbot.catalog_search import CatalogSearchIndex, within_one_edit
+from models.models import Base, Product
+
+START = datetime(2026, 1, 1)
+
+
+def _product(product_id: int, name: str, price: float | None = 10_000) -> Product:
+    return Product(
+        id=product_id, product_code=f"P{product_id:03d}", product_name=name,
+        current_price=price, is_active=True, created_at=START + timedelta(minutes=product_id),
+    )
+
+
+def _index(products: list[Product]) -> CatalogSearchIndex:
+    index = CatalogSearchIndex(lambda product: {"id": product.id, "name": product.product_name}, refresh_seconds=0)
+    index.rebuild(products)
+    return index
+
+
+def _ids(results: list[dict]) -> list[int]:
+    return [result["id"] for result in results]
+
+
+CATALOG = [
+    _product(1, "Sữa tươi tiệt trùng Vinamilk có đường hộp lớn 1 lít", 35_000),
+    _product(2, "Sữa tươi Vinamilk", 30_000),
+    _product(3, "Cà chua Đà Lạt 500g", 20_000),
+    _product(4, "Mì chua cay Hảo Hảo", 5_000),
+    _product(5, "Cá hồi phi lê", 150_000),
+    _product(6, "Cà rốt Đà Lạt", None),
+    _product(7, "Sữa chua uống Yakult", 25_000),
+]
+
+
+@pytest.fixture
+def index():
+    return _index(CATALOG)
+
+
+def test_bm25_prefers_shorter_names_for_the_same_words(index):
+    assert _ids(index.search(["sữa tươi vinamilk"])) == [2, 1]
+
+
+def test_rare_word_outweighs_common_word(index):
+    # "yakult" is in one name, "sua" in three: the any-word fallback still ranks by BM25
+    assert _ids(index.search(["sữa yakult"]))[0] == 7
+
+
+@pytest.mark.parametrize("typo", ["ca chau", "ca chuaa", "ca chu"])
+def test_one_edit_typo_expands_to_catalog_word(index, typo):
+    assert _ids(index.search([typo]))[0] == 3
+
+
+def test_within_one_edit():
+    assert within_one_edit("chau", "chua")  # adjacent swap
+    assert within_one_edit("chua", "chuaa")
+    assert within_one_edit("chua", "cua")
+    assert not within_one_edit("chua", "cay")
+
+
+def test_whole_keyword_matches_come_before_any_word(index):
+    # Only product 3 has both "ca" and "chua"; "Cá hồi", "Mì chua cay", "Sữa chua" match one word
+    assert _ids(index.search(["cà chua"])) == [3]
+
+
+def test_keywords_are_alternatives(index):
+    assert set(_ids(index.search(["cà chua", "cá hồi"]))) == {3, 5}
+
+
+def test_any_word_fallback_ranks_by_words_matched(index):
+    results = _ids(index.search(["chua cay ngọt"], limit=10))
+    assert results[0] == 4 and set(results) == {3, 4, 7}
+
+
+@pytest.mark.parametrize("min_price, max_price, expected", [
+    (None, 20_000, {3, 4}),
+    (20_000, 30_000, {2, 3, 7}),
+    (30_000, None, {1, 2, 5}),
+    (1_000_000, None, set()),
+])
+def test_price_mask_is_inclusive_and_skips_unpriced(index, min_price, max_price, expected):
+    assert set(_ids(index.search(None, min_price=min_price, max_price=max_price, limit=10))) == expected
+
+
+def test_price_filter_applies_to_keyword_matches(index):
+    assert _ids(index.search(["sữa"], max_price=30_000, limit=10)) == [2, 7]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Product.__table__])
+    session = sessionmaker(bind=engine)()
+    session.add_all(_product(p.id, p.product_name, p.current_price) for p in CATALOG)
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_hard_delete_is_dropped_on_the_next_sync(db):
+    index = CatalogSearchIndex(lambda product: {"id": product.id}, refresh_seconds=0)
+    index.ensure_fresh(db)
+    assert 3 in _ids(index.search(["cà chua"]))
+
+    # Delete hidden by an insert: the total row count does not change
+    db.execute(delete(Product).where(Product.id == 3))
+    db.add(_product(8, "Cà chua bi", 25_000))
+    db.commit()
+    index.ensure_fresh(db)
+
+    assert _ids(index.search(["cà chua"])) == [8]
+    assert index.size == len(CATALOG)
+
+
+def test_plain_delete_is_dropped_without_full_rebuild(db):
+    index = CatalogSearchIndex(lambda product: {"id": product.id}, refresh_seconds=0)
+    index.ensure_fresh(db)
+    rebuilt_at = index._rebuilt_at
+
+    db.execute(delete(Product).where(Product.id == 5))
+    db.commit()
+    index.ensure_fresh(db)
+
+    assert 5 not in _ids(index.search(["cá hồi"], limit=10))
+    assert index._rebuilt_at == rebuilt_at
@@ -0,0 +1,57 @@
+"""Query vectors are embedded once and then served from the cache tiers."""
+import fakeredis
+import numpy as np
+import pytest
+
+from chatbot import embedding_cache as embedding_cache_module
+from chatbot.embedding_cache import QueryEmbeddingCache
+from chatbot.rag import QueryVectorMixin
+from core.config import Settings
+
+
+class CountingEmbedder:
+    model_name = "fake-embedder"
+    available = True
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed_one(self, text: str) -> np.ndarray:
+        self.calls += 1
+        return np.random.default_rng(len(text)).standard_normal(8).astype(np.float32)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        embedding_cache_module.redis, "from_url", lambda url, **kw: fakeredis.FakeRedis(server=server)
+    )
+    return Settings(database_url="sqlite://", redis_url="redis://fake")
+
+
+def _retriever(settings: Settings, embedder: CountingEmbedder) -> QueryVectorMixin:
+    retriever = QueryVectorMixin()
+    retriever.embedder = embedder
+    retriever.embedding_cache = QueryEmbeddingCache(settings, embedder.model_name)
+    return retriever
+
+
+def test_repeated_query_hits_float16_tier_instead_of_reembedding(settings):
+    embedder = CountingEmbedder()
+    first_worker = _retriever(settings, embedder)
+    original = first_worker._query_vector("Bắp Mỹ ngọt")
+
+    # Another worker (empty in-process tier) shares the Redis float16 tier
+    second_worker = _retriever(settings, embedder)
+    cached = second_worker._query_vector("  bắp mỹ   NGỌT ")
+
+    assert embedder.calls == 1
+    assert cached.dtype == np.float32
+    np.testing.assert_array_equal(cached, original.astype(np.float16).astype(np.float32))
+    raw = second_worker.embedding_cache.redis_client.get(second_worker.embedding_cache._make_key("bắp mỹ ngọt"))
+    assert len(raw) == original.size * 2
+
+
+def test_query_embedder_matches_the_collection_default():
+    assert Settings(database_url="sqlite://").rag_query_embedder == "gemini"
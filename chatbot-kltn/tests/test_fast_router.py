@@ -0,0 +1,59 @@
+"""Confidence rules of the rule-based fast path (enabled by default)."""
+import pytest
+
+from chatbot.fast_router import FastPathRouter
+
+CATALOG = ["Bắp Mỹ Ba Huân", "Đường cát trắng Biên Hòa 1kg", "Cà chua Đà Lạt 500g", "Chả giò rế 500g", "Sữa tươi Vinamilk 500ml"]
+HISTORY = [{"role": "user", "content": "bắp mỹ dưới 50k"}, {"role": "assistant", "content": "Bắp Mỹ Ba Huân 25.000đ"}]
+
+
+@pytest.fixture
+def router():
+    router = FastPathRouter()
+    router.load_catalog(CATALOG)
+    return router
+
+
+@pytest.mark.parametrize("message, keyword, max_price", [
+    ("bắp mỹ dưới 50k", "bắp mỹ", 50_000),
+    ("cà chua", "cà chua", None),
+    ("chả giò không quá 100k", "chả giò", 100_000),
+])
+def test_routes_catalog_phrases(router, message, keyword, max_price):
+    result = router.route(message)
+    assert result["intent"] == "product_search"
+    assert result["keywords"] == [keyword]
+    assert result["max_price"] == max_price
+
+
+@pytest.mark.parametrize("message", ["không đường", "đường cát không", "sữa tươi ko đường", "bắp mỹ trừ Ba Huân"])
+def test_negation_is_not_confident(router, message):
+    assert router.route(message) is None
+
+
+@pytest.mark.parametrize("message", ["mỹ", "500ml", "đường", "tôi muốn mua sữa"])
+def test_single_token_match_is_not_confident(router, message):
+    assert router.route(message) is None
+
+
+@pytest.mark.parametrize("message, intent", [("đơn hàng của tôi", "orders"), ("xem thông tin tài khoản", "profile")])
+def test_routes_listing_intents(router, message, intent):
+    assert router.route(message)["intent"] == intent
+
+
+@pytest.mark.parametrize("message", ["tôi muốn hủy đơn hàng", "đổi đơn hàng", "trả lại đơn hàng", "đơn hàng bắp mỹ"])
+def test_order_actions_need_the_llm(router, message):
+    assert router.route(message) is None
+
+
+def test_theo_doi_is_not_an_action(router):
+    assert router.route("theo dõi đơn hàng")["intent"] == "orders"
+
+
+@pytest.mark.parametrize("message", ["cái đó giá bao nhiêu", "bắp mỹ đó thì sao", "còn loại nào khác", "sữa tươi nữa"])
+def test_follow_ups_with_history_need_the_llm(router, message):
+    assert router.route(message, HISTORY) is None
+
+
+def test_self_contained_message_with_history_still_routes(router):
+    assert router.route("cà chua dưới 30k", HISTORY)["keywords"] == ["cà chua"]
@@ -0,0 +1,80 @@
+"""The hybrid search deadline bounds both the RAG and the SQL search."""
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from chatbot import hybrid_search as hybrid
+
+RAG_HIT = {"product_code": "RAG1", "product_name": "Bắp Mỹ Ba Huân"}
+SQL_HIT = {"product_code": "SQL1", "product_name": "Bắp Mỹ"}
+SLOW = 1.0
+
+
+class FakeRAG:
+    available = True
+    batches_queries = False
+
+    def search_products_batch(self, queries, **kwargs):
+        return [RAG_HIT]
+
+    async def asearch_products_batch(self, queries, **kwargs):
+        return [RAG_HIT]
+
+
+started = []
+
+
+def _slow_sql(db, keywords, **kwargs):
+    started.append(db)
+    time.sleep(SLOW)
+    return [SQL_HIT]
+
+
+async def _aslow_sql(db, keywords, **kwargs):
+    started.append(db)
+    await asyncio.sleep(SLOW)
+    return [SQL_HIT]
+
+
+def _fast_sql(db, keywords, **kwargs):
+    return [SQL_HIT]
+
+
+@pytest.fixture(autouse=True)
+def _reset_started():
+    started.clear()
+
+
+SEARCH = dict(keywords=["bắp mỹ"], query_text="bắp mỹ ngọt luộc", deadline_ms=100)
+
+
+def test_slow_sql_is_abandoned_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(hybrid, "search_products_by_keyword", _slow_sql)
+    start = time.perf_counter()
+    db = Session(create_engine("sqlite://"))
+    products = hybrid.hybrid_search(db, FakeRAG(), **SEARCH)
+    assert time.perf_counter() - start < SLOW / 2
+    # The search ran on its own session, not the request's
+    assert started and started[0] is not db
+    assert [p["product_code"] for p in products] == ["RAG1"]
+
+
+def test_async_slow_sql_is_cancelled_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(hybrid, "asearch_products_by_keyword", _aslow_sql)
+    start = time.perf_counter()
+    db = AsyncSession(create_async_engine("sqlite+aiosqlite://"))
+    products = asyncio.run(hybrid.ahybrid_search(db, FakeRAG(), **SEARCH))
+    assert time.perf_counter() - start < SLOW / 2
+    assert started and started[0] is not db
+    assert [p["product_code"] for p in products] == ["RAG1"]
+
+
+@pytest.mark.parametrize("deadline_ms", [100, 2000])
+def test_fast_sql_is_fused_with_rag(monkeypatch, deadline_ms):
+    monkeypatch.setattr(hybrid, "search_products_by_keyword", _fast_sql)
+    products = hybrid.hybrid_search(Session(create_engine("sqlite://")), FakeRAG(), **{**SEARCH, "deadline_ms": deadline_ms})
+    assert {p["product_code"] for p in products} == {"RAG1", "SQL1"}
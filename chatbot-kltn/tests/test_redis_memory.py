@@ -0,0 +1,33 @@
+"""Rolling summary bookkeeping of RedisConversationMemory."""
+import fakeredis
+import pytest
+
+from chatbot import redis_memory as redis_memory_module
+from chatbot.graph import _turn_summary
+from chatbot.redis_memory import RedisConversationMemory
+from core.config import Settings
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_memory_module.redis, "from_url", lambda url, **kw: fakeredis.FakeRedis(server=server))
+    return RedisConversationMemory(Settings(database_url="sqlite://", redis_url="redis://fake"))
+
+
+def test_turn_without_summary_keeps_previous_one_alive(memory):
+    memory.append_turn("s1", "bắp mỹ", "Bắp Mỹ 25.000đ", user_id=7, summary="Khách tìm bắp mỹ")
+    summary_key = memory._summary_key("s1", 7)
+    memory.redis_client.expire(summary_key, 10)
+
+    memory.append_turn("s1", "cà chua", "Cà chua 20.000đ", user_id=7, summary=None)
+
+    messages, summary = memory.get_history("s1", limit=5, user_id=7)
+    assert summary == "Khách tìm bắp mỹ"
+    assert len(messages) == 4
+    assert memory.redis_client.ttl(summary_key) == memory._history_ttl(7)
+
+
+def test_fast_path_turn_carries_stored_summary_forward():
+    assert _turn_summary({"conversation_context": None, "conversation_summary": "cũ"}) == "cũ"
+    assert _turn_summary({"conversation_context": "mới", "conversation_summary": "cũ"}) == "mới"
@@ -0,0 +1,85 @@
+"""Semantic response cache: paraphrases share a reply only within the same scope."""
+import re
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from chatbot.llm import LLMAnalyzer
+from chatbot.semantic_cache import SemanticResponseCache
+from core.config import Settings
+
+
+class WordsEmbedder:
+    """Bag of words without digits: queries that differ only in numbers embed identically."""
+
+    available = True
+
+    def embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(64, dtype=np.float32)
+        for word in re.findall(r"[^\W\d_]+", text):
+            vector[hash(word) % 64] += 1.0
+        return vector / max(np.linalg.norm(vector), 1e-12)
+
+
+class EchoChain:
+    """Product chain that names the products it was given, like the real prompt does."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def invoke(self, payload: dict) -> str:
+        self.calls += 1
+        return f"{payload['query']}: {payload['products']}"
+
+
+def _analyzer(**overrides) -> LLMAnalyzer:
+    settings = Settings(database_url="sqlite://", **overrides)
+    analyzer = LLMAnalyzer.__new__(LLMAnalyzer)
+    analyzer.model = object()
+    analyzer.cache = SimpleNamespace(
+        available=False, semantic=SemanticResponseCache(settings, embedder=WordsEmbedder())
+    )
+    analyzer.product_chain = EchoChain()
+    return analyzer
+
+
+def _ask(analyzer: LLMAnalyzer, message: str, products: list[dict]) -> str:
+    return analyzer.compose_product_response(query=message, products=products, original_message=message)
+
+
+SPINACH = [{"product_code": "RAU01", "product_name": "Rau muống", "price": 15000}]
+SPINACH_BUNCH = [{"product_code": "RAU02", "product_name": "Rau muống bó", "price": 45000}]
+
+
+@pytest.fixture
+def analyzer():
+    return _analyzer(semantic_cache_context_types="advice,product")
+
+
+def test_same_scope_paraphrase_hits(analyzer):
+    first = _ask(analyzer, "rau muống dưới 20k", SPINACH)
+    assert _ask(analyzer, "dưới 20k rau muống", SPINACH) == first
+    assert analyzer.product_chain.calls == 1
+
+
+def test_price_difference_does_not_share_reply(analyzer):
+    cheap = _ask(analyzer, "rau muống dưới 20k", SPINACH)
+    dearer = _ask(analyzer, "rau muống dưới 50k", SPINACH)
+    assert analyzer.product_chain.calls == 2
+    assert cheap != dearer
+
+
+def test_product_difference_does_not_share_reply(analyzer):
+    first = _ask(analyzer, "rau muống", SPINACH)
+    second = _ask(analyzer, "rau muống", SPINACH_BUNCH)
+    assert analyzer.product_chain.calls == 2
+    assert "Rau muống bó" not in first and "Rau muống bó" in second
+
+
+def test_product_replies_skip_semantic_tier_by_default():
+    analyzer = _analyzer()
+    _ask(analyzer, "rau muống dưới 20k", SPINACH)
+    _ask(analyzer, "dưới 20k rau muống", SPINACH)
+    assert analyzer.product_chain.calls == 2
+    assert analyzer.cache.semantic.get_stats()["entries"] == {}
@@ -0,0 +1,44 @@
+"""The streaming table stripper must produce exactly what the batch cleaner does."""
+import random
+
+import pytest
+
+from chatbot.llm import LLMAnalyzer, _TableFormatStripper
+
+COMPLETIONS = [
+    "Dạ, bạn tham khảo:\n\n| Tên | Giá |\n|---|---|\n| Rau muống | 15.000đ |\n| Cải | 12.000đ |\n\nChúc bạn ngon miệng!",
+    "a|b|c\n---|---\n1|2|3\n\nhết bảng",
+    "Sản phẩm:\nTên|Giá|Đơn vị\n:--|--:|:-:\nSữa|30k|hộp\nghi chú trong bảng\n\nCuối.",
+    "  \n\n  Mở đầu có khoảng trắng  \n   \n\n\n\nđoạn hai\n \n \nđoạn ba   \n\n  ",
+    "Giá 1 | 2 chỉ một gạch\n\n\n\n\nsau nhiều dòng trống\n\t\nxong",
+    "| chỉ | bảng |\n| --- | --- |",
+    "\n\n\n",
+    "Dòng cuối không xuống dòng | có gạch",
+    "- gạch đầu dòng\n-\n* mục\nmột | hai | ba |\n   \nsau bảng",
+]
+
+
+def _stream(text: str, rng: random.Random) -> str:
+    stripper = _TableFormatStripper()
+    out = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 8)
+        out.append(stripper.feed(text[i:i + size]))
+        i += size
+    out.append(stripper.flush())
+    return "".join(out).rstrip()
+
+
+@pytest.mark.parametrize("text", COMPLETIONS)
+def test_stream_matches_batch_for_any_chunking(text):
+    expected = LLMAnalyzer._remove_table_format(text.strip())
+    rng = random.Random(text)
+    for _ in range(200):
+        assert _stream(text, rng) == expected
+
+
+def test_row_without_leading_pipe_is_never_sent_raw():
+    stripper = _TableFormatStripper()
+    sent = stripper.feed("a|b") + stripper.feed("|c\n---|---\n") + stripper.flush()
+    assert sent == "a, b, c"
@@ -1,7 +1,10 @@
+import hashlib
 import json
 import os
+import queue
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 def _load_optional_dotenv() -> None:
@@ -21,12 +24,26 @@ class EmbedConfig:
     embedder_type: str = "local"  # "local" | "openai"
     model_name: Optional[str] = None
     batch_size: int = 128
+    # Parallel embedding requests (Gemini); each request carries up to min(batch_size, 100) texts
+    embed_concurrency: int = 4
+    # Chunks queued between embedding and upserting (bounds peak memory)
+    pipeline_depth: int = 2
     # Qdrant params
     qdrant_url: Optional[str] = None
     qdrant_host: Optional[str] = None
     qdrant_port: Optional[int] = None
     qdrant_api_key: Optional[str] = None
     distance: str = "Cosine"  # "Cosine" | "Dot" | "Euclid"
+    # Collection tuning: HNSW graph degree / build beam, and vector quantization ("int8" | "none")
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    quantization: str = "int8"
+    # Optional in-process index for the chatbot's LocalVectorIndex (writes <path>.npy + <path>.json)
+    local_index_path: Optional[str] = None
+    skip_qdrant: bool = False
+    # Re-embed only products whose rendered text changed since the last run (manifest of content hashes)
+    incremental: bool = False
+    manifest_path: Optional[str] = None
 
 
 class TextEmbedder:
@@ -90,7 +107,19 @@ class OpenAIEmbedder(TextEmbedder):
 
 
 class GeminiEmbedder(TextEmbedder):
-    def __init__(self, model_name: Optional[str] = None, api_key: Optional[str] = None) -> None:
+    # batchEmbedContents accepts at most 100 contents per request
+    MAX_BATCH = 100
+    # 429 rate limit, 5xx transient server errors
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        api_key: Optional[str] = None,
+        batch_size: int = MAX_BATCH,
+        concurrency: int = 4,
+        max_retries: int = 6,
+    ) -> None:
         try:
             import google.generativeai as genai  # type: ignore
         except Exception as exc:  # pragma: no cover
@@ -107,41 +136,89 @@ class GeminiEmbedder(TextEmbedder):
         # Known dims for common Gemini embedding models
         self._dimension = 768 if self._model_name == "text-embedding-004" else 768
         self._genai = genai
+        self._batch_size = max(1, min(batch_size, self.MAX_BATCH))
+        self._concurrency = max(1, concurrency)
+        self._max_retries = max_retries
 
     @property
     def dimension(self) -> int:
         return self._dimension
 
+    @staticmethod
+    def _vectors(result: Any) -> List[List[float]]:
+        # Response structure: result['embedding'] is a list of vectors for list content
+        if isinstance(result, dict) and "embedding" in result:
+            return result["embedding"]
+        # For newer SDK versions with typed response
+        embedding = getattr(result, "embedding", None)
+        if embedding is not None:
+            return embedding
+        raise RuntimeError(f"Unexpected Gemini response format: {type(result)}")
+
+    def _is_retryable(self, exc: Exception) -> bool:
+        code = getattr(exc, "code", None)
+        code = getattr(code, "value", code)  # grpc StatusCode or int
+        if code in self.RETRY_STATUS:
+            return True
+        return type(exc).__name__ in ("ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError")
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        import random
+        import time
+
+        for attempt in range(self._max_retries + 1):
+            try:
+                result = self._genai.embed_content(
+                    model=self._model_name,
+                    content=batch,
+                    task_type="retrieval_document",
+                )
+                vectors = self._vectors(result)
+                if len(vectors) != len(batch):
+                    raise RuntimeError(f"Gemini returned {len(vectors)} embeddings for {len(batch)} texts")
+                return vectors
+            except Exception as exc:
+                if attempt == self._max_retries or not self._is_retryable(exc):
+                    raise
+                # Exponential backoff with full jitter so workers do not retry in lockstep
+                delay = random.uniform(0, min(60.0, 2.0 ** attempt))
+                print(f"   ⚠️  Gemini {type(exc).__name__}, retry {attempt + 1}/{self._max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+        raise RuntimeError("unreachable")
+
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        # Gemini API processes texts individually; batch manually
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        start = time.perf_counter()
+        batches = [texts[i : i + self._batch_size] for i in range(0, len(texts), self._batch_size)]
         out: List[List[float]] = []
-        for text in texts:
-            result = self._genai.embed_content(
-                model=self._model_name,
-                content=text,
-                task_type="retrieval_document"
+        # map() yields in submission order, so vectors line up with the input texts
+        with ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="gemini-embed") as pool:
+            for vectors in pool.map(self._embed_batch, batches):
+                out.extend(vectors)
+        elapsed = time.perf_counter() - start
+        if texts:
+            print(
+                f"   ✓ Gemini embedded {len(texts)} texts in {len(batches)} requests "
+                f"({len(texts) / max(elapsed, 1e-9):.1f} texts/s, concurrency {self._concurrency})"
             )
-            # Response structure: result['embedding'] is the vector
-            if isinstance(result, dict) and "embedding" in result:
-                out.append(result["embedding"])
-            else:
-                # For newer SDK versions with typed response
-                embedding = getattr(result, "embedding", None)
-                if embedding is not None:
-                    out.append(embedding)
-                else:
-                    raise RuntimeError(f"Unexpected Gemini response format: {type(result)}")
         return out
 
 
-def build_embedder(embedder_type: str, model_name: Optional[str]) -> TextEmbedder:
+def build_embedder(
+    embedder_type: str,
+    model_name: Optional[str],
+    batch_size: int = GeminiEmbedder.MAX_BATCH,
+    concurrency: int = 4,
+) -> TextEmbedder:
     et = embedder_type.lower().strip()
     if et == "local":
         return LocalSentenceTransformerEmbedder(model_name=model_name)
     if et == "openai":
         return OpenAIEmbedder(model_name=model_name)
     if et == "gemini":
-        return GeminiEmbedder(model_name=model_name)
+        return GeminiEmbedder(model_name=model_name, batch_size=batch_size, concurrency=concurrency)
     raise ValueError(f"Unsupported embedder_type: {embedder_type}")
 
 
@@ -163,48 +240,106 @@ def render_product_text(product: Dict[str, Any]) -> str:
     return " | ".join(normalized)
 
 
+def product_category(product: Dict[str, Any]) -> Optional[str]:
+    # product_url is "/<category-slug>/<product-slug>"
+    parts = [part for part in str(product.get("product_url") or "").split("/") if part]
+    return parts[0] if len(parts) > 1 else None
+
+
+def _stable_int(value: str) -> int:
+    # Built-in hash() of str is salted per process; ids must be stable across runs
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big") >> 1
+
+
+def point_id_for(product: Dict[str, Any]) -> int:
+    point_id = product.get("product_id") or product.get("product_code")
+
+    # Qdrant requires unsigned int or UUID; convert to int
+    if point_id is None:
+        # Fallback to hashed text if no id fields
+        return _stable_int(render_product_text(product))
+    try:
+        # Ensure positive unsigned integer
+        return abs(int(point_id))
+    except (ValueError, TypeError):
+        # Not a number, hash the string
+        return _stable_int(str(point_id))
+
+
+def build_payload(product: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "product_id": product.get("product_id"),
+        "product_code": product.get("product_code"),
+        "title": product.get("title"),
+        "product_name": product.get("product_name"),
+        "current_price": product.get("current_price"),
+        "current_price_text": product.get("current_price_text"),
+        "discount_percent": product.get("discount_percent"),
+        "is_active": product.get("is_active", True),
+        "category": product_category(product),
+        "unit": product.get("unit"),
+        "product_url": product.get("product_url"),
+        "image_url": product.get("image_url"),
+        "text": render_product_text(product),
+    }
+
+
 def build_points(
     products: List[Dict[str, Any]],
     embeddings: List[List[float]],
 ) -> List[Dict[str, Any]]:
-    points: List[Dict[str, Any]] = []
-    for product, vector in zip(products, embeddings):
-        point_id = product.get("product_id") or product.get("product_code")
-        
-        # Qdrant requires unsigned int or UUID; convert to int
-        if point_id is None:
-            # Fallback to hashed text if no id fields
-            point_id = abs(hash(render_product_text(product)))
-        else:
-            # Try to parse as int; if fails, hash it
-            try:
-                point_id = int(point_id)
-            except (ValueError, TypeError):
-                # Not a number, hash the string
-                point_id = abs(hash(str(point_id)))
-        
-        # Ensure positive unsigned integer
-        point_id = abs(int(point_id))
-        
-        points.append(
-            {
-                "id": point_id,
-                "vector": vector,
-                "payload": {
-                    "product_id": product.get("product_id"),
-                    "product_code": product.get("product_code"),
-                    "title": product.get("title"),
-                    "product_name": product.get("product_name"),
-                    "current_price": product.get("current_price"),
-                    "current_price_text": product.get("current_price_text"),
-                    "unit": product.get("unit"),
-                    "product_url": product.get("product_url"),
-                    "image_url": product.get("image_url"),
-                    "text": render_product_text(product),
-                },
-            }
+    return [
+        {"id": point_id_for(product), "vector": vector, "payload": build_payload(product)}
+        for product, vector in zip(products, embeddings)
+    ]
+
+
+# Payload fields filtered on by the chatbot (QdrantRAG._build_filter) and their index types
+PAYLOAD_INDEXES = {
+    "current_price": "float",
+    "discount_percent": "float",
+    "is_active": "bool",
+    "category": "keyword",
+}
+
+
+def _collection_tuning(cfg: EmbedConfig) -> Tuple[Any, Any]:
+    from qdrant_client.http import models as qmodels  # type: ignore
+
+    hnsw_config = qmodels.HnswConfigDiff(m=cfg.hnsw_m, ef_construct=cfg.hnsw_ef_construct)
+    quantization_config = None
+    if cfg.quantization.lower() == "int8":
+        # Quantized vectors stay in RAM; originals are used to rescore the top candidates
+        quantization_config = qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(
+                type=qmodels.ScalarType.INT8, quantile=0.99, always_ram=True
+            )
         )
-    return points
+    return hnsw_config, quantization_config
+
+
+def ensure_payload_indexes(
+    client: "QdrantClient",  # type: ignore[name-defined]
+    collection_name: str,
+) -> None:
+    from qdrant_client.http import models as qmodels  # type: ignore
+
+    schema_map = {
+        "float": qmodels.PayloadSchemaType.FLOAT,
+        "bool": qmodels.PayloadSchemaType.BOOL,
+        "keyword": qmodels.PayloadSchemaType.KEYWORD,
+    }
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field in existing:
+            continue
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=schema_map[schema],
+            wait=True,
+        )
+        print(f"   ✓ Created {schema} payload index on '{field}'")
 
 
 def ensure_qdrant_collection(
@@ -212,6 +347,7 @@ def ensure_qdrant_collection(
     collection_name: str,
     vector_size: int,
     distance: str,
+    cfg: Optional[EmbedConfig] = None,
 ) -> None:
     from qdrant_client.http import models as qmodels  # type: ignore
     from qdrant_client.http.exceptions import UnexpectedResponse  # type: ignore
@@ -222,7 +358,17 @@ def ensure_qdrant_collection(
         "euclid": qmodels.Distance.EUCLID,
     }
     metric = metric_map.get(distance.lower(), qmodels.Distance.COSINE)
+    hnsw_config, quantization_config = _collection_tuning(cfg or EmbedConfig(json_path="", collection_name=collection_name))
 
+    def recreate() -> None:
+        client.recreate_collection(
+            collection_name=collection_name,
+            vectors_config=qmodels.VectorParams(size=vector_size, distance=metric),
+            hnsw_config=hnsw_config,
+            quantization_config=quantization_config,
+        )
+
+    existing = False
     try:
         info = client.get_collection(collection_name)
         current_vectors = info.config.params.vectors
@@ -234,21 +380,29 @@ def ensure_qdrant_collection(
         
         if current_size is not None and int(current_size) != int(vector_size):
             print(f"⚠️  Collection '{collection_name}' exists with size {current_size}, recreating with size {vector_size}...")
-            client.recreate_collection(
-                collection_name=collection_name,
-                vectors_config=qmodels.VectorParams(size=vector_size, distance=metric),
-            )
+            recreate()
             print(f"✅ Collection '{collection_name}' recreated successfully")
         else:
             print(f"✅ Collection '{collection_name}' already exists with correct size {vector_size}")
+            existing = True
     except (UnexpectedResponse, Exception) as e:
         print(f"📦 Creating new collection '{collection_name}' with size {vector_size}...")
-        client.recreate_collection(
-            collection_name=collection_name,
-            vectors_config=qmodels.VectorParams(size=vector_size, distance=metric),
-        )
+        recreate()
         print(f"✅ Collection '{collection_name}' created successfully")
 
+    if existing:
+        # Apply tuning changes in place; Qdrant rebuilds the index/quantized vectors in the background
+        try:
+            client.update_collection(
+                collection_name=collection_name,
+                hnsw_config=hnsw_config,
+                quantization_config=quantization_config or qmodels.Disabled.DISABLED,
+            )
+        except Exception as e:
+            print(f"⚠️  Could not update tuning of '{collection_name}': {e}")
+
+    ensure_payload_indexes(client, collection_name)
+
 
 def upsert_points(
     client: "QdrantClient",  # type: ignore[name-defined]
@@ -275,6 +429,85 @@ def upsert_points(
     print(f"✅ All {len(points)} points upserted successfully!")
 
 
+class LocalIndexWriter:
+    """
+    Streams the in-process index for the chatbot's LocalVectorIndex: L2-normalized
+    float32 rows are appended to a scratch file and turned into ``<path>.npy`` on
+    close, so memory holds one chunk of vectors at a time (plus the payloads).
+    """
+
+    def __init__(self, path: str, cfg: EmbedConfig) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.cfg = cfg
+        self.dimension = 0
+        self.ids: List[int] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self._raw_path = f"{path}.rows.tmp"
+        self._raw = open(self._raw_path, "wb")
+
+    def add(self, points: List[Dict[str, Any]]) -> None:
+        import numpy as np  # type: ignore
+
+        if not points:
+            return
+        matrix = np.asarray([p["vector"] for p in points], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = np.ascontiguousarray(matrix / np.maximum(norms, 1e-12))
+        self.dimension = int(matrix.shape[1])
+        self._raw.write(matrix.tobytes())
+        self.ids.extend(p["id"] for p in points)
+        self.payloads.extend(p["payload"] for p in points)
+
+    def close(self) -> None:
+        import numpy as np  # type: ignore
+
+        self._raw.close()
+        rows = np.memmap(self._raw_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dimension)) \
+            if self.ids else np.zeros((0, 0), dtype=np.float32)
+        # Written next to the live files and swapped in at the end: the previous export may still be mmapped
+        matrix = np.lib.format.open_memmap(f"{self.path}.tmp.npy", mode="w+", dtype=np.float32, shape=rows.shape)
+        for start in range(0, rows.shape[0], 65536):
+            matrix[start : start + 65536] = rows[start : start + 65536]
+        matrix.flush()
+        del matrix, rows
+        meta = {
+            "embedder_type": self.cfg.embedder_type,
+            "model_name": self.cfg.model_name,
+            "dimension": self.dimension,
+            "ids": self.ids,
+            "payloads": self.payloads,
+        }
+        with open(f"{self.path}.tmp.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(f"{self.path}.tmp.npy", f"{self.path}.npy")
+        os.replace(f"{self.path}.tmp.json", f"{self.path}.json")
+        os.remove(self._raw_path)
+        print(f"   ✓ Wrote {len(self.ids)} x {self.dimension} matrix to {self.path}.npy")
+
+
+def export_local_index(path: str, points: List[Dict[str, Any]], cfg: EmbedConfig) -> None:
+    """Write an L2-normalized float32 matrix (.npy, memory-mappable) plus payloads (.json)."""
+    writer = LocalIndexWriter(path, cfg)
+    writer.add(points)
+    writer.close()
+
+
+def load_local_rows(path: str) -> Tuple[Any, Dict[int, int]]:
+    """Memory-mapped matrix of a previous export and its row by point id (None, {} if there is none)."""
+    import numpy as np  # type: ignore
+
+    try:
+        matrix = np.load(f"{path}.npy", mmap_mode="r")
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            ids = json.load(f)["ids"]
+    except (FileNotFoundError, KeyError):
+        return None, {}
+    return matrix, {int(point_id): row for row, point_id in enumerate(ids)}
+
+
 def create_qdrant_client(cfg: EmbedConfig) -> "QdrantClient":  # type: ignore[name-defined]
     from qdrant_client import QdrantClient  # type: ignore
 
@@ -285,50 +518,386 @@ def create_qdrant_client(cfg: EmbedConfig) -> "QdrantClient":  # type: ignore[na
     return QdrantClient(host=host, port=port_env, api_key=cfg.qdrant_api_key)
 
 
+def _content_hash(value: Any) -> str:
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+def product_key(product: Dict[str, Any]) -> str:
+    return str(product.get("product_code") or point_id_for(product))
+
+
+def default_manifest_path(cfg: EmbedConfig) -> str:
+    return f"{os.path.splitext(cfg.json_path)[0]}.{cfg.collection_name}.manifest.json"
+
+
+def load_manifest(path: str, cfg: EmbedConfig) -> Dict[str, Dict[str, Any]]:
+    """Entries of a previous run, or {} if missing or built with another embedder/collection."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️  Ignoring unreadable manifest {path}: {e}")
+        return {}
+    if (manifest.get("embedder_type"), manifest.get("model_name"), manifest.get("collection_name")) != (
+        cfg.embedder_type, cfg.model_name, cfg.collection_name
+    ):
+        print(f"⚠️  Manifest {path} was built with another embedder/collection, doing a full run")
+        return {}
+    return manifest.get("products", {})
+
+
+def save_manifest(path: str, cfg: EmbedConfig, entries: Dict[str, Dict[str, Any]]) -> None:
+    manifest = {
+        "embedder_type": cfg.embedder_type,
+        "model_name": cfg.model_name,
+        "collection_name": cfg.collection_name,
+        "products": entries,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def manifest_entry(product: Dict[str, Any], text: str) -> Dict[str, Any]:
+    return {
+        "id": point_id_for(product),
+        "text": _content_hash(text),
+        "payload": _content_hash(build_payload(product)),
+    }
+
+
+def checkpoint_path_for(manifest_path: str) -> str:
+    return f"{manifest_path}.checkpoint"
+
+
+def load_checkpoint(path: str, cfg: EmbedConfig) -> Dict[str, Dict[str, Any]]:
+    """Entries an interrupted run already wrote to Qdrant (JSON lines; first line identifies the run)."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if (header.get("embedder_type"), header.get("model_name"), header.get("collection_name")) != (
+                cfg.embedder_type, cfg.model_name, cfg.collection_name
+            ):
+                return {}
+            for line in f:
+                try:
+                    entries.update(json.loads(line))
+                except ValueError:
+                    break  # torn last line of a crashed run
+    except FileNotFoundError:
+        return {}
+    return entries
+
+
+class Checkpoint:
+    """Append-only record of the products whose writes Qdrant has acknowledged."""
+
+    def __init__(self, path: str, cfg: EmbedConfig, resume: bool) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        if not resume or self._file.tell() == 0:
+            header = {"embedder_type": cfg.embedder_type, "model_name": cfg.model_name, "collection_name": cfg.collection_name}
+            self._file.write(json.dumps(header) + "\n")
+            self._file.flush()
+
+    def record(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        with self._lock:
+            self._file.write(json.dumps(entries, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def finish(self) -> None:
+        self._file.close()
+        os.remove(self.path)
+
+
+def overwrite_payloads(
+    client: "QdrantClient",  # type: ignore[name-defined]
+    collection_name: str,
+    points: List[Tuple[int, Dict[str, Any]]],
+    batch_size: int,
+    wait: bool = True,
+) -> None:
+    from qdrant_client import models as rest  # type: ignore
+
+    for i in range(0, len(points), batch_size):
+        client.batch_update_points(
+            collection_name=collection_name,
+            update_operations=[
+                rest.OverwritePayloadOperation(overwrite_payload=rest.SetPayload(payload=payload, points=[point_id]))
+                for point_id, payload in points[i : i + batch_size]
+            ],
+            wait=wait,
+        )
+
+
+def delete_points(
+    client: "QdrantClient",  # type: ignore[name-defined]
+    collection_name: str,
+    point_ids: List[int],
+    wait: bool = True,
+) -> None:
+    from qdrant_client import models as rest  # type: ignore
+
+    client.delete(
+        collection_name=collection_name,
+        points_selector=rest.PointIdsList(points=point_ids),
+        wait=wait,
+    )
+    print(f"✅ Deleted {len(point_ids)} points of removed products")
+
+
+class QdrantSyncWorker(threading.Thread):
+    """
+    Consumer side of the pipeline: applies writes to Qdrant in submission order
+    on its own thread, so the producer can embed the next chunk meanwhile.
+    Writes go out with wait=False (acknowledged once in Qdrant's WAL); the last
+    one is sent with wait=True, which returns only after everything queued before
+    it has been applied. The bounded queue caps how many chunks are in memory.
+    """
+
+    _DONE = object()
+
+    def __init__(
+        self,
+        client: "QdrantClient",  # type: ignore[name-defined]
+        collection_name: str,
+        batch_size: int,
+        depth: int,
+        checkpoint: Optional[Checkpoint],
+    ) -> None:
+        super().__init__(name="qdrant-sync", daemon=True)
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.error: Optional[BaseException] = None
+        self.upserted = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+
+    def submit(self, kind: str, items: List[Any], entries: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        if self.error is not None:
+            raise RuntimeError("Qdrant sync failed") from self.error
+        self._queue.put((kind, items, dict(entries or {})))
+
+    def close(self) -> None:
+        """Final barrier: blocks until every submitted write has been applied."""
+        self._queue.put(self._DONE)
+        self.join()
+        if self.error is not None:
+            raise RuntimeError("Qdrant sync failed") from self.error
+
+    def _apply(self, op: Tuple[str, List[Any], Dict[str, Dict[str, Any]]], wait: bool) -> None:
+        from qdrant_client import models as rest  # type: ignore
+
+        kind, items, entries = op
+        if kind == "upsert":
+            for i in range(0, len(items), self.batch_size):
+                batch = items[i : i + self.batch_size]
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=[rest.PointStruct(id=p["id"], vector=p["vector"], payload=p["payload"]) for p in batch],
+                    wait=wait and i + self.batch_size >= len(items),
+                )
+            self.upserted += len(items)
+        elif kind == "payload":
+            overwrite_payloads(self.client, self.collection_name, items, self.batch_size, wait=wait)
+        elif kind == "delete":
+            delete_points(self.client, self.collection_name, items, wait=wait)
+        if self.checkpoint is not None:
+            self.checkpoint.record(entries)
+
+    def run(self) -> None:
+        held = None
+        while True:
+            op = self._queue.get()
+            if op is self._DONE and (self.error is not None or held is None):
+                return
+            if self.error is not None:
+                continue  # drain so the producer never blocks on a dead consumer
+            try:
+                if op is self._DONE:
+                    self._apply(held, wait=True)
+                    return
+                kind, items, entries = op
+                if not items:
+                    # Nothing to write: the entries are safe once the writes before them are
+                    if held is not None:
+                        held[2].update(entries)
+                    elif self.checkpoint is not None:
+                        self.checkpoint.record(entries)
+                    continue
+                if held is not None:
+                    self._apply(held, wait=False)
+                held = op
+            except BaseException as exc:
+                self.error = exc
+                if op is self._DONE:
+                    return
+
+
+def iter_products(json_path: str) -> Iterator[Dict[str, Any]]:
+    """Stream the JSON array with ijson when it is installed, else load it whole."""
+    try:
+        import ijson  # type: ignore
+    except ImportError:
+        print("⚠️  ijson is not installed, loading the whole JSON file into memory (pip install ijson)")
+        yield from read_products(json_path)
+        return
+    with open(json_path, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 def run_pipeline(cfg: EmbedConfig) -> Tuple[int, int]:
     _load_optional_dotenv()
 
     print("=" * 60)
-    print("🔥 EMBEDDING PIPELINE STARTED")
+    print("🔥 EMBEDDING PIPELINE STARTED" + (" (incremental)" if cfg.incremental else ""))
     print("=" * 60)
-    
-    print(f"\n📖 Step 1: Reading products from {cfg.json_path}...")
-    products = read_products(cfg.json_path)
-    print(f"   ✓ Loaded {len(products)} products")
-    
-    print(f"\n🔤 Step 2: Rendering product texts...")
-    texts = [render_product_text(p) for p in products]
-    print(f"   ✓ Rendered {len(texts)} texts")
-
-    print(f"\n🧠 Step 3: Embedding with {cfg.embedder_type} (model: {cfg.model_name or 'default'})...")
-    embedder = build_embedder(cfg.embedder_type, cfg.model_name)
-    print(f"   ⏳ Processing {len(texts)} texts (dimension: {embedder.dimension})...")
-    embeddings = embedder.embed_texts(texts)
-    print(f"   ✓ Generated {len(embeddings)} embeddings")
-
-    print(f"\n🔌 Step 4: Connecting to Qdrant...")
-    client = create_qdrant_client(cfg)
-    print(f"   ✓ Connected to Qdrant")
-    
-    print(f"\n📦 Step 5: Ensuring collection '{cfg.collection_name}'...")
-    ensure_qdrant_collection(
-        client=client,
-        collection_name=cfg.collection_name,
-        vector_size=embedder.dimension,
-        distance=cfg.distance,
+
+    embedder = build_embedder(cfg.embedder_type, cfg.model_name, cfg.batch_size, cfg.embed_concurrency)
+
+    client = None
+    if cfg.skip_qdrant:
+        print("\n⏭️  Skipping Qdrant (SKIP_QDRANT=1)")
+    else:
+        print(f"\n🔌 Step 1: Connecting to Qdrant...")
+        client = create_qdrant_client(cfg)
+        print(f"   ✓ Connected to Qdrant")
+
+        print(f"\n📦 Step 2: Ensuring collection '{cfg.collection_name}'...")
+        ensure_qdrant_collection(
+            client=client,
+            collection_name=cfg.collection_name,
+            vector_size=embedder.dimension,
+            distance=cfg.distance,
+            cfg=cfg,
+        )
+
+    # Baseline: the last completed run (incremental) plus whatever an interrupted run already wrote
+    manifest_path = cfg.manifest_path or default_manifest_path(cfg)
+    checkpoint_path = checkpoint_path_for(manifest_path)
+    baseline = load_manifest(manifest_path, cfg) if cfg.incremental else {}
+    resumed = load_checkpoint(checkpoint_path, cfg)
+    if resumed:
+        print(f"↩️  Resuming: {len(resumed)} products were written by an interrupted run")
+    baseline.update(resumed)
+    if baseline and client is not None and client.count(cfg.collection_name, exact=True).count == 0:
+        print("⚠️  Collection is empty (new or recreated), ignoring manifest")
+        baseline, resumed = {}, {}
+    checkpoint = Checkpoint(checkpoint_path, cfg, resume=bool(resumed))
+
+    # The export needs every vector: unchanged ones come from the previous export
+    writer = LocalIndexWriter(cfg.local_index_path, cfg) if cfg.local_index_path else None
+    previous_rows, previous_row_ids = load_local_rows(cfg.local_index_path) if writer and baseline else (None, {})
+
+    worker = None
+    if client is not None:
+        worker = QdrantSyncWorker(client, cfg.collection_name, cfg.batch_size, cfg.pipeline_depth, checkpoint)
+        worker.start()
+
+    # Chunks big enough to keep every embedding worker busy
+    chunk_size = cfg.batch_size * max(1, cfg.embed_concurrency)
+    print(f"\n🧠 Step 3: Streaming {cfg.json_path} through {cfg.embedder_type} embeddings in chunks of {chunk_size}...")
+    entries: Dict[str, Dict[str, Any]] = {}
+    counts = {"products": 0, "embedded": 0, "payload": 0}
+    try:
+        for chunk_index, products in enumerate(_chunked(iter_products(cfg.json_path), chunk_size), start=1):
+            texts = [render_product_text(p) for p in products]
+            chunk_entries = {product_key(p): manifest_entry(p, t) for p, t in zip(products, texts)}
+            to_embed: List[int] = []
+            payload_only: List[int] = []
+            for i, product in enumerate(products):
+                entry = chunk_entries[product_key(product)]
+                previous = baseline.get(product_key(product))
+                if (
+                    previous is None
+                    or previous.get("text") != entry["text"]
+                    or previous.get("id") != entry["id"]
+                    or (writer is not None and entry["id"] not in previous_row_ids)
+                ):
+                    to_embed.append(i)
+                elif previous.get("payload") != entry["payload"]:
+                    payload_only.append(i)
+
+            embeddings = embedder.embed_texts([texts[i] for i in to_embed]) if to_embed else []
+            points = build_points([products[i] for i in to_embed], embeddings)
+            payloads = [(point_id_for(products[i]), build_payload(products[i])) for i in payload_only]
+
+            if writer is not None:
+                vectors = {p["id"]: p["vector"] for p in points}
+                writer.add(build_points(products, [
+                    vectors.get(point_id_for(p)) or previous_rows[previous_row_ids[point_id_for(p)]]
+                    for p in products
+                ]))
+            if worker is not None:
+                # Blocks while the queue is full, so at most pipeline_depth chunks wait in memory
+                worker.submit("upsert", points)
+                worker.submit("payload", payloads, chunk_entries)
+            else:
+                checkpoint.record(chunk_entries)
+
+            entries.update(chunk_entries)
+            counts["products"] += len(products)
+            counts["embedded"] += len(to_embed)
+            counts["payload"] += len(payload_only)
+            print(
+                f"  ✓ Chunk {chunk_index}: {len(products)} products, {len(to_embed)} embedded, "
+                f"{len(payload_only)} payload-only"
+            )
+
+        current_ids = {entry["id"] for entry in entries.values()}
+        removed = sorted({entry["id"] for entry in baseline.values()} - current_ids)
+
+        if writer is not None:
+            print(f"\n🗂️  Step 4: Finalizing local vector index at {cfg.local_index_path}...")
+            del previous_rows
+            writer.close()
+
+        if worker is not None:
+            print(f"\n💾 Step 5: Waiting for Qdrant to apply all writes...")
+            if removed:
+                worker.submit("delete", removed)
+            worker.close()
+    except BaseException:
+        if worker is not None and worker.is_alive():
+            # Let acknowledged writes reach the checkpoint so a rerun can resume after them
+            try:
+                worker.close()
+            except RuntimeError:
+                pass
+        raise
+
+    save_manifest(manifest_path, cfg, entries)
+    checkpoint.finish()
+    print(
+        f"   ✓ {counts['products']} products: {counts['embedded']} embedded, {counts['payload']} payload-only, "
+        f"{len(removed)} removed; manifest written to {manifest_path}"
     )
 
-    print(f"\n🔧 Step 6: Building points...")
-    points = build_points(products, embeddings)
-    print(f"   ✓ Built {len(points)} points")
-    
-    print(f"\n💾 Step 7: Upserting to Qdrant collection '{cfg.collection_name}'...")
-    upsert_points(client, cfg.collection_name, points, cfg.batch_size)
-    
     print("\n" + "=" * 60)
     print("✅ PIPELINE COMPLETED SUCCESSFULLY!")
     print("=" * 60)
-    return (len(products), len(points))
+    return (counts["products"], counts["embedded"])
 
 
 def default_config() -> EmbedConfig:
@@ -337,23 +906,41 @@ def default_config() -> EmbedConfig:
     embedder_type = os.getenv("EMBEDDER_TYPE", "gemini")
     model_name = os.getenv("EMBED_MODEL_NAME")
     batch_size = int(os.getenv("EMBED_BATCH", "128"))
+    embed_concurrency = int(os.getenv("EMBED_CONCURRENCY", "4"))
+    pipeline_depth = int(os.getenv("EMBED_PIPELINE_DEPTH", "2"))
     # Prefer URL if present; else host/port
     qdrant_url = os.getenv("QDRANT_URL")
     qdrant_host = os.getenv("QDRANT_HOST")
     qdrant_port = int(os.getenv("QDRANT_PORT", "6333")) if os.getenv("QDRANT_PORT") else None
     qdrant_api_key = os.getenv("QDRANT_API_KEY")
     distance = os.getenv("QDRANT_DISTANCE", "Cosine")
+    hnsw_m = int(os.getenv("QDRANT_HNSW_M", "16"))
+    hnsw_ef_construct = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+    quantization = os.getenv("QDRANT_QUANTIZATION", "int8")
+    local_index_path = os.getenv("LOCAL_INDEX_PATH")
+    skip_qdrant = os.getenv("SKIP_QDRANT", "").lower() in ("1", "true", "yes")
+    incremental = os.getenv("INCREMENTAL", "").lower() in ("1", "true", "yes")
+    manifest_path = os.getenv("EMBED_MANIFEST_PATH")
     return EmbedConfig(
         json_path=json_path,
         collection_name=collection_name,
         embedder_type=embedder_type,
         model_name=model_name,
         batch_size=batch_size,
+        embed_concurrency=embed_concurrency,
+        pipeline_depth=pipeline_depth,
         qdrant_url=qdrant_url,
         qdrant_host=qdrant_host,
         qdrant_port=qdrant_port,
         qdrant_api_key=qdrant_api_key,
         distance=distance,
+        hnsw_m=hnsw_m,
+        hnsw_ef_construct=hnsw_ef_construct,
+        quantization=quantization,
+        local_index_path=local_index_path,
+        skip_qdrant=skip_qdrant,
+        incremental=incremental,
+        manifest_path=manifest_path,
     )
 
 